@@ -0,0 +1,285 @@
+"""
+Local stand-in for the resources/activities API used by utils/ and start.py.
+
+Two ways to use it:
+- in-process: AsyncAPIClient(cfg, transport=MockTransport(MockAPI(...))) (no sockets)
+- over HTTP:  python -m benchmarks.mock_api --port 8765, then API_BASE_URL=http://127.0.0.1:8765
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+
+ACTIVITY_PATH = re.compile(r"^/v1/activities/(?P<activity_id>\d+)$")
+RESOURCE_PATH = re.compile(r"^/v1/resources/(?P<plot_id>\d+)$")
+
+
+@dataclass
+class MockAPISettings:
+    projects: int = 20
+    plots: int = 2000
+    page_size: int = 100
+    latency_ms: float = 20.0
+    # fixed | uniform (0..2x) | lognormal (long tail, median = latency_ms)
+    latency_distribution: str = "lognormal"
+    error_rate: float = 0.0
+    error_status: int = 503
+    # Requests per second before answering 429 (0 = unlimited).
+    rate_limit_rps: float = 0.0
+    vertices: int = 8
+    seed: int = 42
+
+
+class MockAPI:
+    """
+    Deterministic fake data plus the API semantics the downloaders rely on:
+    paged searches (page in query or body, totalPages) filtered by project id
+    (resourceId or projectId), /details?ids= (or ids in a POST body), activity by
+    id, and PATCH on a plot.
+    """
+
+    def __init__(self, settings: Optional[MockAPISettings] = None):
+        self.settings = settings or MockAPISettings()
+        self._random = random.Random(self.settings.seed)
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self.request_count = 0
+        self.error_count = 0
+        self.throttled_count = 0
+        # Rows are deterministic per id; caching keeps the mock's own JSON work out of the numbers.
+        self._cache: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        self._project_ids: Dict[Optional[int], List[int]] = {}
+
+    # --- data -----------------------------------------------------------------
+
+    def _cached(self, kind: str, row_id: int, build) -> Dict[str, Any]:
+        key = (kind, row_id)
+        row = self._cache.get(key)
+        if row is None:
+            row = self._cache[key] = build(row_id)
+        return row
+
+    def _plot(self, plot_id: int) -> Dict[str, Any]:
+        return self._cached("plot", plot_id, self._build_plot)
+
+    def _activity(self, activity_id: int) -> Dict[str, Any]:
+        return self._cached("activity", activity_id, self._build_activity)
+
+    def _build_plot(self, plot_id: int) -> Dict[str, Any]:
+        rng = random.Random(plot_id)
+        lon, lat = rng.uniform(100.0, 120.0), rng.uniform(-8.0, 5.0)
+        ring = [[round(lon + 0.001 * i, 7), round(lat + 0.001 * (i % 2), 7)] for i in range(self.settings.vertices)]
+        ring.append(ring[0])
+        return {
+            "id": plot_id,
+            "name": f"plot {plot_id}",
+            "projectId": plot_id % self.settings.projects + 1,
+            "status": "recorded",
+            "plotLabels": ["mock"],
+            "polygon": {"type": "Polygon", "coordinates": [ring]},
+        }
+
+    def _build_activity(self, activity_id: int) -> Dict[str, Any]:
+        plot_id = activity_id
+        return {
+            "id": activity_id,
+            "plotID": plot_id,
+            "activityType": "land_survey",
+            "status": "submitted",
+            "landOwner": {"name": f"owner {plot_id}"},
+            "measurement": [{"gpsLocation": f"{-2.0 + i * 0.0001},{110.0 + i * 0.0001}"} for i in range(4)],
+        }
+
+    def _plot_ids(self, project_id: Optional[int]) -> List[int]:
+        """
+        Plot ids of one project (the same ids as its activities), or all plots.
+        """
+        ids = self._project_ids.get(project_id)
+        if ids is None:
+            ids = [
+                plot_id
+                for plot_id in range(1, self.settings.plots + 1)
+                if project_id is None or plot_id % self.settings.projects + 1 == project_id
+            ]
+            self._project_ids[project_id] = ids
+        return ids
+
+    def _page(self, ids: List[int], page: int, make_row) -> Dict[str, Any]:
+        size = self.settings.page_size
+        total_pages = max(1, -(-len(ids) // size))
+        rows = [make_row(row_id) for row_id in ids[page * size : (page + 1) * size]]
+        return {"rows": rows, "totalPages": total_pages, "totalRows": len(ids)}
+
+    # --- behaviour ------------------------------------------------------------
+
+    def delay_seconds(self) -> float:
+        base = self.settings.latency_ms / 1000.0
+        distribution = self.settings.latency_distribution
+        with self._lock:
+            if distribution == "uniform":
+                return self._random.uniform(0.0, 2 * base)
+            if distribution == "lognormal" and base > 0:
+                return base * self._random.lognormvariate(0.0, 0.5)
+        return base
+
+    def _admit(self) -> Optional[Tuple[int, Dict[str, str], bytes]]:
+        with self._lock:
+            self.request_count += 1
+            if self.settings.rate_limit_rps > 0:
+                now = time.monotonic()
+                if now - self._window_start >= 1.0:
+                    self._window_start, self._window_count = now, 0
+                self._window_count += 1
+                if self._window_count > self.settings.rate_limit_rps:
+                    self.throttled_count += 1
+                    return 429, {"Retry-After": "1"}, b'{"error": "rate limited"}'
+            if self.settings.error_rate and self._random.random() < self.settings.error_rate:
+                self.error_count += 1
+                return self.settings.error_status, {}, b'{"error": "injected"}'
+        return None
+
+    def handle(self, method: str, path: str, query: Dict[str, str], body: Dict[str, Any]) -> Tuple[int, Dict[str, str], bytes]:
+        rejected = self._admit()
+        if rejected is not None:
+            return rejected
+        method = method.upper()
+        merged = {**body, **query}
+        page = int(merged.get("page", 0) or 0)
+        project = merged.get("resourceId", merged.get("projectId"))
+        project_id = int(project) if project not in (None, "") else None
+
+        if path == "/v1/resources" and method == "GET":
+            data = {"rows": [{"id": i, "name": f"Mock Project {i}"} for i in range(1, self.settings.projects + 1)]}
+        elif path == "/v1/resources/search":
+            data = self._page(self._plot_ids(project_id), page, self._plot)
+        elif path == "/v1/resources/details":
+            ids = merged.get("ids", "")
+            id_list = ids if isinstance(ids, list) else [i for i in str(ids).split(",") if i]
+            data = {"rows": [self._plot(int(i)) for i in id_list if 0 < int(i) <= self.settings.plots]}
+        elif path == "/v1/activities/search":
+            data = self._page(self._plot_ids(project_id), page, self._activity)
+        elif ACTIVITY_PATH.match(path):
+            data = self._activity(int(ACTIVITY_PATH.match(path).group("activity_id")))
+        elif RESOURCE_PATH.match(path) and method == "PATCH":
+            return 204, {}, b""
+        else:
+            return 404, {}, b'{"error": "not found"}'
+        return 200, {"Content-Type": "application/json"}, json.dumps(data).encode("utf-8")
+
+    def stats(self) -> Dict[str, int]:
+        return {"requests": self.request_count, "errors": self.error_count, "throttled": self.throttled_count}
+
+
+def _parse_body(content: bytes) -> Dict[str, Any]:
+    if not content:
+        return {}
+    try:
+        parsed = json.loads(content)
+    except ValueError:
+        return {}
+    return parsed if isinstance(parsed, dict) else {}
+
+
+class MockTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport answering from a MockAPI with simulated latency (asyncio.sleep).
+    """
+
+    def __init__(self, api: MockAPI):
+        self.api = api
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        content = await request.aread()
+        query = {key: value for key, value in request.url.params.items()}
+        status, headers, body = self.api.handle(request.method, request.url.path, query, _parse_body(content))
+        await asyncio.sleep(self.api.delay_seconds())
+        return httpx.Response(status, headers=headers, content=body, request=request)
+
+
+def make_handler(api: MockAPI):
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _dispatch(self) -> None:
+            parts = urlsplit(self.path)
+            query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+            length = int(self.headers.get("Content-Length", 0) or 0)
+            body = _parse_body(self.rfile.read(length) if length else b"")
+            status, headers, payload = api.handle(self.command, parts.path, query, body)
+            time.sleep(api.delay_seconds())
+            self.send_response(status)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = do_POST = do_PATCH = _dispatch
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    return _Handler
+
+
+def serve(api: MockAPI, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    """
+    Start the mock API on a background thread; call .shutdown() to stop it.
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(api))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def settings_from_args(args: argparse.Namespace) -> MockAPISettings:
+    return MockAPISettings(
+        projects=args.projects,
+        plots=args.plots,
+        page_size=args.page_size,
+        latency_ms=args.latency_ms,
+        latency_distribution=args.latency_distribution,
+        error_rate=args.error_rate,
+        rate_limit_rps=args.rate_limit_rps,
+        seed=args.seed,
+    )
+
+
+def add_settings_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = MockAPISettings()
+    parser.add_argument("--projects", type=int, default=defaults.projects)
+    parser.add_argument("--plots", type=int, default=defaults.plots)
+    parser.add_argument("--page-size", type=int, default=defaults.page_size)
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms)
+    parser.add_argument("--latency-distribution", choices=["fixed", "uniform", "lognormal"], default=defaults.latency_distribution)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--rate-limit-rps", type=float, default=defaults.rate_limit_rps)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run the mock API over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_settings_arguments(parser)
+    args = parser.parse_args(argv)
+    server = serve(MockAPI(settings_from_args(args)), args.host, args.port)
+    print(f"mock API on http://{args.host}:{args.port} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Throughput benchmarks for the downloaders against the local mock API.
+
+    python -m benchmarks.run_benchmarks                       # run + save results
+    python -m benchmarks.run_benchmarks --compare <old.json>  # also diff against a previous run
+
+Each scenario reports requests/s, rows/s and p50/p99 request latency; results are
+written to benchmarks/results/ (named by timestamp and git revision).
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.mock_api import MockAPI, MockTransport, add_settings_arguments, serve, settings_from_args
+from utils.downloader_api import APIConfig, AsyncAPIClient
+from utils.scraping.paginating_download import PaginatingDownload
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+class TimedAPIClient(AsyncAPIClient):
+    """
+    AsyncAPIClient that records the wall time of every request and counts the
+    rows the responses carried.
+    """
+
+    def __init__(self, config: APIConfig, transport=None):
+        super().__init__(config, transport=transport)
+        self.latencies_ms: List[float] = []
+        self.rows_received = 0
+
+    async def request(self, endpoint: str, method: str = "GET", **kwargs: Any) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            data = await super().request(endpoint, method, **kwargs)
+            rows = data.get(self.config.rows_key) if isinstance(data, dict) else None
+            if isinstance(rows, list):
+                self.rows_received += len(rows)
+            return data
+        finally:
+            self.latencies_ms.append((time.perf_counter() - start) * 1000)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+async def _scenario_paging(client: AsyncAPIClient, cfg: APIConfig, args: argparse.Namespace, workdir: Path) -> int:
+    data = await PaginatingDownload.request_paginated_rows(client, cfg, cfg.plots_filter_endpoint, method="POST")
+    return len(data[cfg.rows_key])
+
+
+async def _scenario_details(client: AsyncAPIClient, cfg: APIConfig, args: argparse.Namespace, workdir: Path) -> int:
+    await PaginatingDownload.download_by_ids(
+        client,
+        cfg,
+        list(range(1, args.plots + 1)),
+        str(workdir / "details.json"),
+        details_endpoint=cfg.plots_details_endpoint,
+        details_batch_size=args.batch_size,
+        details_concurrency=args.concurrency,
+        details_method="GET",
+        keep_rows=False,
+    )
+    # download_by_ids writes every row the details responses returned.
+    return client.rows_received
+
+
+async def _scenario_injection(client: AsyncAPIClient, cfg: APIConfig, args: argparse.Namespace, workdir: Path) -> int:
+    data, _ = await PaginatingDownload.download_records(
+        client,
+        cfg,
+        cfg.plots_filter_endpoint,
+        str(workdir / "records.json"),
+        details_endpoint=cfg.plots_details_endpoint,
+        details_batch_size=args.batch_size,
+        details_concurrency=args.concurrency,
+        inject_sources=[
+            {
+                "endpoint": cfg.activities_filter_endpoint,
+                "method": "POST",
+                "attach_as": "land_survey",
+                "target_key": "id",
+                "source_key": "plotID",
+            }
+        ],
+    )
+    return len(data[cfg.rows_key])
+
+
+SCENARIOS: Dict[str, Callable] = {
+    "paging": _scenario_paging,
+    "details": _scenario_details,
+    "injection": _scenario_injection,
+}
+
+
+async def run_scenario(name: str, args: argparse.Namespace, base_url: Optional[str]) -> Dict[str, Any]:
+    api = MockAPI(settings_from_args(args))
+    server = None
+    transport = None
+    if base_url is None:
+        if args.http:
+            server = serve(api, port=0)
+            base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        else:
+            base_url = "http://mock.local"
+            transport = MockTransport(api)
+    cfg = APIConfig(base_url=base_url, auth_token="bench")
+    client = TimedAPIClient(cfg, transport=transport)
+    error = None
+    rows = 0
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            start = time.perf_counter()
+            try:
+                rows = await SCENARIOS[name](client, cfg, args, Path(tmp))
+            except httpx.HTTPError as exc:
+                # Injected errors/429s surface here: the downloaders themselves do not retry.
+                error = f"{type(exc).__name__}: {exc}"
+            seconds = time.perf_counter() - start
+    finally:
+        await client.aclose()
+        if server is not None:
+            server.shutdown()
+    requests_made = len(client.latencies_ms)
+    return {
+        "error": error,
+        "requests": requests_made,
+        "rows": rows,
+        "seconds": round(seconds, 4),
+        "req_per_s": round(requests_made / seconds, 2) if seconds else 0.0,
+        "rows_per_s": round(rows / seconds, 2) if seconds else 0.0,
+        "p50_ms": round(percentile(client.latencies_ms, 50), 2),
+        "p99_ms": round(percentile(client.latencies_ms, 99), 2),
+        # Counters of the in-process/spawned mock only; an external --base-url server keeps its own.
+        "server": api.stats() if args.base_url is None else None,
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: Dict[str, Any], previous: Dict[str, Any], max_regression: float) -> List[str]:
+    """
+    Print per-scenario deltas; return the scenarios whose rows/s dropped by more than max_regression.
+    """
+    regressions = []
+    print(f"\ncompared with {previous.get('revision')} ({previous.get('timestamp')}):")
+    for name, result in current["results"].items():
+        old = previous.get("results", {}).get(name)
+        if result.get("error"):
+            print(f"  {name:<10} failed: {result['error']}")
+            regressions.append(name)
+            continue
+        if not old or not old.get("rows_per_s"):
+            print(f"  {name:<10} no previous result")
+            continue
+        change = result["rows_per_s"] / old["rows_per_s"] - 1
+        print(f"  {name:<10} rows/s {old['rows_per_s']:>10} -> {result['rows_per_s']:>10} ({change:+.1%}), p99 {old['p99_ms']} -> {result['p99_ms']} ms")
+        if change < -max_regression:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the downloaders against the mock API")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="repeatable; default: all")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per scenario; the median run is reported")
+    parser.add_argument("--http", action="store_true", help="go through a local HTTP server instead of the in-process transport")
+    parser.add_argument("--base-url", help="benchmark an already running mock server (python -m benchmarks.mock_api)")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/bench_<time>_<rev>.json)")
+    parser.add_argument("--compare", help="previous results file to diff against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="fail when rows/s drops by more than this fraction")
+    add_settings_arguments(parser)
+    args = parser.parse_args(argv)
+    # Progress rendering is I/O the numbers should not include unless asked for.
+    os.environ.setdefault("API_PROGRESS", "off")
+
+    report: Dict[str, Any] = {
+        "revision": git_revision(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "settings": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": {},
+    }
+    for name in args.scenario or list(SCENARIOS):
+        runs = [asyncio.run(run_scenario(name, args, args.base_url)) for _ in range(max(1, args.repeat))]
+        # Median run by rows/s, so a single noisy run does not decide a comparison.
+        result = sorted(runs, key=lambda run: run["rows_per_s"])[len(runs) // 2]
+        report["results"][name] = result
+        if result["error"]:
+            print(f"{name:<10} failed after {result['requests']} request(s): {result['error']}")
+            continue
+        print(
+            f"{name:<10} {result['requests']:>6} req {result['rows']:>8} rows {result['seconds']:>8.3f}s "
+            f"{result['req_per_s']:>9} req/s {result['rows_per_s']:>10} rows/s p50 {result['p50_ms']} ms p99 {result['p99_ms']} ms"
+        )
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"bench_{datetime.now():%Y%m%d_%H%M%S}_{report['revision']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"results saved to {output}")
+
+    if args.compare:
+        previous = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare(report, previous, args.max_regression)
+        if regressions:
+            print(f"regression in: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,510 @@
+"""
+Non-interactive entry point for scheduled runs (cron, CI) next to the interactive start.py.
+
+    python cli.py search coffee
+    python cli.py download --project 123 --project 456 --activities
+    python cli.py download --project 123 --workers 4
+    python cli.py download --match coffee --project-concurrency 4 --max-in-flight 16 --summary summary.json
+    python cli.py queue-submit --project 123 --wait   # plus: python cli.py queue-work (any number, any machine)
+    python cli.py convert ./json_downloaded_api/plots/123/plot_2024-01-01_x.json --format geoparquet
+    python cli.py update ./01_update_polygon/00_input_to_update_and_backup/input/plots.shp --id-column plot_id
+
+Options can also come from a JSON file (--config): top-level keys apply to every
+command, a section named after the command overrides them, and explicit command
+line flags win. Heavy libraries (geopandas, pandas, shapely, pyogrio) are imported
+only by the commands that need them, so `search` starts fast.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_PLOTS_FOLDER = "./json_downloaded_api/plots"
+DEFAULT_GEO_FOLDER = "./00_GEOJSON_API/plots"
+DEFAULT_UPDATE_FOLDER = "./01_update_polygon/00_input_to_update_and_backup/backup"
+
+
+def _parse_filters(items: Optional[List[str]]) -> Dict[str, Any]:
+    filters: Dict[str, Any] = {}
+    for item in items or []:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise SystemExit(f"--filter expects key=value, got: {item}")
+        filters[key] = value
+    return filters
+
+
+def _client():
+    from utils.downloader_api import build_client_from_env
+
+    return build_client_from_env()
+
+
+# --- search ----------------------------------------------------------------------
+
+
+async def _search(args: argparse.Namespace) -> int:
+    from utils.project_catalog import get_project_catalog
+
+    cfg, client = _client()
+    try:
+        catalog = await get_project_catalog(client, cfg, refresh=args.refresh)
+    finally:
+        await client.aclose()
+    matches = catalog.search(args.keyword)
+    if not matches and args.fuzzy:
+        for row in catalog.suggest(args.keyword):
+            print(f"did you mean: {row.get(cfg.project_id_field)}\t{row.get(cfg.project_name_field)}", file=sys.stderr)
+    if args.json:
+        print(json.dumps(matches, ensure_ascii=False, indent=2))
+    else:
+        for row in matches:
+            print(f"{row.get(cfg.project_id_field)}\t{row.get(cfg.project_name_field)}")
+    return 0 if matches else 1
+
+
+# --- download --------------------------------------------------------------------
+
+
+async def _download_project(
+    client, cfg, project_id: Any, args: argparse.Namespace, budget_share: Tuple[int, float] = (0, 0.0)
+) -> Dict[str, Any]:
+    from utils.list_all_files import create_folder_file, record_snapshot
+    from utils.scraping.paginating_download import PaginatingDownload
+
+    payload_field = os.getenv("RESOURCE_ID_PAYLOAD_FIELD", os.getenv("PROJECT_ID_PAYLOAD_FIELD", "resourceId"))
+    label = args.name or str(project_id)
+    json_output = create_folder_file(args.output, str(project_id), f"{label}_v2")
+    if args.workers > 1:
+        from utils.scraping.sharded_download import download_records_sharded
+
+        await download_records_sharded(
+            client,
+            cfg,
+            cfg.plots_filter_endpoint,
+            json_output,
+            workers=args.workers,
+            max_in_flight=budget_share[0],
+            requests_per_second=budget_share[1],
+            root_payload={payload_field: project_id},
+            extra_filters=_parse_filters(args.filter),
+            fetch_details=not args.no_details,
+            details_endpoint=cfg.plots_details_endpoint,
+            details_id_field=cfg.plot_id_field,
+        )
+        with open(json_output, "r", encoding="utf-8") as file:
+            data = json.load(file)
+    else:
+        data, _ = await PaginatingDownload.download_records(
+            client,
+            cfg,
+            cfg.plots_filter_endpoint,
+            json_output,
+            root_payload={payload_field: project_id},
+            extra_filters=_parse_filters(args.filter),
+            fetch_details=not args.no_details,
+            details_endpoint=cfg.plots_details_endpoint,
+            details_id_field=cfg.plot_id_field,
+        )
+    record_snapshot(json_output, project_id, "plots_details", row_count=len(data.get(cfg.rows_key, [])))
+    result: Dict[str, Any] = {"project": project_id, "plots": len(data.get(cfg.rows_key, [])), "json": json_output}
+
+    activities: Optional[List[Dict[str, Any]]] = None
+    if args.activities:
+        plot_ids = [row.get(cfg.plot_id_field) for row in data.get(cfg.rows_key, []) if isinstance(row, dict)]
+        activities = await PaginatingDownload.download_plot_activities(client, cfg, project_id, plot_ids)
+        activities_output = create_folder_file(args.output, str(project_id), f"{label}_dfs_async")
+        client.save_json(activities, activities_output)
+        record_snapshot(activities_output, project_id, "land_survey_activities", row_count=len(activities))
+        result["activities"] = len(activities)
+
+    if args.format != "none":
+        # Off the event loop so other projects keep downloading meanwhile.
+        result["geo"] = await asyncio.to_thread(_export_geo, data, project_id, label, activities, args)
+    return result
+
+
+def _export_geo(data: Dict[str, Any], project_id: Any, label: str, activities, args: argparse.Namespace) -> str:
+    from utils.json_geojson_converter import JsonGeoJSON
+    from utils.list_all_files import create_folder_file, record_snapshot
+
+    converter = JsonGeoJSON(input_dict=data)
+    gdf = converter.convert_plot_togdf()
+    suffix = "_geojson"
+    if activities:
+        from utils.activity_frame import LAND_SURVEY_COLUMNS, LAND_SURVEY_DTYPES, flatten_records
+
+        survey = flatten_records(activities, LAND_SURVEY_COLUMNS, dtypes=LAND_SURVEY_DTYPES)
+        gdf = gdf.merge(survey, on="plotID", how="left").rename(columns={"status_x": "status_plot", "status_y": "status_survey"})
+        suffix = "_Joined_geojson"
+    geo_output = converter.gpd_geojson(gdf, create_folder_file(args.geo_output, str(project_id), f"{label}{suffix}"), args.format)
+    record_snapshot(geo_output, project_id, "plots_joined_geo" if activities else "plots_geo", row_count=len(gdf))
+    return geo_output
+
+
+async def _select_projects(client, cfg, args: argparse.Namespace) -> List[Any]:
+    projects: List[Any] = list(args.project or [])
+    if args.match is not None:
+        from utils.project_catalog import get_project_catalog
+
+        catalog = await get_project_catalog(client, cfg)
+        projects += [row.get(cfg.project_id_field) for row in catalog.search(args.match, fuzzy=False)]
+    return list(dict.fromkeys(projects))
+
+
+async def _download(args: argparse.Namespace) -> int:
+    from utils.scraping.project_scheduler import RequestBudget, run_projects
+
+    budget_share: Tuple[int, float] = (0, 0.0)
+
+    async def job(project_client, cfg, project_id: Any) -> Dict[str, Any]:
+        result = await _download_project(project_client, cfg, project_id, args, budget_share)
+        print(json.dumps(result, ensure_ascii=False))
+        return result
+
+    cfg, client = _client()
+    try:
+        projects = await _select_projects(client, cfg, args)
+        if not projects:
+            print("no projects selected", file=sys.stderr)
+            return 1
+        # Worker processes cannot draw from the in-process budget: each running project
+        # gets an equal share, which its workers split again.
+        running = max(1, min(args.project_concurrency, len(projects)))
+        budget_share = (max(1, args.max_in_flight // running), args.requests_per_second / running)
+        results = await run_projects(
+            client,
+            cfg,
+            projects,
+            job,
+            budget=RequestBudget(args.max_in_flight, args.requests_per_second),
+            project_concurrency=args.project_concurrency,
+            summary_path=args.summary,
+        )
+    finally:
+        await client.aclose()
+    for result in results:
+        if result.status != "ok":
+            print(json.dumps({"project": result.project, "error": result.error}), file=sys.stderr)
+    return 1 if any(result.status != "ok" for result in results) else 0
+
+
+# --- convert ---------------------------------------------------------------------
+
+
+def _convert(args: argparse.Namespace) -> int:
+    from utils.json_geojson_converter import JsonGeoJSON
+
+    converter = JsonGeoJSON(input_json=args.input)
+    if args.stream:
+        output = args.output or str(Path(args.input).with_suffix(".geojsons" if args.stream == "geojsonseq" else ".ndjson"))
+        converter.stream_plot_togeojson(output, output_format=args.stream)
+        return 0
+    output = args.output or str(Path(args.input).with_suffix(".geojson"))
+    gdf = converter.convert_plot_togdf()
+    written = converter.gpd_geojson(gdf, output, args.format)
+    print(f"{len(gdf)} feature(s) written to {written}")
+    return 0
+
+
+# --- update ----------------------------------------------------------------------
+
+
+async def _update(args: argparse.Namespace) -> int:
+    from utils.geometry_builder import polygon_patch_payloads
+    from utils.input_reader import parse_bbox, read_vector_columns
+    from utils.list_all_files import create_folder_file, record_snapshot
+    from utils.reproject import reproject_to_wgs84
+    from utils.scraping.bulk_patch import BulkPatcher
+    from utils.scraping.paginating_download import PaginatingDownload
+
+    gdf_input = read_vector_columns(args.input, [args.id_column], bbox=parse_bbox(args.bbox), where=args.where)
+    gdf_input, source_crs = reproject_to_wgs84(gdf_input, precision=args.precision, assume_crs=args.assume_crs)
+    print(f"{len(gdf_input)} feature(s) read from {args.input}, crs {source_crs} -> EPSG:4326")
+
+    payloads = polygon_patch_payloads(gdf_input.geometry.values, output_format=args.polygon_format)
+    plot_ids = [int(i) for i in gdf_input[args.id_column].tolist()]
+    patches = {plot_id: payload for plot_id, payload in zip(plot_ids, payloads) if payload is not None}
+    name = Path(args.input).stem
+
+    cfg, client = _client()
+    try:
+        backup_output = create_folder_file(args.output, name, "_backup")
+        backup, _ = await PaginatingDownload.download_by_ids(client, cfg, plot_ids, backup_output)
+        record_snapshot(backup_output, name, "backup", row_count=len(backup.get(cfg.rows_key, [])))
+
+        if not args.send_unchanged:
+            from utils.geometry_diff import diff_geometries
+            from utils.json_geojson_converter import JsonGeoJSON
+
+            gdf_backup = JsonGeoJSON(input_dict=backup).convert_plot_togdf()
+            diff = diff_geometries(
+                plot_ids,
+                gdf_input.geometry.values,
+                gdf_backup["plotID"].tolist(),
+                gdf_backup.geometry.values,
+                tolerance=float(os.getenv("GEOMETRY_DIFF_TOLERANCE", "1e-8")),
+            )
+            print(f"geometry diff against backup: {diff.counts()}")
+            to_send = set(diff.to_send)
+            patches = {plot_id: payload for plot_id, payload in patches.items() if plot_id in to_send}
+
+        if args.dry_run:
+            print(f"dry run: {len(patches)} plot(s) would be patched")
+            return 0
+
+        report_output = create_folder_file(args.output, name, "_patch_report")
+        patch_endpoint = os.getenv("URL_PATCH_PLOT", f"{cfg.base_url.rstrip('/')}/v1/resources/")
+        only_ids = BulkPatcher.failed_ids(args.resume_report) if args.resume_report else None
+        results = await BulkPatcher(client, patch_endpoint).run(patches, only_ids=only_ids, report_path=report_output)
+        record_snapshot(report_output, name, "patch_report", row_count=len(results))
+    finally:
+        await client.aclose()
+    return 1 if any(result.status != "ok" for result in results) else 0
+
+
+# --- work queue ------------------------------------------------------------------
+
+
+async def _queue_submit(args: argparse.Namespace) -> int:
+    from datetime import datetime
+
+    from utils.list_all_files import create_folder_file
+    from utils.scraping.work_queue import merge_job, open_queue, submit_ids_job, submit_records_job, wait_for_job
+
+    work_queue = open_queue(args.queue)
+    cfg, client = _client()
+    try:
+        if args.ids_file:
+            with open(args.ids_file, "r", encoding="utf-8") as file:
+                record_ids = [line.strip() for line in file if line.strip()]
+            job_id = args.job_id or f"ids_{Path(args.ids_file).stem}_{datetime.now():%Y%m%d_%H%M%S}"
+            output = create_folder_file(args.output, "ids", job_id)
+            submit_ids_job(work_queue, cfg, record_ids, job_id=job_id, output=output, results_dir=args.results_dir, max_attempts=args.max_attempts)
+        else:
+            payload_field = os.getenv("RESOURCE_ID_PAYLOAD_FIELD", os.getenv("PROJECT_ID_PAYLOAD_FIELD", "resourceId"))
+            job_id = args.job_id or f"{args.project}_{datetime.now():%Y%m%d_%H%M%S}"
+            output = create_folder_file(args.output, str(args.project), f"{args.name or args.project}_v2")
+            await submit_records_job(
+                work_queue,
+                client,
+                cfg,
+                cfg.plots_filter_endpoint,
+                job_id=job_id,
+                output=output,
+                results_dir=args.results_dir,
+                pages_per_task=args.pages_per_task,
+                max_attempts=args.max_attempts,
+                root_payload={payload_field: args.project},
+                extra_filters=_parse_filters(args.filter),
+                fetch_details=not args.no_details,
+                details_endpoint=cfg.plots_details_endpoint,
+                details_id_field=cfg.plot_id_field,
+            )
+    except ValueError as exc:
+        # e.g. the job id is already taken; nothing was queued.
+        print(exc, file=sys.stderr)
+        return 1
+    finally:
+        await client.aclose()
+    print(job_id)
+    if not args.wait:
+        return 0
+    counts = await wait_for_job(work_queue, job_id, args.poll_interval)
+    if counts["failed"]:
+        print(f"job {job_id}: {counts['failed']} task(s) failed", file=sys.stderr)
+        return 1
+    merge_job(work_queue, job_id)
+    return 0
+
+
+async def _queue_work(args: argparse.Namespace) -> int:
+    from utils.downloader_api import APIConfig
+    from utils.scraping.work_queue import open_queue, run_worker
+
+    await run_worker(
+        open_queue(args.queue),
+        APIConfig.from_env(),
+        worker_id=args.worker_id,
+        lease_seconds=args.lease_seconds,
+        poll_interval=args.poll_interval,
+        keep_running=args.keep_running,
+        max_tasks=args.max_tasks,
+    )
+    return 0
+
+
+def _queue_status(args: argparse.Namespace) -> int:
+    from utils.scraping.work_queue import open_queue
+
+    work_queue = open_queue(args.queue)
+    job_ids = [args.job] if args.job else work_queue.jobs()
+    for job_id in job_ids:
+        counts = work_queue.counts(job_id)
+        print(f"{job_id}\t" + "\t".join(f"{status}={count}" for status, count in counts.items()))
+        for task in work_queue.tasks(job_id):
+            if task.status == "failed":
+                print(f"  task {task.key}: {task.error}")
+    return 0
+
+
+def _queue_merge(args: argparse.Namespace) -> int:
+    from utils.scraping.work_queue import merge_job, open_queue
+
+    try:
+        merge_job(open_queue(args.queue), args.job, args.output)
+    except (RuntimeError, ValueError) as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    return 0
+
+
+# --- argument parsing ------------------------------------------------------------
+
+
+def build_parser() -> Tuple[argparse.ArgumentParser, Dict[str, argparse.ArgumentParser]]:
+    parser = argparse.ArgumentParser(prog="cli.py", description="Headless API downloader")
+    parser.add_argument("--config", help="JSON file with default options (see module docstring)")
+    parser.add_argument("--env-file", help="dotenv file to load instead of ./.env")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    search = commands.add_parser("search", help="search projects by id or name")
+    search.add_argument("keyword", nargs="?", default="")
+    search.add_argument("--refresh", action="store_true", help="ignore the cached project catalog")
+    search.add_argument("--fuzzy", action="store_true", help="suggest close names when nothing matches")
+    search.add_argument("--json", action="store_true", help="print matching rows as JSON")
+
+    download = commands.add_parser("download", help="download plots (and optionally activities) of projects")
+    download.add_argument("--project", action="append", required=False, help="project id (repeatable)")
+    download.add_argument("--name", help="label used in output file names (default: project id)")
+    download.add_argument("--filter", action="append", help="extra search filter key=value (repeatable)")
+    download.add_argument("--no-details", action="store_true", help="skip the details requests")
+    download.add_argument("--activities", action="store_true", help="also download and join land survey activities")
+    download.add_argument("--format", choices=["geojson", "geoparquet", "gpkg", "none"], default=os.getenv("GEO_OUTPUT_FORMAT", "geojson"))
+    download.add_argument("--output", default=DEFAULT_PLOTS_FOLDER)
+    download.add_argument("--geo-output", default=DEFAULT_GEO_FOLDER)
+    download.add_argument("--match", help="also download every project whose id or name matches this keyword ('' = all)")
+    download.add_argument("--project-concurrency", type=int, default=int(os.getenv("SCHEDULER_PROJECT_CONCURRENCY", "4")))
+    download.add_argument("--max-in-flight", type=int, default=int(os.getenv("SCHEDULER_MAX_IN_FLIGHT", "16")), help="requests in flight across all projects")
+    download.add_argument("--requests-per-second", type=float, default=float(os.getenv("SCHEDULER_REQUESTS_PER_SECOND", "0")), help="global rate limit (0 = none)")
+    download.add_argument("--summary", help="write a per-project JSON summary here")
+    download.add_argument("--workers", type=int, default=int(os.getenv("DOWNLOAD_WORKERS", "1") or 1), help="worker processes per project for pages and details")
+
+    convert = commands.add_parser("convert", help="convert a downloaded JSON file to a geo format")
+    convert.add_argument("input")
+    convert.add_argument("--output")
+    convert.add_argument("--format", choices=["geojson", "geoparquet", "gpkg"], default=os.getenv("GEO_OUTPUT_FORMAT", "geojson"))
+    convert.add_argument("--stream", choices=["geojsonseq", "ndjson"], help="stream features instead of building a frame")
+
+    update = commands.add_parser("update", help="patch plot polygons from a vector file")
+    update.add_argument("input")
+    update.add_argument("--id-column", required=False, help="column holding the plot id")
+    update.add_argument("--output", default=DEFAULT_UPDATE_FOLDER)
+    update.add_argument("--dry-run", action="store_true", help="back up and diff, but do not patch")
+    update.add_argument("--send-unchanged", action="store_true", help="patch plots even when equal to the backup")
+    update.add_argument("--resume-report", help="re-send only the plots that failed in this report")
+    update.add_argument("--polygon-format", default=os.getenv("PATCH_POLYGON_FORMAT", "coordinates"))
+    update.add_argument("--precision", type=int, default=int(os.getenv("INPUT_COORDINATE_PRECISION")) if os.getenv("INPUT_COORDINATE_PRECISION") else None)
+    update.add_argument("--assume-crs", default=os.getenv("INPUT_ASSUME_CRS") or None)
+    update.add_argument("--bbox", default=os.getenv("INPUT_BBOX", ""))
+    update.add_argument("--where", default=os.getenv("INPUT_WHERE") or None)
+
+    queue_default = os.getenv("WORK_QUEUE", "./json_downloaded_api/work_queue.sqlite")
+    poll_default = float(os.getenv("WORK_QUEUE_POLL_SECONDS", "2"))
+    queue_submit = commands.add_parser("queue-submit", help="queue a project (or an id list) as tasks for queue workers")
+    queue_submit.add_argument("--queue", default=queue_default, help="SQLite file or <backend>://<location>")
+    queue_submit.add_argument("--project", help="project id to download as page-range tasks")
+    queue_submit.add_argument("--ids-file", help="text file with one plot id per line, queued as id-batch tasks")
+    queue_submit.add_argument("--job-id")
+    queue_submit.add_argument("--name", help="label used in the output file name (default: project id)")
+    queue_submit.add_argument("--filter", action="append", help="extra search filter key=value (repeatable)")
+    queue_submit.add_argument("--no-details", action="store_true", help="skip the details requests")
+    queue_submit.add_argument("--pages-per-task", type=int, default=int(os.getenv("WORK_QUEUE_PAGES_PER_TASK", "10")))
+    queue_submit.add_argument("--max-attempts", type=int, default=int(os.getenv("WORK_QUEUE_MAX_ATTEMPTS", "3")))
+    queue_submit.add_argument("--output", default=DEFAULT_PLOTS_FOLDER)
+    queue_submit.add_argument("--results-dir", default=os.getenv("WORK_QUEUE_RESULTS", "./json_downloaded_api/work_queue_results"), help="task results folder, shared by all workers")
+    queue_submit.add_argument("--wait", action="store_true", help="coordinate: wait for the workers, then merge")
+    queue_submit.add_argument("--poll-interval", type=float, default=poll_default)
+
+    queue_work = commands.add_parser("queue-work", help="run a worker that leases and downloads queued tasks")
+    queue_work.add_argument("--queue", default=queue_default)
+    queue_work.add_argument("--worker-id", help="default: <hostname>-<pid>")
+    queue_work.add_argument("--lease-seconds", type=float, default=float(os.getenv("WORK_QUEUE_LEASE_SECONDS", "120")))
+    queue_work.add_argument("--poll-interval", type=float, default=poll_default)
+    queue_work.add_argument("--keep-running", action="store_true", help="wait for new jobs instead of exiting when the queue is empty")
+    queue_work.add_argument("--max-tasks", type=int)
+
+    queue_status = commands.add_parser("queue-status", help="task counts per job")
+    queue_status.add_argument("--queue", default=queue_default)
+    queue_status.add_argument("--job")
+
+    queue_merge = commands.add_parser("queue-merge", help="merge a finished job's task results into one file")
+    queue_merge.add_argument("job")
+    queue_merge.add_argument("--queue", default=queue_default)
+    queue_merge.add_argument("--output", help="default: the output chosen at submit time")
+    return parser, {
+        "search": search,
+        "download": download,
+        "convert": convert,
+        "update": update,
+        "queue-submit": queue_submit,
+        "queue-work": queue_work,
+        "queue-status": queue_status,
+        "queue-merge": queue_merge,
+    }
+
+
+def _load_env(argv: List[str]) -> None:
+    # Before building the parser: several option defaults come from the environment.
+    from dotenv import load_dotenv
+
+    pre = argparse.ArgumentParser(add_help=False)
+    pre.add_argument("--env-file")
+    known, _ = pre.parse_known_args(argv)
+    if known.env_file:
+        load_dotenv(known.env_file, override=True)
+    else:
+        load_dotenv()
+
+
+def _apply_config(parser: argparse.ArgumentParser, subparsers: Dict[str, argparse.ArgumentParser], argv: List[str]) -> argparse.Namespace:
+    # First pass finds --config and the command; config values then become defaults.
+    args = parser.parse_args(argv)
+    if not args.config:
+        return args
+    with open(args.config, "r", encoding="utf-8") as file:
+        config = json.load(file)
+    defaults = {k.replace("-", "_"): v for k, v in config.items() if not isinstance(v, dict)}
+    defaults.update({k.replace("-", "_"): v for k, v in (config.get(args.command) or {}).items()})
+    subparsers[args.command].set_defaults(**defaults)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arguments = list(sys.argv[1:] if argv is None else argv)
+    _load_env(arguments)
+    parser, subparsers = build_parser()
+    args = _apply_config(parser, subparsers, arguments)
+    if args.command == "download" and isinstance(args.project, (str, int)):
+        args.project = [args.project]
+    if args.command == "download" and not args.project and args.match is None:
+        parser.error("download needs --project or --match (or either in the config file)")
+    if args.command == "update" and not args.id_column:
+        parser.error("update needs --id-column (or 'id_column' in the config file)")
+    if args.command == "queue-submit" and bool(args.project) == bool(args.ids_file):
+        parser.error("queue-submit needs exactly one of --project or --ids-file")
+    if args.command == "convert":
+        return _convert(args)
+    if args.command == "queue-status":
+        return _queue_status(args)
+    if args.command == "queue-merge":
+        return _queue_merge(args)
+    runner = {"search": _search, "download": _download, "update": _update, "queue-submit": _queue_submit, "queue-work": _queue_work}[args.command]
+    return asyncio.run(runner(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,19 @@
 from utils.json_geojson_converter import JsonGeoJSON
 from utils.scraping.paginating_download import PaginatingDownload
+from utils.scraping.bulk_patch import BulkPatcher
 from utils.list_all_files import check_modified, list_files
-from utils.list_all_files import create_folder_file
+from utils.list_all_files import create_folder_file, record_snapshot
 from utils.filter_search import FilterSearch
 from utils.ui_checker import SelectChecker
+from utils.downloader_api import build_client_from_env
+from utils.activity_frame import LAND_SURVEY_COLUMNS, LAND_SURVEY_DTYPES, flatten_records
+from utils.measurement_points import measurement_points_gdf
+from utils.geometry_diff import diff_geometries
+from utils.geometry_builder import polygon_patch_payloads
+from utils.reproject import reproject_to_wgs84
+from utils.input_reader import list_input_columns, parse_bbox, read_vector_columns
+from utils.profiling import profile_stage
+from utils.progress import Progress
 import asyncio
 import json
 
@@ -13,8 +23,6 @@ import requests
 
 import httpx
 
-import geopandas as gpd
-import pandas as pd
 import os
 from dotenv import load_dotenv
 load_dotenv()
@@ -31,6 +39,19 @@ url_activity_filter = os.getenv("URL_ACT_FILTER", f"{api_base_url}/v1/activities
 url_activity = os.getenv("URL_ACT_ID", f"{api_base_url}/v1/activities/")
 url_patch_plot = os.getenv("URL_PATCH_PLOT", f"{api_base_url}/v1/resources/")
 url_plot_details = os.getenv("URL_PLOT_DETAILS", f"{api_base_url}/v1/resources/details")
+# bulk: page through the project's land_survey activities once instead of 2 requests per plot
+activity_bulk_fetch = os.getenv("ACTIVITY_BULK_FETCH", "true").lower() == "true"
+# update flow: skip plots whose geometry equals the backup (within tolerance, CRS units)
+patch_skip_unchanged = os.getenv("PATCH_SKIP_UNCHANGED", "true").lower() == "true"
+geometry_diff_tolerance = float(os.getenv("GEOMETRY_DIFF_TOLERANCE", "1e-8"))
+# coordinates: {"polygon": [rings]} (default), geojson: {"polygon": {"type", "coordinates"}}
+patch_polygon_format = os.getenv("PATCH_POLYGON_FORMAT", "coordinates")
+# inputs are reprojected to EPSG:4326; optional rounding (decimals) and CRS for files without one
+input_coordinate_precision = int(os.getenv("INPUT_COORDINATE_PRECISION")) if os.getenv("INPUT_COORDINATE_PRECISION") else None
+input_assume_crs = os.getenv("INPUT_ASSUME_CRS") or None
+# optional read filters for large inputs: bbox "minx,miny,maxx,maxy" (file CRS) and OGR SQL where
+input_bbox = os.getenv("INPUT_BBOX", "")
+input_where = os.getenv("INPUT_WHERE") or None
 
 # variable ENV ## CHANGE THIS FOR LAND PLOTTING FILTER DOWNLOAD PROCESS
 # change here or uncomment below (updating variable assignment to a filter value)
@@ -129,12 +150,15 @@ if input_start == 1:
                 print('starting to write to json files')
                 json_out = await classPagePlot.download_all_pages(
                     total_pages_plot, file_json_output)
+                record_snapshot(file_json_output, input_proj_id, 'plots',
+                                row_count=len(json_out.get('rows', [])))
 
             return [total_pages_plot, json_out, classPagePlot, file_json_output]
 
         print('Checking the total pages to verify the permission and process current page will be 0')
 
-        async_list_id = asyncio.run(downloading_json_plot())
+        with profile_stage('start.plot_pages'):
+            async_list_id = asyncio.run(downloading_json_plot())
 
         total_pages_plot = async_list_id[0]
         json_out = async_list_id[1]
@@ -185,23 +209,28 @@ if input_start == 1:
                 print('starting to write to json files v2')
                 json_out_v2 = await request_geojson_plot.dumping_json_geojson_get(
                     file_json_output_v2)
+                record_snapshot(file_json_output_v2, input_proj_id, 'plots_details',
+                                row_count=len(json_out_v2.get('rows', [])))
 
                 return json_out_v2
 
-            json_out_v2 = asyncio.run(downloading_v2())
+            with profile_stage('start.plot_details'):
+                json_out_v2 = asyncio.run(downloading_v2())
 
             jsonPlotClass = JsonGeoJSON(input_dict=json_out_v2)
-            geojson_plot = jsonPlotClass.convert_plot_togeojson(
-                file_geojson_output)
+            # build the GeoDataFrame directly from the rows (no intermediate GeoJSON features)
+            with profile_stage('start.convert_gdf'):
+                gdf_plot = jsonPlotClass.convert_plot_togdf()
+            file_geojson_output = jsonPlotClass.gpd_geojson(
+                gdf_plot, file_geojson_output)
+            record_snapshot(file_geojson_output, input_proj_id, 'plots_geo', row_count=len(gdf_plot))
 
             print(
                 f'FILE DOWNLOADED AT {file_geojson_output} --------------------------------------------------------------------------- \n')
             # get the additional data from questionaire - land survey activity
             print('now we download land survey activity and join the data to geojson plot \n ---------------------------------------------')
-            gdf_plot = gpd.GeoDataFrame.from_features(geojson_plot["features"])
 
             async def downloading_df(plot_id):
-                print(f'downloading_json plot ID: {plot_id}')
                 reqLandActClass = PaginatingDownload(input_proj_id, url_activity_filter, auth_token, projectId=input_proj_id,
                                                      request_type='get', activityType='land_survey', plotId=plot_id)
                 request_get_landsurvey_id = await reqLandActClass.request_res()
@@ -228,17 +257,40 @@ if input_start == 1:
                 print('downloading_json for building geojson is started')
                 # dfs_activity = []
 
-                tasks = [downloading_df(plot_id) for plot_id in plotID_list]
-                dfs_activity = await asyncio.gather(*tasks)
+                if activity_bulk_fetch:
+                    # one paginated activity search for the whole project, joined locally by plotID
+                    cfg, client = build_client_from_env()
+                    try:
+                        return await PaginatingDownload.download_plot_activities(
+                            client, cfg, input_proj_id, plotID_list,
+                            search_endpoint=url_activity_filter,
+                            activity_endpoint=f'{url_activity}{{activity_id}}')
+                    finally:
+                        await client.aclose()
+
+                # one throttled progress line instead of a print per plot
+                progress = Progress('land survey activities', len(plotID_list), unit='plots')
+
+                async def downloading_df_tracked(plot_id):
+                    data = await downloading_df(plot_id)
+                    progress.update(1, rows=1)
+                    return data
+
+                with progress:
+                    tasks = [downloading_df_tracked(plot_id) for plot_id in plotID_list]
+                    dfs_activity = await asyncio.gather(*tasks)
 
                 return dfs_activity
 
             pre_con = 0
 
-            dfs_activity = asyncio.run(main_landsurvey())
+            with profile_stage('start.land_survey_activities'):
+                dfs_activity = asyncio.run(main_landsurvey())
 
-            pd_list = [pd.json_normalize(i) for i in dfs_activity]
-            merged_df = pd.concat(pd_list, ignore_index=True)
+            # flatten only the columns we join, in one column-wise pass
+            with profile_stage('start.activities_frame'):
+                merged_df = flatten_records(
+                    dfs_activity, LAND_SURVEY_COLUMNS, dtypes=LAND_SURVEY_DTYPES)
 
             print(merged_df)
 
@@ -248,23 +300,13 @@ if input_start == 1:
 
             with open(file_json_output_async_id, 'w') as json_file:
                 json.dump(dfs_activity, json_file)
-
-            # Define the specific columns to include from the DataFrame
-            columns_to_include = ['id', 'userID', 'plotID', 'startDate', 'endDate', 'synced', 'restarted',
-                                        'note', 'mobileAppVersion', 'fullyCompleted', 'labels', 'comment',
-                                        'commentAudio', 'measurementCount', 'totalSteps', 'preQuestionnaireID',
-                                        'preQuestionnaireData', 'duplicateData', 'postQuestionnaireID',
-                                        'postQuestionnaireData', 'deviceInformationID', 'status',
-                                        'activityType', 'createdAt', 'outsidePolygon.crs.type',
-                                        'outsidePolygon.crs.properties.name', 'outsidePolygon.type',
-                                        'outsidePolygon.coordinates', 'activityTemplate.activityType',
-                                        'activityTemplate.projectID', 'activityTemplate.id',
-                                        'perfomedBy.firstName', 'perfomedBy.lastName', 'perfomedBy.id',
-                                  ]
+            record_snapshot(file_json_output_async_id, input_proj_id, 'land_survey_activities',
+                            row_count=len(dfs_activity))
 
             # Perform the join using the specific columns
-            merged_gdf = gdf_plot.merge(
-                merged_df[columns_to_include], on='plotID', how='left')
+            with profile_stage('start.join'):
+                merged_gdf = gdf_plot.merge(
+                    merged_df, on='plotID', how='left')
 
             merged_gdf.rename(
                 columns={"status_x": "status_plot"}, inplace=True)
@@ -279,6 +321,7 @@ if input_start == 1:
 
             merged_geojson = jsonPlotClass.gpd_geojson(
                 merged_gdf, file_geojson_output)
+            record_snapshot(merged_geojson, input_proj_id, 'plots_joined_geo', row_count=len(merged_gdf))
             pre_con = 1
 
             if pre_con == 0:
@@ -294,41 +337,17 @@ if input_start == 1:
                     print(
                         'Now downloading the measurement vertices (corners) for the images (land eligibility check)')
 
-                    with open(file_json_output_async_id, 'r') as json_file:
-                        list_data = json.load(json_file)
-                    print(list_data)
-
-                    print(len(list_data))
-
-                    pd_list = [pd.json_normalize(i) for i in list_data]
-
-                    merged_df = pd.concat(pd_list, ignore_index=True)
-
-                    list_activity_measurement = merged_df['measurement'].to_list()
-                    print(list_activity_measurement)
-
-                    list_measurement = []
-
-                    for i in list_activity_measurement:
-                        for x in i:
-                            print(x)
-                            print('------')
-                            list_measurement.append(pd.json_normalize(x))
-
-                    df_measurement = pd.concat(list_measurement, ignore_index=True)
-                    print(df_measurement)
-
-                    new_df = df_measurement
-                    new_df[['latitude', 'longitude']] = new_df['gpsLocation'].str.split(
-                        ',', expand=True).astype(float)
-
-                    new_gdf = gpd.GeoDataFrame(new_df, geometry=gpd.points_from_xy(
-                        new_df.longitude, new_df.latitude))
+                    # points straight from the activities already in memory (keeps activityID/plotID)
+                    with profile_stage('start.measurement_points'):
+                        new_gdf = measurement_points_gdf(dfs_activity)
+                    print(f'{len(new_gdf)} measurement vertices extracted')
 
                     file_geojson_output = create_folder_file(folder_geojson_api, str(
                         input_proj_id), proj_list[0]['newName']+'_measurement_corner_geojson')
                     merged_geojson_mes_land = jsonPlotClass.gpd_geojson(
                         new_gdf, file_geojson_output)
+                    record_snapshot(merged_geojson_mes_land, input_proj_id, 'measurement_corners_geo',
+                                    row_count=len(new_gdf))
 
                     break
                 elif input_download_vertices == 'n':
@@ -407,79 +426,67 @@ elif input_start == 2:
 
     input_geodata = list_geodata[num_select-1]
 
-    gdf_input = gpd.read_file(input_geodata)
-    crs = gdf_input.crs
-    crs_windows = 'GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,298.257223563,AUTHORITY["EPSG","7030"]],AUTHORITY["EPSG","6326"]],PRIMEM["Greenwich",0],UNIT["Degree",0.0174532925199433],AXIS["Longitude",EAST],AXIS["Latitude",NORTH]]'
+    # choose the plot id column from the file metadata, then read only that column + geometry
+    list_columns = list_input_columns(input_geodata)
 
-    if crs == 'EPSG:4326' or crs == crs_windows:
-        print("verified - the input's crs is EPSG:4326")
+    print(
+        f'Please choose which number is the plot id column of your input file {input_geodata}: ')
 
-        index_columns = gdf_input.columns
-        list_columns = index_columns.tolist()
+    num_select = uicheckerClass.input_update_shp(
+        list_columns, add='to select which number that as PLOT ID Column')
 
-        a = 0
-        print(
-            f'Please choose which number is the plot id column of your input file {input_geodata}: ')
+    act_input = num_select-1
 
-        num_select = uicheckerClass.input_update_shp(
-            list_columns, add='to select which number that as PLOT ID Column')
+    with profile_stage('start.read_input'):
+        gdf_input = read_vector_columns(
+            input_geodata, [list_columns[act_input]], bbox=parse_bbox(input_bbox), where=input_where)
+    print(f'{len(gdf_input)} feature(s) read from {input_geodata}')
 
-        # print(num_select)
+    # reproject any input CRS to EPSG:4326 (optionally rounding coordinates)
+    try:
+        gdf_input, source_crs = reproject_to_wgs84(
+            gdf_input, precision=input_coordinate_precision, assume_crs=input_assume_crs)
+        crs_error = None
+    except ValueError as exc:
+        crs_error = exc
 
-        act_input = num_select-1
+    if crs_error is None:
+        print(f"input crs: {source_crs} -> using EPSG:4326")
 
-        # Select the geometry series
-        geometry_series = gdf_input['geometry']
-
-        # Create an empty list to store the polygon dictionaries
-        append_list_polygon = []
-
-        # Iterate over each geometry and extract the coordinates
-        for idx, geometry in enumerate(geometry_series):
-            if geometry.geom_type == 'Polygon':
-                # print('its polygon')
-                # If it's a Polygon, extract the coordinates
-                polygon_coordinates = [[coord[0], coord[1]]
-                                       for coord in geometry.exterior.coords]
-                append_list_polygon.append({'polygon': [polygon_coordinates]})
-                
-            else:
-                print(
-                    'the geometry is not polygon (probably multipolygon) please check your file first!')
+        # Polygon/MultiPolygon (with holes) -> patch payloads in one vectorized pass
+        with profile_stage('start.patch_payloads'):
+            polygon_payloads = polygon_patch_payloads(
+                gdf_input.geometry.values, output_format=patch_polygon_format)
+        skipped_geometries = sum(1 for payload in polygon_payloads if payload is None)
+        if skipped_geometries:
+            print(
+                f'{skipped_geometries} geometry(ies) are empty, not polygons, or MultiPolygons that need '
+                f'PATCH_POLYGON_FORMAT=geojson, and will be skipped')
 
-        if len(append_list_polygon) > 0:
+        if len(polygon_payloads) > skipped_geometries:
 
             list_plot = gdf_input[list_columns[act_input]].tolist()
             list_plot = [int(i) for i in list_plot]
 
-            dict_plot = {list_plot[i]:append_list_polygon[i] for i in range(len(list_plot))}
+            dict_plot = {plot_id: payload for plot_id, payload in zip(
+                list_plot, polygon_payloads) if payload is not None}
 
             #for key,value in dict_plot.items():
             #    print(key, value)
 
-            # constructor for list id/ plot
-            a = list_plot
-            b = ''
-
-            for i in a:
-                if i != a[len(a)-1]:
-                    b += str(int(i)) + ','
-                else:
-                    b += str(int(i))
-
-            req_url_geojson = f'{url_plot_details}?ids={b}'
-
-            print(f'requesting to: --> \n {req_url_geojson}')
+            print(f'requesting {len(list_plot)} plot(s) from: --> \n {url_plot_details}')
 
             async def request_backup(file_json_output):
-                # backup first before update
-                request_geojson_plot = PaginatingDownload(
-                    '', req_url_geojson, auth_token, request_type='downloadgeojsonplot')
-                
-                # one id will be unique so that it only one page - will return as dictionary
-                backup_plots = await request_geojson_plot.dumping_json_geojson_get(
-                    file_json_output)
-                
+                # backup first before update: batched ?ids= requests (PLOTS_DETAILS_BATCH_SIZE /
+                # PLOTS_DETAILS_CONCURRENCY / PLOTS_DETAILS_METHOD) streamed to the backup file
+                cfg, client = build_client_from_env()
+                try:
+                    backup_plots, _ = await PaginatingDownload.download_by_ids(
+                        client, cfg, list_plot, file_json_output,
+                        details_endpoint=url_plot_details)
+                finally:
+                    await client.aclose()
+
                 return backup_plots
 
 
@@ -499,31 +506,52 @@ elif input_start == 2:
             file_json_output = create_folder_file(
                 folder_json_api, filename_without_extension, '_backup')
 
-            backup_plot = asyncio.run(request_backup(file_json_output))
+            with profile_stage('start.backup'):
+                backup_plot = asyncio.run(request_backup(file_json_output))
+            record_snapshot(file_json_output, filename_without_extension, 'backup',
+                            row_count=len(backup_plot.get('rows', [])))
 
             # converting to geojson from json
             file_geojson_output = create_folder_file(folder_json_api, filename_without_extension, '_backup_geojson')
             jsonPlotClass = JsonGeoJSON(input_dict=backup_plot)
             geojson_plot = jsonPlotClass.convert_plot_togeojson(
             file_geojson_output)
+            record_snapshot(file_geojson_output, filename_without_extension, 'backup_geo',
+                            row_count=len(geojson_plot['features']))
 
             print(
                 f'\n Backup is downloaded to {file_geojson_output} \n------------------------------')
 
-            # updating process
-            async def request_patch(plot_id, polygon_patch):
-                class_patch = PaginatingDownload('', url_patch_plot, auth_token, 'patch_api', polygon_patch, plotId = plot_id)
-                request_to_patch = await class_patch.request_res()
-                
-                print(f'patched {plot_id}')
-                return request_to_patch
-            
-            async def main_request_patch():
-                tasks = [request_patch(key, value) for key,value in dict_plot.items()]
-                await asyncio.gather(*tasks)
+            if patch_skip_unchanged:
+                # only send plots whose geometry differs from the backup
+                gdf_backup = jsonPlotClass.convert_plot_togdf()
+                geometry_diff = diff_geometries(
+                    list_plot, gdf_input.geometry.values,
+                    gdf_backup['plotID'].tolist(), gdf_backup.geometry.values,
+                    tolerance=geometry_diff_tolerance)
+                print(f'geometry diff against backup: {geometry_diff.counts()}')
+                to_send = set(geometry_diff.to_send)
+                dict_plot = {k: v for k, v in dict_plot.items() if k in to_send}
+
+            # updating process: bounded/adaptive concurrency, retries and a per-plot report
+            file_patch_report = create_folder_file(
+                folder_json_api, filename_without_extension, '_patch_report')
+            # PATCH_RESUME_REPORT=<previous report> re-sends only the plots that failed there
+            patch_resume_report = os.getenv('PATCH_RESUME_REPORT', '')
 
-            patching = asyncio.run(main_request_patch())
-            print('patching polygon geometry is done')
+            async def main_request_patch():
+                cfg, client = build_client_from_env()
+                try:
+                    patcher = BulkPatcher(client, url_patch_plot)
+                    only_ids = BulkPatcher.failed_ids(patch_resume_report) if patch_resume_report else None
+                    return await patcher.run(dict_plot, only_ids=only_ids, report_path=file_patch_report)
+                finally:
+                    await client.aclose()
+
+            with profile_stage('start.patch'):
+                patching = asyncio.run(main_request_patch())
+            record_snapshot(file_patch_report, filename_without_extension, 'patch_report', row_count=len(patching))
+            print(f'patching polygon geometry is done, report: {file_patch_report}')
             
             con = 0
             while con == 0:
@@ -539,13 +567,18 @@ elif input_start == 2:
                     file_json_output = create_folder_file(
                         folder_json_api, filename_without_extension, '_result')
 
-                    result_plot = asyncio.run(request_backup(file_json_output))
+                    with profile_stage('start.result'):
+                        result_plot = asyncio.run(request_backup(file_json_output))
+                    record_snapshot(file_json_output, filename_without_extension, 'result',
+                                    row_count=len(result_plot.get('rows', [])))
 
                     # converting to geojson from json
                     file_geojson_output = create_folder_file(folder_json_api, filename_without_extension, '_result_geojson')
                     jsonPlotClass = JsonGeoJSON(input_dict=result_plot)
                     geojson_plot = jsonPlotClass.convert_plot_togeojson(
                     file_geojson_output)
+                    record_snapshot(file_geojson_output, filename_without_extension, 'result_geo',
+                                    row_count=len(geojson_plot['features']))
 
                     print(
                         f'\n Result is downloaded to {file_geojson_output} \n------------------------------')
@@ -561,6 +594,6 @@ elif input_start == 2:
                             type and enter: (y) yes to download corners points, or (n) no to quit the app (y/n): ')
 
     else:
-        print(f"sorry, the input data reference is not EPSG:4326 but {crs}")
+        print(f"sorry, the input data cannot be converted to EPSG:4326: {crs_error}")
 
 print('\n--------------------------- END OF THE APP ------------------------------------------------')
@@ -0,0 +1,106 @@
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union
+
+import pandas as pd
+
+# Columns kept from each land survey activity when joining to the plot layer (start.py option 1).
+LAND_SURVEY_COLUMNS = (
+    "id",
+    "userID",
+    "plotID",
+    "startDate",
+    "endDate",
+    "synced",
+    "restarted",
+    "note",
+    "mobileAppVersion",
+    "fullyCompleted",
+    "labels",
+    "comment",
+    "commentAudio",
+    "measurementCount",
+    "totalSteps",
+    "preQuestionnaireID",
+    "preQuestionnaireData",
+    "duplicateData",
+    "postQuestionnaireID",
+    "postQuestionnaireData",
+    "deviceInformationID",
+    "status",
+    "activityType",
+    "createdAt",
+    "outsidePolygon.crs.type",
+    "outsidePolygon.crs.properties.name",
+    "outsidePolygon.type",
+    "outsidePolygon.coordinates",
+    "activityTemplate.activityType",
+    "activityTemplate.projectID",
+    "activityTemplate.id",
+    "perfomedBy.firstName",
+    "perfomedBy.lastName",
+    "perfomedBy.id",
+)
+
+LAND_SURVEY_DTYPES = {
+    "id": "Int64",
+    "userID": "Int64",
+    "plotID": "Int64",
+    "synced": "boolean",
+    "restarted": "boolean",
+    "fullyCompleted": "boolean",
+    "measurementCount": "Int64",
+    "totalSteps": "Int64",
+    "activityTemplate.projectID": "Int64",
+    "activityTemplate.id": "Int64",
+    "perfomedBy.id": "Int64",
+}
+
+ColumnSpec = Union[Sequence[str], Mapping[str, Optional[str]]]
+
+
+def _dig(record: Any, parts: Sequence[str]) -> Any:
+    current = record
+    for part in parts:
+        if isinstance(current, dict):
+            current = current.get(part)
+            if current is None:
+                return None
+        else:
+            return None
+    return current
+
+
+def flatten_records(
+    records: Sequence[Dict[str, Any]],
+    columns: ColumnSpec = LAND_SURVEY_COLUMNS,
+    dtypes: Optional[Mapping[str, str]] = None,
+) -> pd.DataFrame:
+    """
+    Flatten a list of nested records into one DataFrame in a single pass per column.
+
+    Only the requested dotted paths are read (same column names as pd.json_normalize
+    would produce); missing paths become nulls. `columns` may be a sequence of paths
+    or a mapping path -> dtype. Typed columns are built directly as pandas extension
+    arrays; a column whose values do not fit its dtype is kept as object.
+    """
+    if isinstance(columns, Mapping):
+        resolved_dtypes: Dict[str, Optional[str]] = dict(columns)
+        column_names: List[str] = list(columns)
+    else:
+        column_names = list(columns)
+        resolved_dtypes = {name: None for name in column_names}
+    if dtypes:
+        resolved_dtypes.update({k: v for k, v in dtypes.items() if k in resolved_dtypes})
+
+    data: Dict[str, Any] = {}
+    for name in column_names:
+        parts = name.split(".")
+        values = [_dig(record, parts) for record in records]
+        dtype = resolved_dtypes.get(name)
+        if dtype:
+            try:
+                data[name] = pd.array(values, dtype=dtype)
+                continue
+            except (TypeError, ValueError):
+                pass
+        data[name] = pd.array(values, dtype=object)
+    return pd.DataFrame(data, columns=column_names)
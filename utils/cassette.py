@@ -0,0 +1,165 @@
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Set
+
+import httpx
+
+# Re-computed on replay from the stored (already decoded) body.
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "set-cookie"}
+
+
+def request_key(method: str, url: httpx.URL, content: bytes) -> str:
+    """
+    Match key for a request: method, path, sorted query and a hash of the body.
+    Host and auth headers are left out so a cassette replays against any base URL/token.
+    """
+    query = "&".join(f"{k}={v}" for k, v in sorted(url.params.multi_items()))
+    body_hash = hashlib.sha1(content).hexdigest()[:16] if content else ""
+    return f"{method.upper()} {url.path}?{query} {body_hash}"
+
+
+def _open(path: Path, mode: str):
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return path.open(mode, encoding="utf-8")
+
+
+def _encode_body(content: bytes) -> Dict[str, str]:
+    try:
+        return {"text": content.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(content).decode("ascii")}
+
+
+def _decode_body(entry: Dict[str, Any]) -> bytes:
+    if "base64" in entry:
+        return base64.b64decode(entry["base64"])
+    return entry.get("text", "").encode("utf-8")
+
+
+def load_cassette(path: str) -> List[Dict[str, Any]]:
+    with _open(Path(path), "r") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+# Cassettes already written by this process: the first save of a run starts the
+# file over, later saves (other clients closing) append to it.
+_STARTED_PATHS: Set[str] = set()
+
+
+def _write_entries(path: Path, entries: List[Dict[str, Any]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    key = str(path.resolve())
+    # gzip files opened for append get a new member; gzip.open reads them back as one stream.
+    with _open(path, "a" if key in _STARTED_PATHS else "w") as file:
+        for entry in entries:
+            file.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+    _STARTED_PATHS.add(key)
+
+
+def merge_cassette(source: str, target: str) -> int:
+    """
+    Add the entries of cassette `source` (e.g. a worker process's) to `target` as if
+    recorded by this process, then delete `source`. Returns the entries merged.
+    """
+    source_path = Path(source)
+    if not source_path.is_file():
+        return 0
+    entries = load_cassette(source)
+    _write_entries(Path(target), entries)
+    source_path.unlink()
+    return len(entries)
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """
+    Pass requests to a real transport and record every response (status, headers,
+    body, elapsed time and start offset) to a JSON-lines cassette (gzip when the
+    path ends in .gz), written when the client is closed.
+
+    Several clients recording to the same path in one process add to one cassette;
+    a new process run replaces it.
+    """
+
+    def __init__(self, path: str, inner: Optional[httpx.AsyncBaseTransport] = None, *, verify: bool = True):
+        self.path = Path(path)
+        self.inner = inner or httpx.AsyncHTTPTransport(verify=verify)
+        self.entries: List[Dict[str, Any]] = []
+        self._started = time.perf_counter()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        content = await request.aread()
+        start = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        body = await response.aread()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS}
+        self.entries.append(
+            {
+                "key": request_key(request.method, request.url, content),
+                "offset_ms": round((start - self._started) * 1000, 1),
+                "elapsed_ms": round(elapsed_ms, 1),
+                "status": response.status_code,
+                "headers": headers,
+                **_encode_body(body),
+            }
+        )
+        return httpx.Response(response.status_code, headers=headers, content=body, request=request)
+
+    def save(self) -> Path:
+        _write_entries(self.path, self.entries)
+        print(f"{len(self.entries)} response(s) recorded to {self.path}")
+        self.entries = []
+        return self.path
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+        self.save()
+
+
+class CassetteMissError(httpx.TransportError):
+    pass
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """
+    Answer requests from a cassette, offline. Identical requests are served in
+    recorded order (the last one repeats once exhausted). Each response waits its
+    recorded elapsed time multiplied by `latency_scale` (0 = no waiting).
+    """
+
+    def __init__(self, path: str, *, latency_scale: float = 1.0):
+        self.path = path
+        self.latency_scale = latency_scale
+        self._entries: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        for entry in load_cassette(path):
+            self._entries[entry["key"]].append(entry)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        content = await request.aread()
+        key = request_key(request.method, request.url, content)
+        recorded = self._entries.get(key)
+        if not recorded:
+            raise CassetteMissError(f"no recorded response for {key} in {self.path}", request=request)
+        entry = recorded.popleft() if len(recorded) > 1 else recorded[0]
+        if self.latency_scale > 0:
+            await asyncio.sleep(entry.get("elapsed_ms", 0) / 1000 * self.latency_scale)
+        return httpx.Response(entry["status"], headers=entry.get("headers", {}), content=_decode_body(entry), request=request)
+
+
+def cassette_transport(mode: str, path: str, *, latency_scale: float = 1.0, verify: bool = True) -> Optional[httpx.AsyncBaseTransport]:
+    """
+    Transport for API_CASSETTE_MODE: "record", "replay", or anything else for none.
+    """
+    resolved = (mode or "").strip().lower()
+    if resolved == "record":
+        return RecordingTransport(path, verify=verify)
+    if resolved == "replay":
+        return ReplayTransport(path, latency_scale=latency_scale)
+    return None
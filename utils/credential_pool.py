@@ -0,0 +1,193 @@
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+# 401: the token itself is no longer accepted; it is dropped from the pool.
+UNAUTHORIZED_STATUS = 401
+# 403 usually means "not this resource" and never drops a token; it only counts
+# against one when another token is then allowed on the same URL.
+FORBIDDEN_STATUS = 403
+# 429 (and repeated 5xx/transport errors): the token rests before it is used again.
+THROTTLE_STATUS = 429
+
+
+class NoCredentialsError(RuntimeError):
+    pass
+
+
+def load_tokens() -> List[str]:
+    """
+    Tokens for the pool: API_TOKENS (comma separated) plus API_TOKENS_FILE (one per
+    line, # comments allowed), duplicates removed. Empty means single-token mode (TOKEN).
+    """
+    tokens = [token.strip() for token in os.getenv("API_TOKENS", "").split(",")]
+    tokens_file = os.getenv("API_TOKENS_FILE", "")
+    if tokens_file:
+        for line in Path(tokens_file).read_text(encoding="utf-8").splitlines():
+            tokens.append(line.split("#", 1)[0].strip())
+    return list(dict.fromkeys(token for token in tokens if token))
+
+
+@dataclass
+class Credential:
+    token: str
+    label: str
+    requests: int = 0
+    in_flight: int = 0
+    errors: int = 0
+    consecutive_errors: int = 0
+    throttled: int = 0
+    cooldown_until: float = 0.0
+    dropped: Optional[str] = None
+    forbidden: int = 0
+    _tokens: float = 1.0
+    _refilled_at: float = 0.0
+
+    def rate_wait(self, requests_per_second: float, now: float) -> float:
+        """
+        Seconds until this credential's rate bucket has room (0 = now).
+        """
+        if not requests_per_second:
+            return 0.0
+        capacity = max(1.0, requests_per_second)
+        self._tokens = min(capacity, self._tokens + (now - self._refilled_at) * requests_per_second)
+        self._refilled_at = now
+        return 0.0 if self._tokens >= 1.0 else (1.0 - self._tokens) / requests_per_second
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "credential": self.label,
+            "requests": self.requests,
+            "errors": self.errors,
+            "throttled": self.throttled,
+            "forbidden": self.forbidden,
+            "dropped": self.dropped,
+        }
+
+
+class CredentialPool:
+    """
+    Round-robin over several API tokens, each with its own rate limit
+    (`requests_per_second`) and in-flight cap. Tokens answering 401 are dropped;
+    429 (honouring Retry-After) and repeated server/transport errors put a token on
+    cooldown. A 403 leaves the token in the pool (see record_forbidden()). acquire() waits for the next usable token and raises
+    NoCredentialsError once every token has been dropped.
+    """
+
+    def __init__(
+        self,
+        tokens: Sequence[str],
+        *,
+        requests_per_second: float = 0.0,
+        max_in_flight: int = 0,
+        cooldown_seconds: float = 30.0,
+        error_threshold: int = 3,
+    ):
+        if not tokens:
+            raise ValueError("a credential pool needs at least one token")
+        # Labels for logs and stats never show more than the last 4 characters of a token.
+        self.credentials = [
+            Credential(token=token, label=f"#{index + 1}" + (f" ...{token[-4:]}" if len(token) > 12 else ""))
+            for index, token in enumerate(tokens)
+        ]
+        self.requests_per_second = max(0.0, requests_per_second)
+        self.max_in_flight = max(0, max_in_flight)
+        self.cooldown_seconds = cooldown_seconds
+        self.error_threshold = max(1, error_threshold)
+        self._next = 0
+        now = time.monotonic()
+        for credential in self.credentials:
+            credential._tokens = max(1.0, self.requests_per_second)
+            credential._refilled_at = now
+
+    @property
+    def healthy(self) -> List[Credential]:
+        return [credential for credential in self.credentials if credential.dropped is None]
+
+    def _wait_for(self, credential: Credential, now: float) -> float:
+        if self.max_in_flight and credential.in_flight >= self.max_in_flight:
+            return 0.05  # freed by release(); poll again shortly
+        return max(credential.cooldown_until - now, credential.rate_wait(self.requests_per_second, now))
+
+    async def acquire(self, exclude: Optional[Credential] = None) -> Credential:
+        """
+        Next usable credential, other than `exclude` while another one is healthy.
+        """
+        while True:
+            now = time.monotonic()
+            waits = []
+            skip = exclude if exclude is not None and len(self.healthy) > 1 else None
+            for offset in range(len(self.credentials)):
+                credential = self.credentials[(self._next + offset) % len(self.credentials)]
+                if credential.dropped is not None or credential is skip:
+                    continue
+                wait = self._wait_for(credential, now)
+                if wait <= 0:
+                    self._next = (self._next + offset + 1) % len(self.credentials)
+                    if self.requests_per_second:
+                        credential._tokens -= 1.0
+                    credential.in_flight += 1
+                    credential.requests += 1
+                    return credential
+                waits.append(wait)
+            if not waits:
+                raise NoCredentialsError("every API token was rejected (401); check API_TOKENS / API_TOKENS_FILE")
+            await asyncio.sleep(min(waits))
+
+    def release(
+        self,
+        credential: Credential,
+        status_code: Optional[int] = None,
+        *,
+        retry_after: Optional[str] = None,
+        error: bool = False,
+    ) -> None:
+        """
+        Return `credential` and record the request's outcome: an HTTP status, a
+        transport error (`error=True`), or neither when the request was cancelled.
+        """
+        credential.in_flight -= 1
+        if status_code is None and not error:
+            return
+        if status_code == UNAUTHORIZED_STATUS:
+            self._drop(credential, "HTTP 401")
+            return
+        if status_code == FORBIDDEN_STATUS:
+            return  # about the resource until another token proves otherwise
+        if status_code == THROTTLE_STATUS:
+            credential.throttled += 1
+            credential.cooldown_until = time.monotonic() + self._retry_after(retry_after)
+            return
+        if error or status_code >= 500:
+            credential.errors += 1
+            credential.consecutive_errors += 1
+            if credential.consecutive_errors >= self.error_threshold:
+                credential.cooldown_until = time.monotonic() + self.cooldown_seconds
+                credential.consecutive_errors = 0
+            return
+        credential.consecutive_errors = 0
+
+    def record_forbidden(self, credential: Credential) -> None:
+        """
+        `credential` got a 403 on a URL another token was then allowed on: a missing
+        permission of this token. Counted in its stats; it stays in the pool.
+        """
+        credential.forbidden += 1
+        credential.errors += 1
+
+    def _drop(self, credential: Credential, reason: str) -> None:
+        if credential.dropped is None:
+            credential.dropped = reason
+            print(f"credential {credential.label} dropped after {reason}; {len(self.healthy)} left")
+
+    def _retry_after(self, value: Optional[str]) -> float:
+        try:
+            return max(0.0, float(value)) if value else self.cooldown_seconds
+        except ValueError:
+            return self.cooldown_seconds  # HTTP-date form; not worth parsing here
+
+    def stats(self) -> List[Dict[str, object]]:
+        return [credential.stats() for credential in self.credentials]
@@ -10,6 +10,9 @@ from typing import Any, Dict, Optional, Tuple
 import httpx
 from dotenv import load_dotenv
 
+from .cassette import cassette_transport
+from .credential_pool import FORBIDDEN_STATUS, THROTTLE_STATUS, UNAUTHORIZED_STATUS, CredentialPool, load_tokens
+
 
 @dataclass
 class APIConfig:
@@ -36,6 +39,17 @@ class APIConfig:
     page_in_body: bool = True
     first_page_number: int = 0
 
+    # record | replay | off (see utils/cassette.py)
+    cassette_mode: str = "off"
+    cassette_path: str = "./json_downloaded_api/cassettes/api_cassette.jsonl.gz"
+    cassette_latency_scale: float = 1.0
+
+    # Several tokens used round-robin instead of auth_token (see utils/credential_pool.py).
+    auth_tokens: Tuple[str, ...] = ()
+    token_requests_per_second: float = 0.0
+    token_max_in_flight: int = 0
+    token_cooldown_seconds: float = 30.0
+
     @classmethod
     def from_env(cls) -> "APIConfig":
         load_dotenv()
@@ -60,20 +74,81 @@ class APIConfig:
             page_param_name=os.getenv("API_PAGE_PARAM_NAME", "page"),
             page_in_body=os.getenv("API_PAGE_IN_BODY", "true").lower() == "true",
             first_page_number=int(os.getenv("API_FIRST_PAGE_NUMBER", "0")),
+            cassette_mode=os.getenv("API_CASSETTE_MODE", "off"),
+            cassette_path=os.getenv("API_CASSETTE_PATH", "./json_downloaded_api/cassettes/api_cassette.jsonl.gz"),
+            cassette_latency_scale=float(os.getenv("API_CASSETTE_LATENCY_SCALE", "1.0")),
+            auth_tokens=tuple(load_tokens()),
+            token_requests_per_second=float(os.getenv("API_TOKEN_RPS", "0")),
+            token_max_in_flight=int(os.getenv("API_TOKEN_MAX_IN_FLIGHT", "0")),
+            token_cooldown_seconds=float(os.getenv("API_TOKEN_COOLDOWN_SECONDS", "30")),
         )
 
+    def auth_headers(self, token: Optional[str] = None) -> Dict[str, str]:
+        token = token or self.auth_token
+        if not token:
+            return {}
+        prefix = self.auth_header_prefix.strip()
+        token_value = f"{prefix} {token}".strip() if prefix else token
+        return {self.auth_header_name: token_value}
+
 
 class AsyncAPIClient:
-    def __init__(self, config: APIConfig):
+    def __init__(self, config: APIConfig, transport: Optional[httpx.AsyncBaseTransport] = None):
         self.config = config
+        # Optional custom transport, e.g. the in-process mock API used by benchmarks/.
+        self.transport = transport
+        self._cassette_transport = False
         self._client: Optional[httpx.AsyncClient] = None
+        # Response body bytes, read by utils/progress.py for throughput reporting.
+        self.bytes_received = 0
+        self.credentials: Optional[CredentialPool] = None
+        if config.auth_tokens:
+            self.credentials = CredentialPool(
+                config.auth_tokens,
+                requests_per_second=config.token_requests_per_second,
+                max_in_flight=config.token_max_in_flight,
+                cooldown_seconds=config.token_cooldown_seconds,
+            )
 
-    def _build_headers(self) -> Dict[str, str]:
-        if not self.config.auth_token:
-            return {}
-        prefix = self.config.auth_header_prefix.strip()
-        token_value = f"{prefix} {self.config.auth_token}".strip() if prefix else self.config.auth_token
-        return {self.config.auth_header_name: token_value}
+    def _build_headers(self, token: Optional[str] = None) -> Dict[str, str]:
+        return self.config.auth_headers(token)
+
+    async def _send(self, client: httpx.AsyncClient, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        if self.credentials is None:
+            return await client.request(method, url, headers=self._build_headers(), **kwargs)
+        # A rejected (401) or throttled (429) token is not the request's fault: retry on
+        # the next token while any remain. A 403 is usually about the resource, so it
+        # is retried once on another token and then returned; only if that token is
+        # allowed does the 403 count against the first one.
+        forbidden = None
+        for _ in range(len(self.credentials.credentials) + 1):
+            credential = await self.credentials.acquire(exclude=forbidden)
+            response = None
+            transport_error = False
+            try:
+                response = await client.request(method, url, headers=self._build_headers(credential.token), **kwargs)
+            except httpx.TransportError:
+                transport_error = True
+                raise
+            finally:
+                # Also on cancellation, so the token's in-flight slot is always returned.
+                self.credentials.release(
+                    credential,
+                    response.status_code if response is not None else None,
+                    retry_after=response.headers.get("retry-after") if response is not None else None,
+                    error=transport_error,
+                )
+            if response.status_code == FORBIDDEN_STATUS:
+                if forbidden is None and len(self.credentials.healthy) > 1:
+                    forbidden = credential
+                    continue
+                break
+            if forbidden is not None and response.status_code < 400:
+                self.credentials.record_forbidden(forbidden)
+                forbidden = None
+            if response.status_code not in (UNAUTHORIZED_STATUS, THROTTLE_STATUS) or not self.credentials.healthy:
+                break
+        return response
 
     def _url(self, endpoint: str) -> str:
         if endpoint.startswith("http://") or endpoint.startswith("https://"):
@@ -82,9 +157,18 @@ class AsyncAPIClient:
 
     async def _get_client(self) -> httpx.AsyncClient:
         if self._client is None:
+            if self.transport is None:
+                self.transport = cassette_transport(
+                    self.config.cassette_mode,
+                    self.config.cassette_path,
+                    latency_scale=self.config.cassette_latency_scale,
+                    verify=self.config.verify_ssl,
+                )
+                self._cassette_transport = self.transport is not None
             self._client = httpx.AsyncClient(
                 timeout=self.config.timeout_seconds,
                 verify=self.config.verify_ssl,
+                transport=self.transport,
             )
         return self._client
 
@@ -92,6 +176,10 @@ class AsyncAPIClient:
         if self._client is not None:
             await self._client.aclose()
             self._client = None
+            if self._cassette_transport:
+                # Closing saved/released the cassette; a reused client starts a new one.
+                self.transport = None
+                self._cassette_transport = False
 
     async def request(
         self,
@@ -117,18 +205,15 @@ class AsyncAPIClient:
             print(f"[api] {method.upper()} {url}{page_text}")
 
         start = time.perf_counter()
-        response = await client.request(
-            method.upper(),
-            url,
-            params=params,
-            json=json_body,
-            data=data,
-            headers=self._build_headers(),
-        )
+        response = await self._send(client, method.upper(), url, params=params, json=json_body, data=data)
         if self.config.request_log:
             elapsed_ms = (time.perf_counter() - start) * 1000
             print(f"[api] <- {response.status_code} {method.upper()} {url} ({elapsed_ms:.0f} ms)")
+        self.bytes_received += len(response.content)
         response.raise_for_status()
+        if not response.content:
+            # e.g. 204 No Content on PATCH/DELETE
+            return {}
         return response.json()
 
     @staticmethod
@@ -1,8 +1,11 @@
-import json
+from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+import requests
+
 from .downloader_api import APIConfig, AsyncAPIClient
-from .list_all_files import list_files
+from .list_all_files import latest_snapshot, list_files
+from .project_catalog import ProjectCatalog, get_project_catalog, get_project_catalog_sync
 
 
 def filter_rows_by_keyword(
@@ -23,21 +26,25 @@ def filter_rows_by_keyword(
     ]
 
 
-async def search_projects(client: AsyncAPIClient, cfg: APIConfig, keyword: str = ""):
-    data = await client.request(cfg.projects_endpoint, method="GET")
-    rows = list(data.get(cfg.rows_key, []))
-    return filter_rows_by_keyword(
-        rows,
-        keyword=keyword,
-        id_field=cfg.project_id_field,
-        name_field=cfg.project_name_field,
-    )
+async def search_projects(
+    client: AsyncAPIClient,
+    cfg: APIConfig,
+    keyword: str = "",
+    *,
+    refresh: bool = False,
+    fuzzy: bool = False,
+):
+    # The project list comes from the shared TTL catalog, so repeated searches skip the API.
+    catalog = await get_project_catalog(client, cfg, refresh=refresh)
+    return catalog.search(keyword, fuzzy=fuzzy)
 
 
 class FilterSearch:
     """
     Backward-compatible project search helper.
-    Works with local JSON files and non-interactive filtering.
+    Searches the shared project catalog (TTL cached on disk, refreshed from
+    `end_point`) and falls back to the newest local JSON file when the API
+    cannot be reached.
     """
 
     def __init__(
@@ -49,6 +56,7 @@ class FilterSearch:
         rows_key: str = "rows",
         project_id_field: str = "id",
         project_name_field: str = "name",
+        suggest: bool = True,
     ):
         self.input_name = input_name
         self.end_point = end_point
@@ -57,29 +65,48 @@ class FilterSearch:
         self.rows_key = rows_key
         self.project_id_field = project_id_field
         self.project_name_field = project_name_field
-        self.file_loc = self.get_updated_file()
+        self.suggest = suggest
+        self.file_loc: Optional[str] = None
+        self.catalog = self._load_catalog()
 
     def get_updated_file(self) -> str:
+        snapshot = latest_snapshot(folder=self.directory_path)
+        if snapshot is not None and Path(snapshot.path).is_file():
+            return snapshot.path
         files = sorted(list_files(self.directory_path))
         if not files:
             raise FileNotFoundError(f"No files found in {self.directory_path}")
         return files[-1]
 
-    def _load_rows(self) -> List[Dict[str, Any]]:
-        with open(self.file_loc, "r", encoding="utf-8") as file:
-            data = json.load(file)
-        if data is None:
-            raise ValueError("Invalid JSON data.")
-        return list(data.get(self.rows_key, []))
-
-    def search_proj(self):
-        rows = self._load_rows()
-        matches = filter_rows_by_keyword(
-            rows,
-            keyword=str(self.input_name),
+    def _load_catalog(self) -> ProjectCatalog:
+        try:
+            return get_project_catalog_sync(
+                self.end_point,
+                self.auth_token,
+                rows_key=self.rows_key,
+                id_field=self.project_id_field,
+                name_field=self.project_name_field,
+            )
+        except (requests.RequestException, ValueError) as exc:
+            print(f"project catalog refresh failed ({exc}); using local files")
+        self.file_loc = self.get_updated_file()
+        return ProjectCatalog.load(
+            self.file_loc,
             id_field=self.project_id_field,
             name_field=self.project_name_field,
+            rows_key=self.rows_key,
         )
+
+    def search_proj(self):
+        matches = self.catalog.search(str(self.input_name))
+        if not matches and self.suggest:
+            # Close names are only shown, never returned: the caller would auto-select a single hit.
+            suggestions = self.catalog.suggest(str(self.input_name))
+            if suggestions:
+                names = ", ".join(
+                    f"({d.get(self.project_id_field)}) {str(d.get(self.project_name_field, '')).upper()}" for d in suggestions
+                )
+                print(f"no project matches '{self.input_name}'; did you mean: {names}")
         return [
             {
                 "newName": str(d.get(self.project_name_field, "")).upper(),
@@ -96,7 +123,6 @@ class FilterSearch:
         # Preserve old behavior but avoid network-refresh side effects.
         while prevList == []:
             try:
-                self.file_loc = self.get_updated_file()
                 prevList = self.repeat_search()
             except KeyboardInterrupt:
                 print("\nProgram interrupted.")
@@ -0,0 +1,77 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, TextIO
+
+# RFC 8142 record separator for GeoJSON Text Sequences.
+RECORD_SEPARATOR = "\x1e"
+
+OUTPUT_FORMATS = ("geojsonseq", "ndjson", "featurecollection")
+
+
+class FeatureStreamWriter:
+    """
+    Incremental GeoJSON writer; only the feature being written is held in memory.
+
+    - "geojsonseq": RFC 8142 text sequence (RS + feature + LF per record).
+    - "ndjson": newline-delimited features (GeoJSONL / GDAL GeoJSONSeq compatible).
+    - "featurecollection": a regular FeatureCollection written feature by feature.
+    """
+
+    def __init__(self, output_path: str, output_format: str = "geojsonseq", ensure_ascii: bool = False):
+        resolved_format = str(output_format).lower()
+        if resolved_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output_format: {output_format}. Use one of {OUTPUT_FORMATS}")
+        self.output_path = Path(output_path)
+        self.output_format = resolved_format
+        self.ensure_ascii = ensure_ascii
+        self.count = 0
+        self._file: Optional[TextIO] = None
+
+    def open(self) -> "FeatureStreamWriter":
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.output_path.open("w", encoding="utf-8")
+        if self.output_format == "featurecollection":
+            self._file.write('{"type": "FeatureCollection", "features": [\n')
+        return self
+
+    def write(self, feature: Dict[str, Any]) -> None:
+        if self._file is None:
+            raise RuntimeError("Writer is not open.")
+        text = json.dumps(feature, ensure_ascii=self.ensure_ascii, separators=(",", ":"))
+        if self.output_format == "geojsonseq":
+            self._file.write(f"{RECORD_SEPARATOR}{text}\n")
+        elif self.output_format == "ndjson":
+            self._file.write(f"{text}\n")
+        else:
+            self._file.write(f",\n{text}" if self.count else text)
+        self.count += 1
+
+    def write_many(self, features: Iterable[Dict[str, Any]]) -> int:
+        for feature in features:
+            self.write(feature)
+        return self.count
+
+    def close(self) -> None:
+        if self._file is None:
+            return
+        if self.output_format == "featurecollection":
+            self._file.write("\n]}\n")
+        self._file.close()
+        self._file = None
+
+    def __enter__(self) -> "FeatureStreamWriter":
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def iter_feature_stream(input_path: str) -> Iterable[Dict[str, Any]]:
+    """
+    Read back a geojsonseq/ndjson file one feature at a time.
+    """
+    with open(input_path, "r", encoding="utf-8") as file:
+        for line in file:
+            text = line.strip().lstrip(RECORD_SEPARATOR)
+            if text:
+                yield json.loads(text)
@@ -0,0 +1,165 @@
+import warnings
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import shapely
+from shapely import GeometryType
+from shapely.geometry import shape
+
+# Nesting depth of the GeoJSON "coordinates" member per geometry type.
+_DEPTH = {
+    "Point": 0,
+    "MultiPoint": 1,
+    "LineString": 1,
+    "MultiLineString": 2,
+    "Polygon": 2,
+    "MultiPolygon": 3,
+}
+
+_RAGGED_TYPES = {
+    "MultiPoint": GeometryType.MULTIPOINT,
+    "LineString": GeometryType.LINESTRING,
+    "MultiLineString": GeometryType.MULTILINESTRING,
+    "Polygon": GeometryType.POLYGON,
+    "MultiPolygon": GeometryType.MULTIPOLYGON,
+}
+
+
+def _flatten(coordinates_list: Sequence[Any], depth: int):
+    """
+    Flatten nested GeoJSON coordinate lists into an (N, 2) array plus one offsets
+    array per nesting level, in the layout expected by shapely.from_ragged_array.
+    """
+    xy: List[float] = []
+    offsets: List[List[int]] = [[0] for _ in range(depth)]
+
+    def _walk(node: Any, level: int) -> None:
+        if level == 0:
+            for point in node:
+                xy.append(point[0])
+                xy.append(point[1])
+            offsets[0].append(len(xy) // 2)
+            return
+        for child in node:
+            _walk(child, level - 1)
+        offsets[level].append(len(offsets[level - 1]) - 1)
+
+    for coordinates in coordinates_list:
+        _walk(coordinates, depth - 1)
+    coords = np.asarray(xy, dtype="float64").reshape(-1, 2)
+    return coords, tuple(np.asarray(level, dtype="int64") for level in offsets)
+
+
+def geometries_from_coordinates(
+    geometry_types: Sequence[Optional[str]],
+    coordinates: Sequence[Any],
+) -> np.ndarray:
+    """
+    Build a shapely geometry array from parallel GeoJSON type/coordinates columns.
+
+    Rows are grouped by geometry type and each group is constructed in one
+    vectorized call; rows with missing coordinates become None. Only the first
+    two dimensions are kept. A group that fails to build (malformed rings) falls
+    back to per-row shapely.geometry.shape so one bad record does not sink the batch.
+    """
+    result = np.full(len(coordinates), None, dtype=object)
+    groups: Dict[str, List[int]] = {}
+    for idx, (geometry_type, coords) in enumerate(zip(geometry_types, coordinates)):
+        if coords:
+            groups.setdefault(geometry_type or "Polygon", []).append(idx)
+
+    for geometry_type, indices in groups.items():
+        group_coords = [coordinates[i] for i in indices]
+        try:
+            if geometry_type == "Point":
+                points = np.asarray([(c[0], c[1]) for c in group_coords], dtype="float64")
+                built = shapely.points(points)
+            elif geometry_type in _RAGGED_TYPES:
+                flat_coords, offsets = _flatten(group_coords, _DEPTH[geometry_type])
+                built = shapely.from_ragged_array(_RAGGED_TYPES[geometry_type], flat_coords, offsets)
+            else:
+                raise ValueError(f"Unsupported geometry type: {geometry_type}")
+        except (ValueError, TypeError, IndexError, shapely.errors.GEOSException):
+            built = [_shape_or_none(geometry_type, c) for c in group_coords]
+        for idx, geometry in zip(indices, built):
+            result[idx] = geometry
+    return result
+
+
+def _shape_or_none(geometry_type: str, coordinates: Any):
+    try:
+        return shape({"type": geometry_type, "coordinates": coordinates})
+    except Exception:
+        return None
+
+
+def _split(items: List[Any], offsets: np.ndarray) -> List[List[Any]]:
+    bounds = offsets.tolist()
+    return [items[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def polygon_coordinates(geometries: Sequence[Any]) -> List[Optional[list]]:
+    """
+    GeoJSON-style coordinates for every Polygon/MultiPolygon (holes included) in one
+    vectorized pass: shapely.to_ragged_array flattens all vertices, then the ring and
+    part offsets slice them back into nested lists. Other/missing geometries give None.
+    """
+    geometry_array = np.asarray(geometries, dtype=object)
+    type_ids = shapely.get_type_id(geometry_array)
+    polygonal = (type_ids == GeometryType.POLYGON) | (type_ids == GeometryType.MULTIPOLYGON)
+    polygonal &= ~shapely.is_empty(geometry_array)
+    result: List[Optional[list]] = [None] * len(geometry_array)
+    indices = np.flatnonzero(polygonal)
+    if not indices.size:
+        return result
+
+    # Mixed Polygon/MultiPolygon input comes back with MultiPolygon offsets.
+    _, coords, offsets = shapely.to_ragged_array(geometry_array[indices], include_z=False)
+    points = coords.tolist()
+    rings = _split(points, offsets[0])
+    polygons = _split(rings, offsets[1])
+    if len(offsets) == 3:
+        parts = _split(polygons, offsets[2])
+        for idx, geometry_parts in zip(indices, parts):
+            result[idx] = geometry_parts if type_ids[idx] == GeometryType.MULTIPOLYGON else geometry_parts[0]
+    else:
+        for idx, polygon_rings in zip(indices, polygons):
+            result[idx] = polygon_rings
+    return result
+
+
+def polygon_patch_payloads(
+    geometries: Sequence[Any],
+    field: str = "polygon",
+    output_format: str = "coordinates",
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    PATCH bodies for plot geometries. output_format "coordinates" sends the bare
+    coordinates array ({"polygon": [[ring], [hole], ...]}, as the update flow always
+    did); "geojson" sends {"polygon": {"type": ..., "coordinates": ...}}.
+
+    A bare coordinates array cannot say it is a MultiPolygon, so in "coordinates"
+    format MultiPolygons are skipped (None, with a warning) like other non-polygons.
+    """
+    geometry_array = np.asarray(geometries, dtype=object)
+    type_ids = shapely.get_type_id(geometry_array)
+    payloads: List[Optional[Dict[str, Any]]] = []
+    skipped_multi = 0
+    for type_id, coordinates in zip(type_ids, polygon_coordinates(geometry_array)):
+        if coordinates is None:
+            payloads.append(None)
+        elif output_format != "geojson" and type_id == GeometryType.MULTIPOLYGON:
+            skipped_multi += 1
+            payloads.append(None)
+        elif output_format == "geojson":
+            geometry_type = "MultiPolygon" if type_id == GeometryType.MULTIPOLYGON else "Polygon"
+            payloads.append({field: {"type": geometry_type, "coordinates": coordinates}})
+        else:
+            payloads.append({field: coordinates})
+    if skipped_multi:
+        warnings.warn(
+            f"{skipped_multi} MultiPolygon geometry(ies) skipped: the coordinates format only carries "
+            "single polygons, set PATCH_POLYGON_FORMAT=geojson to send them",
+            stacklevel=2,
+        )
+    return payloads
@@ -0,0 +1,60 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+import shapely
+
+
+@dataclass
+class GeometryDiff:
+    changed: List[Any] = field(default_factory=list)
+    unchanged: List[Any] = field(default_factory=list)
+    new: List[Any] = field(default_factory=list)
+
+    @property
+    def to_send(self) -> List[Any]:
+        return self.changed + self.new
+
+    def counts(self) -> Dict[str, int]:
+        return {"changed": len(self.changed), "unchanged": len(self.unchanged), "new": len(self.new)}
+
+
+def diff_geometries(
+    input_ids: Sequence[Any],
+    input_geometries: Sequence[Any],
+    backup_ids: Sequence[Any],
+    backup_geometries: Sequence[Any],
+    tolerance: float = 1e-8,
+) -> GeometryDiff:
+    """
+    Classify input plots against the backup of the same plots.
+
+    Both sides are normalized (ring start point/orientation, part order) and
+    compared in one vectorized equals_exact call, so a re-exported but otherwise
+    untouched polygon counts as unchanged when every vertex is within `tolerance`
+    (in CRS units; 1e-8 degrees is about 1 mm). Plots missing from the backup, or
+    with no backup geometry, are reported as new.
+    """
+    inputs = pd.DataFrame({"key": [str(i) for i in input_ids], "plot_id": list(input_ids), "input": list(input_geometries)})
+    backup = pd.DataFrame({"key": [str(i) for i in backup_ids], "backup": list(backup_geometries)})
+    backup = backup.drop_duplicates("key", keep="last")
+    merged = inputs.merge(backup, on="key", how="left")
+
+    input_array = shapely.normalize(np.asarray(merged["input"].tolist(), dtype=object))
+    backup_array = shapely.normalize(np.asarray(merged["backup"].where(merged["backup"].notna(), None).tolist(), dtype=object))
+    has_backup = ~(shapely.is_missing(backup_array) | shapely.is_empty(backup_array))
+    same = np.zeros(len(merged), dtype=bool)
+    if has_backup.any():
+        same[has_backup] = shapely.equals_exact(input_array[has_backup], backup_array[has_backup], tolerance=tolerance)
+
+    plot_ids = merged["plot_id"].tolist()
+    diff = GeometryDiff()
+    for plot_id, exists, equal in zip(plot_ids, has_backup, same):
+        if not exists:
+            diff.new.append(plot_id)
+        elif equal:
+            diff.unchanged.append(plot_id)
+        else:
+            diff.changed.append(plot_id)
+    return diff
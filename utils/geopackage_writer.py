@@ -0,0 +1,347 @@
+import json
+import os
+import sqlite3
+import struct
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+GPKG_APPLICATION_ID = 0x47504B47
+GPKG_USER_VERSION = 10300
+
+WGS84_WKT = (
+    'GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,298.257223563,AUTHORITY["EPSG","7030"]],'
+    'AUTHORITY["EPSG","6326"]],PRIMEM["Greenwich",0,AUTHORITY["EPSG","8901"]],'
+    'UNIT["degree",0.0174532925199433,AUTHORITY["EPSG","9122"]],AUTHORITY["EPSG","4326"]]'
+)
+
+_CORE_TABLES_SQL = (
+    """
+    CREATE TABLE IF NOT EXISTS gpkg_spatial_ref_sys (
+        srs_name TEXT NOT NULL,
+        srs_id INTEGER PRIMARY KEY,
+        organization TEXT NOT NULL,
+        organization_coordsys_id INTEGER NOT NULL,
+        definition TEXT NOT NULL,
+        description TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS gpkg_contents (
+        table_name TEXT NOT NULL PRIMARY KEY,
+        data_type TEXT NOT NULL,
+        identifier TEXT UNIQUE,
+        description TEXT DEFAULT '',
+        last_change DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')),
+        min_x DOUBLE,
+        min_y DOUBLE,
+        max_x DOUBLE,
+        max_y DOUBLE,
+        srs_id INTEGER,
+        CONSTRAINT fk_gc_r_srs_id FOREIGN KEY (srs_id) REFERENCES gpkg_spatial_ref_sys(srs_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS gpkg_geometry_columns (
+        table_name TEXT NOT NULL,
+        column_name TEXT NOT NULL,
+        geometry_type_name TEXT NOT NULL,
+        srs_id INTEGER NOT NULL,
+        z TINYINT NOT NULL,
+        m TINYINT NOT NULL,
+        CONSTRAINT pk_geom_cols PRIMARY KEY (table_name, column_name)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS gpkg_extensions (
+        table_name TEXT,
+        column_name TEXT,
+        extension_name TEXT NOT NULL,
+        definition TEXT NOT NULL,
+        scope TEXT NOT NULL,
+        CONSTRAINT ge_tce UNIQUE (table_name, column_name, extension_name)
+    )
+    """,
+)
+
+_DEFAULT_SRS_ROWS = (
+    ("Undefined cartesian SRS", -1, "NONE", -1, "undefined", "undefined cartesian coordinate reference system"),
+    ("Undefined geographic SRS", 0, "NONE", 0, "undefined", "undefined geographic coordinate reference system"),
+    ("WGS 84 geodetic", 4326, "EPSG", 4326, WGS84_WKT, "longitude/latitude coordinates in decimal degrees on the WGS 84 spheroid"),
+)
+
+
+def _quote(identifier: str) -> str:
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+
+def _sql_type(dtype: Any) -> str:
+    if pd.api.types.is_bool_dtype(dtype):
+        return "BOOLEAN"
+    if pd.api.types.is_integer_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "DATETIME"
+    return "TEXT"
+
+
+class GeoPackageWriter:
+    """
+    Bulk GeoPackage (SQLite) writer.
+
+    Rows are inserted with executemany inside one transaction per batch, the
+    column schema is fixed from the frame dtypes before the first insert, and the
+    R-tree spatial index is filled once after all batches are committed.
+    The index is maintained by this writer (no GDAL triggers are installed).
+
+    The layer SRS is `srs_id` when given, else the first frame's EPSG code; frames
+    in another CRS are reprojected to it, and frames without a CRS are taken as
+    already in it (EPSG:4326 for API geometries). Appends keep the layer's SRS.
+    """
+
+    def __init__(
+        self,
+        output_path: str,
+        layer_name: str,
+        *,
+        srs_id: Optional[int] = None,
+        geometry_column: str = "geom",
+        batch_size: Optional[int] = None,
+    ):
+        self.output_path = Path(output_path)
+        self.layer_name = layer_name
+        self.srs_id = srs_id
+        self.layer_srs_id = srs_id if srs_id is not None else 4326
+        self.geometry_column = geometry_column
+        self.batch_size = batch_size or int(os.getenv("GPKG_BATCH_SIZE", "10000"))
+        if self.batch_size <= 0:
+            self.batch_size = 10000
+        self.rtree_name = f"rtree_{layer_name}_{geometry_column}"
+
+    def _connect(self) -> sqlite3.Connection:
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.output_path), isolation_level=None)
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA application_id = {GPKG_APPLICATION_ID}")
+        conn.execute(f"PRAGMA user_version = {GPKG_USER_VERSION}")
+        conn.execute("BEGIN")
+        for statement in _CORE_TABLES_SQL:
+            conn.execute(statement)
+        conn.executemany("INSERT OR IGNORE INTO gpkg_spatial_ref_sys VALUES (?, ?, ?, ?, ?, ?)", _DEFAULT_SRS_ROWS)
+        conn.execute("COMMIT")
+        return conn
+
+    def _layer_exists(self, conn: sqlite3.Connection) -> bool:
+        row = conn.execute("SELECT 1 FROM gpkg_contents WHERE table_name = ?", (self.layer_name,)).fetchone()
+        return row is not None
+
+    def _existing_columns(self, conn: sqlite3.Connection) -> List[str]:
+        return [row[1] for row in conn.execute(f"PRAGMA table_info({_quote(self.layer_name)})")]
+
+    def _drop_layer(self, conn: sqlite3.Connection) -> None:
+        conn.execute("BEGIN")
+        conn.execute(f"DROP TABLE IF EXISTS {_quote(self.rtree_name)}")
+        conn.execute(f"DROP TABLE IF EXISTS {_quote(self.layer_name)}")
+        for meta_table in ("gpkg_contents", "gpkg_geometry_columns", "gpkg_extensions"):
+            conn.execute(f"DELETE FROM {meta_table} WHERE table_name = ?", (self.layer_name,))
+        conn.execute("COMMIT")
+
+    def _create_layer(self, conn: sqlite3.Connection, schema: Sequence[Tuple[str, str]], geometry_type: str) -> None:
+        column_sql = "".join(f", {_quote(name)} {sql_type}" for name, sql_type in schema)
+        conn.execute("BEGIN")
+        conn.execute(
+            f"CREATE TABLE {_quote(self.layer_name)} "
+            f"(fid INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL, {_quote(self.geometry_column)} {geometry_type}{column_sql})"
+        )
+        conn.execute(
+            "INSERT INTO gpkg_contents (table_name, data_type, identifier, srs_id) VALUES (?, 'features', ?, ?)",
+            (self.layer_name, self.layer_name, self.layer_srs_id),
+        )
+        conn.execute(
+            "INSERT INTO gpkg_geometry_columns VALUES (?, ?, ?, ?, 0, 0)",
+            (self.layer_name, self.geometry_column, geometry_type, self.layer_srs_id),
+        )
+        conn.execute("COMMIT")
+
+    def _match_srs(self, conn: sqlite3.Connection, frame: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+        if self._layer_exists(conn):
+            row = conn.execute(
+                "SELECT srs_id FROM gpkg_geometry_columns WHERE table_name = ?", (self.layer_name,)
+            ).fetchone()
+            target = row[0] if row else self.layer_srs_id
+        else:
+            target = self.srs_id
+        if frame.crs is None:
+            self.layer_srs_id = 4326 if target is None else target
+            return frame
+        if target is None:
+            # No EPSG code to register (e.g. a custom projection): store lon/lat instead.
+            target = frame.crs.to_epsg() or 4326
+        if target > 0 and frame.crs.to_epsg() != target:
+            frame = frame.to_crs(epsg=target)
+        if target > 0:
+            conn.execute(
+                "INSERT OR IGNORE INTO gpkg_spatial_ref_sys VALUES (?, ?, 'EPSG', ?, ?, NULL)",
+                (frame.crs.name, target, target, frame.crs.to_wkt("WKT1_GDAL")),
+            )
+        self.layer_srs_id = target
+        return frame
+
+    def _add_missing_columns(self, conn: sqlite3.Connection, schema: Sequence[Tuple[str, str]]) -> None:
+        existing = set(self._existing_columns(conn))
+        missing = [(name, sql_type) for name, sql_type in schema if name not in existing]
+        if not missing:
+            return
+        conn.execute("BEGIN")
+        for name, sql_type in missing:
+            conn.execute(f"ALTER TABLE {_quote(self.layer_name)} ADD COLUMN {_quote(name)} {sql_type}")
+        conn.execute("COMMIT")
+
+    def _geometry_blobs(self, geometries: Any) -> Tuple[List[Optional[bytes]], Any]:
+        # Vectorized WKB/bounds, then a fixed-size GeoPackage header per row.
+        geometry_array = np.asarray(geometries, dtype=object)
+        wkb_values = shapely.to_wkb(geometry_array, byte_order=1)
+        bounds = shapely.bounds(geometry_array)
+        empty = shapely.is_empty(geometry_array)
+        missing = shapely.is_missing(geometry_array)
+        blobs: List[Optional[bytes]] = []
+        for wkb, (min_x, min_y, max_x, max_y), is_empty, is_missing in zip(wkb_values, bounds, empty, missing):
+            if is_missing:
+                blobs.append(None)
+            elif is_empty:
+                blobs.append(struct.pack("<2sBBi", b"GP", 0, 0b00010001, self.layer_srs_id) + wkb)
+            else:
+                header = struct.pack("<2sBBi4d", b"GP", 0, 0b00000011, self.layer_srs_id, min_x, max_x, min_y, max_y)
+                blobs.append(header + wkb)
+        return blobs, bounds
+
+    @staticmethod
+    def _schema(frame: pd.DataFrame) -> List[Tuple[str, str]]:
+        return [(str(column), _sql_type(frame[column].dtype)) for column in frame.columns]
+
+    @staticmethod
+    def _column_values(series: pd.Series) -> List[Any]:
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            return [None if pd.isna(v) else v.isoformat() for v in series]
+        values = series.astype(object).where(series.notna(), None)
+        if series.dtype == "object":
+            # Lists/dicts are not SQLite-bindable; serialize the whole column before insert.
+            return [json.dumps(v, ensure_ascii=False) if isinstance(v, (list, dict)) else v for v in values]
+        return [v.item() if hasattr(v, "item") else v for v in values]
+
+    def _insert_frame(self, conn: sqlite3.Connection, gdf: gpd.GeoDataFrame, start_fid: int) -> Tuple[int, List[Tuple]]:
+        attributes = gdf.drop(columns=[gdf.geometry.name])
+        blobs, bounds = self._geometry_blobs(gdf.geometry)
+        fids = range(start_fid, start_fid + len(gdf))
+        columns = [self._column_values(attributes[column]) for column in attributes.columns]
+        rows = list(zip(fids, blobs, *columns))
+        placeholders = ", ".join("?" for _ in range(len(attributes.columns) + 2))
+        column_sql = ", ".join(
+            ["fid", _quote(self.geometry_column), *[_quote(str(column)) for column in attributes.columns]]
+        )
+        conn.execute("BEGIN")
+        conn.executemany(f"INSERT INTO {_quote(self.layer_name)} ({column_sql}) VALUES ({placeholders})", rows)
+        conn.execute("COMMIT")
+        index_rows = [
+            (fid, box[0], box[2], box[1], box[3])
+            for fid, box, blob in zip(fids, bounds, blobs)
+            if blob is not None and not pd.isna(box[0])
+        ]
+        return len(rows), index_rows
+
+    def _finalize(self, conn: sqlite3.Connection, index_rows: List[Tuple]) -> None:
+        conn.execute("BEGIN")
+        conn.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {_quote(self.rtree_name)} USING rtree(id, minx, maxx, miny, maxy)"
+        )
+        conn.executemany(f"INSERT OR REPLACE INTO {_quote(self.rtree_name)} VALUES (?, ?, ?, ?, ?)", index_rows)
+        conn.execute(
+            "INSERT OR IGNORE INTO gpkg_extensions VALUES (?, ?, 'gpkg_rtree_index', "
+            "'http://www.geopackage.org/spec120/#extension_rtree', 'write-only')",
+            (self.layer_name, self.geometry_column),
+        )
+        conn.execute(
+            f"UPDATE gpkg_contents SET min_x = (SELECT MIN(minx) FROM {_quote(self.rtree_name)}), "
+            f"min_y = (SELECT MIN(miny) FROM {_quote(self.rtree_name)}), "
+            f"max_x = (SELECT MAX(maxx) FROM {_quote(self.rtree_name)}), "
+            f"max_y = (SELECT MAX(maxy) FROM {_quote(self.rtree_name)}), "
+            "last_change = strftime('%Y-%m-%dT%H:%M:%fZ','now') WHERE table_name = ?",
+            (self.layer_name,),
+        )
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _geometry_type(gdf: gpd.GeoDataFrame) -> str:
+        types = {str(t).upper() for t in gdf.geom_type.dropna().unique()}
+        return types.pop() if len(types) == 1 else "GEOMETRY"
+
+    def _create_empty_layer(self, conn: sqlite3.Connection, frame: Optional[gpd.GeoDataFrame]) -> None:
+        schema: List[Tuple[str, str]] = []
+        if frame is not None and frame.columns.size:
+            geometry_name = frame._geometry_column_name if frame._geometry_column_name in frame.columns else None
+            if geometry_name is not None:
+                self._match_srs(conn, frame)
+            schema = self._schema(frame.drop(columns=[geometry_name] if geometry_name else []))
+        self._create_layer(conn, schema, "GEOMETRY")
+
+    def write_frames(self, frames: Iterable[gpd.GeoDataFrame], append: bool = False) -> int:
+        conn = self._connect()
+        try:
+            if not append:
+                self._drop_layer(conn)
+            total = 0
+            index_rows: List[Tuple] = []
+            next_fid = None
+            empty_frame: Optional[gpd.GeoDataFrame] = None
+            for frame in frames:
+                if frame.empty:
+                    empty_frame = frame if empty_frame is None else empty_frame
+                    continue
+                frame = self._match_srs(conn, frame)
+                schema = self._schema(frame.drop(columns=[frame.geometry.name]))
+                if not self._layer_exists(conn):
+                    self._create_layer(conn, schema, self._geometry_type(frame))
+                else:
+                    self._add_missing_columns(conn, schema)
+                if next_fid is None:
+                    max_fid = conn.execute(f"SELECT MAX(fid) FROM {_quote(self.layer_name)}").fetchone()[0]
+                    next_fid = (max_fid or 0) + 1
+                for start in range(0, len(frame), self.batch_size):
+                    batch = frame.iloc[start : start + self.batch_size]
+                    inserted, batch_index_rows = self._insert_frame(conn, batch, next_fid)
+                    next_fid += inserted
+                    total += inserted
+                    index_rows.extend(batch_index_rows)
+            if not self._layer_exists(conn):
+                # No rows at all: still create the layer, so the file opens as a GeoPackage.
+                self._create_empty_layer(conn, empty_frame)
+            self._finalize(conn, index_rows)
+            return total
+        finally:
+            conn.close()
+
+    def write_gdf(self, gdf: gpd.GeoDataFrame, append: bool = False) -> int:
+        return self.write_frames([gdf], append=append)
+
+    def write_features(self, features: Iterable[Dict[str, Any]], append: bool = False) -> int:
+        """
+        Write GeoJSON-like features (e.g. JsonGeoJSON.iter_plot_features) batch by batch.
+        """
+
+        def _frames():
+            batch: List[Dict[str, Any]] = []
+            for feature in features:
+                batch.append(feature)
+                if len(batch) >= self.batch_size:
+                    yield gpd.GeoDataFrame.from_features(batch)
+                    batch = []
+            if batch:
+                yield gpd.GeoDataFrame.from_features(batch)
+
+        return self.write_frames(_frames(), append=append)
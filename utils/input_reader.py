@@ -0,0 +1,59 @@
+from importlib.util import find_spec
+from typing import List, Optional, Sequence, Tuple
+
+import geopandas as gpd
+
+try:
+    import pyogrio
+except ImportError:  # pragma: no cover - falls back to geopandas' default engine
+    pyogrio = None
+
+
+def _arrow_available() -> bool:
+    return find_spec("pyarrow") is not None
+
+
+def parse_bbox(value: Optional[str]) -> Optional[Tuple[float, float, float, float]]:
+    # "minx,miny,maxx,maxy" in the file's own CRS.
+    if not value:
+        return None
+    parts = [float(part) for part in str(value).split(",")]
+    if len(parts) != 4:
+        raise ValueError(f"bbox must be minx,miny,maxx,maxy, got: {value}")
+    return parts[0], parts[1], parts[2], parts[3]
+
+
+def list_input_columns(path: str) -> List[str]:
+    """
+    Attribute column names of a vector file, read from its metadata only.
+    """
+    if pyogrio is not None:
+        return [str(name) for name in pyogrio.read_info(path)["fields"]]
+    gdf = gpd.read_file(path, rows=1)
+    return [column for column in gdf.columns if column != gdf.geometry.name]
+
+
+def read_vector_columns(
+    path: str,
+    columns: Optional[Sequence[str]] = None,
+    *,
+    bbox: Optional[Tuple[float, float, float, float]] = None,
+    where: Optional[str] = None,
+    use_arrow: Optional[bool] = None,
+) -> gpd.GeoDataFrame:
+    """
+    Read only `columns` + geometry of a vector file, optionally filtered by bbox
+    and an OGR SQL `where` clause. Uses pyogrio's Arrow path when pyarrow is
+    installed and falls back to gpd.read_file otherwise.
+    """
+    selected = list(columns) if columns is not None else None
+    if pyogrio is not None:
+        resolved_arrow = _arrow_available() if use_arrow is None else use_arrow
+        return pyogrio.read_dataframe(path, columns=selected, bbox=bbox, where=where, use_arrow=resolved_arrow)
+
+    if where:
+        raise ValueError("where filtering needs pyogrio installed")
+    gdf = gpd.read_file(path, bbox=bbox)
+    if selected is not None:
+        gdf = gdf[[*selected, gdf.geometry.name]]
+    return gdf
@@ -1,8 +1,38 @@
 import json
-from typing import Any, Dict, List, Optional, Sequence, Tuple
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
 import geopandas as gpd
 
+from .geojson_stream import FeatureStreamWriter
+from .geometry_builder import geometries_from_coordinates
+from .geopackage_writer import GeoPackageWriter
+from .profiling import profile_stage
+
+DEFAULT_PLOT_PROPERTIES = (
+    "area",
+    "status",
+    "plotName",
+    "plotLabels",
+    "plotNote",
+    "plotVillage",
+    "plotDistrict",
+    "plotAdditionalData",
+    "externalId",
+)
+
+OWNER_FIELDS = (
+    "firstName",
+    "lastName",
+    "email",
+    "phoneNumber",
+    "country",
+    "username",
+    "gdprAccepted",
+    "status",
+)
+
 
 class JsonGeoJSON:
     def __init__(self, input_json="../json_downloaded_api/plots/test.json", input_dict=None):
@@ -16,50 +46,43 @@ class JsonGeoJSON:
             raise ValueError("Invalid JSON data.")
         return list(input_data.get(rows_key, []))
 
-    @staticmethod
-    def _resolve_records(input_data: Any, records_path: Sequence[str]) -> List[Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]]:
-        current_items: List[Tuple[Any, Dict[str, Dict[str, Any]]]] = [(input_data, {})]
-        for key in records_path:
-            next_items: List[Tuple[Any, Dict[str, Dict[str, Any]]]] = []
-            for item, trail in current_items:
-                if isinstance(item, dict):
-                    value = item.get(key)
-                    if isinstance(value, list):
-                        for sub_item in value:
-                            if isinstance(sub_item, dict):
-                                next_trail = dict(trail)
-                                next_trail[key] = sub_item
-                                next_items.append((sub_item, next_trail))
-                            else:
-                                next_items.append((sub_item, dict(trail)))
-                    elif value is not None:
-                        if isinstance(value, dict):
-                            next_trail = dict(trail)
-                            next_trail[key] = value
-                            next_items.append((value, next_trail))
-                        else:
-                            next_items.append((value, dict(trail)))
-                elif isinstance(item, list):
-                    for sub_item in item:
-                        if isinstance(sub_item, dict):
-                            value = sub_item.get(key)
-                            if isinstance(value, list):
-                                for inner_item in value:
-                                    if isinstance(inner_item, dict):
-                                        next_trail = dict(trail)
-                                        next_trail[key] = inner_item
-                                        next_items.append((inner_item, next_trail))
-                                    else:
-                                        next_items.append((inner_item, dict(trail)))
-                            elif value is not None:
-                                if isinstance(value, dict):
-                                    next_trail = dict(trail)
-                                    next_trail[key] = value
-                                    next_items.append((value, next_trail))
-                                else:
-                                    next_items.append((value, dict(trail)))
-            current_items = next_items
-        return [(item, trail) for item, trail in current_items if isinstance(item, dict)]
+    @classmethod
+    def _iter_records(
+        cls,
+        item: Any,
+        records_path: Sequence[str],
+        trail: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> Iterator[Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]]:
+        # Depth-first walk: yields records in the same order as the old level-by-level
+        # resolution, but one at a time so callers can stream.
+        trail = trail or {}
+        if not records_path:
+            if isinstance(item, dict):
+                yield item, trail
+            return
+        key, rest = records_path[0], records_path[1:]
+        if isinstance(item, dict):
+            parents = [item]
+        elif isinstance(item, list):
+            parents = [sub for sub in item if isinstance(sub, dict)]
+        else:
+            parents = []
+        for parent in parents:
+            value = parent.get(key)
+            if value is None:
+                continue
+            children = value if isinstance(value, list) else [value]
+            for child in children:
+                if isinstance(child, dict):
+                    next_trail = dict(trail)
+                    next_trail[key] = child
+                    yield from cls._iter_records(child, rest, next_trail)
+                else:
+                    yield from cls._iter_records(child, rest, dict(trail))
+
+    @classmethod
+    def _resolve_records(cls, input_data: Any, records_path: Sequence[str]) -> List[Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]]:
+        return list(cls._iter_records(input_data, list(records_path)))
 
     @staticmethod
     def _get_dotted_value(source: Any, dotted_path: str) -> Any:
@@ -108,9 +131,14 @@ class JsonGeoJSON:
                     return trail_obj.get(prop_path)
         return None
 
-    def convert_plot_togeojson(
+    def _load_source(self) -> Dict[str, Any]:
+        if self.input_dict is not None:
+            return self.input_dict
+        with open(self.input_json, "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    def iter_plot_features(
         self,
-        output_json,
         *,
         rows_key: str = "rows",
         records_path: Optional[Sequence[str]] = None,
@@ -132,16 +160,13 @@ class JsonGeoJSON:
         inject_id_field: str = "id",
         inject_match_field: Optional[str] = None,
         inject_as: str = "inject",
-    ):
-        source_data: Dict[str, Any]
-        if self.input_dict is None:
-            with open(self.input_json, "r", encoding="utf-8") as file:
-                source_data = json.load(file)
-        else:
-            source_data = self.input_dict
-
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield GeoJSON features one at a time straight from the record iterator.
+        """
+        source_data = self._load_source()
         resolved_records_path = list(records_path) if records_path else [rows_key]
-        rows_with_trail = self._resolve_records(source_data, resolved_records_path)
+        rows_with_trail = self._iter_records(source_data, resolved_records_path)
 
         inject_lookup: Dict[Any, Dict[str, Any]] = {}
         if inject_input_json:
@@ -154,19 +179,8 @@ class JsonGeoJSON:
                 if inject_id is not None:
                     inject_lookup[inject_id] = inject_row
 
-        include_properties = include_properties or [
-            "area",
-            "status",
-            "plotName",
-            "plotLabels",
-            "plotNote",
-            "plotVillage",
-            "plotDistrict",
-            "plotAdditionalData",
-            "externalId",
-        ]
+        include_properties = include_properties or list(DEFAULT_PLOT_PROPERTIES)
 
-        features = []
         for row, trail in rows_with_trail:
             geometry_data = row.get(geometry_field, {})
             coordinates = geometry_data.get(coordinates_field) if isinstance(geometry_data, dict) else None
@@ -229,18 +243,7 @@ class JsonGeoJSON:
 
             owner = row.get("owner", {}) if isinstance(row.get("owner", {}), dict) else {}
             if owner:
-                props.update(
-                    {
-                        "firstName_owner": owner.get("firstName"),
-                        "lastName_owner": owner.get("lastName"),
-                        "email_owner": owner.get("email"),
-                        "phoneNumber_owner": owner.get("phoneNumber"),
-                        "country_owner": owner.get("country"),
-                        "username_owner": owner.get("username"),
-                        "gdprAccepted_owner": owner.get("gdprAccepted"),
-                        "status_owner": owner.get("status"),
-                    }
-                )
+                props.update({f"{owner_key}_owner": owner.get(owner_key) for owner_key in OWNER_FIELDS})
 
             resolved_geometry_type = (
                 geometry_type
@@ -248,21 +251,187 @@ class JsonGeoJSON:
                 or "GeometryCollection"
             )
 
-            features.append(
-                {
-                    "type": "Feature",
-                    "geometry": {"type": resolved_geometry_type, "coordinates": coordinates},
-                    "properties": props,
-                }
-            )
+            yield {
+                "type": "Feature",
+                "geometry": {"type": resolved_geometry_type, "coordinates": coordinates},
+                "properties": props,
+            }
 
-        geojson = {"type": "FeatureCollection", "features": features}
-        with open(output_json, "w", encoding="utf-8") as output_file:
-            json.dump(geojson, output_file, ensure_ascii=False, indent=2)
+    def convert_plot_togeojson(self, output_json, **feature_kwargs: Any):
+        with profile_stage("convert_plot_togeojson.features"):
+            features = list(self.iter_plot_features(**feature_kwargs))
+            geojson = {"type": "FeatureCollection", "features": features}
+        with profile_stage("convert_plot_togeojson.write"):
+            with open(output_json, "w", encoding="utf-8") as output_file:
+                json.dump(geojson, output_file, ensure_ascii=False, indent=2)
         print(f"GeoJSON written to {output_json}")
         return geojson
 
-    def gpd_geojson(self, gdf, file_output_location):
+    def stream_plot_togeojson(self, output_json, *, output_format: str = "geojsonseq", **feature_kwargs: Any) -> int:
+        """
+        Write features incrementally without building the FeatureCollection in memory.
+        output_format: "geojsonseq" (RFC 8142), "ndjson" or "featurecollection".
+        Accepts the same keyword arguments as convert_plot_togeojson.
+        """
+        with FeatureStreamWriter(output_json, output_format=output_format) as writer:
+            writer.write_many(self.iter_plot_features(**feature_kwargs))
+        print(f"{writer.count} feature(s) streamed to {output_json}")
+        return writer.count
+
+    def convert_plot_togdf(
+        self,
+        *,
+        rows_key: str = "rows",
+        records_path: Optional[Sequence[str]] = None,
+        geometry_field: str = "polygon",
+        coordinates_field: str = "coordinates",
+        geometry_type: Optional[str] = None,
+        geometry_type_field: str = "type",
+        id_field: str = "id",
+        output_id_property: str = "plotID",
+        include_properties: Optional[List[str]] = None,
+        skip_empty_coordinates: bool = True,
+        crs: Optional[str] = "EPSG:4326",
+    ):
+        """
+        Build a GeoDataFrame straight from the records, without intermediate GeoJSON features.
+        Properties are extracted column by column and geometries are built in bulk
+        (see utils/geometry_builder.py). Produces the same columns as
+        convert_plot_togeojson + GeoDataFrame.from_features for the default options.
+        """
+        source_data = self._load_source()
+        resolved_records_path = list(records_path) if records_path else [rows_key]
+        records = [row for row, _ in self._iter_records(source_data, resolved_records_path)]
+
+        geometry_values = [row.get(geometry_field) for row in records]
+        coordinates = [g.get(coordinates_field) if isinstance(g, dict) else None for g in geometry_values]
+        if skip_empty_coordinates:
+            keep = [idx for idx, coords in enumerate(coordinates) if coords]
+            records = [records[idx] for idx in keep]
+            geometry_values = [geometry_values[idx] for idx in keep]
+            coordinates = [coordinates[idx] for idx in keep]
+        geometry_types = [
+            geometry_type or (g.get(geometry_type_field) if isinstance(g, dict) else None) for g in geometry_values
+        ]
+
+        include_properties = include_properties or list(DEFAULT_PLOT_PROPERTIES)
+        columns: Dict[str, List[Any]] = {}
+        for key_spec in include_properties:
+            if "=" in key_spec:
+                output_key, expression = key_spec.split("=", 1)
+                candidate_paths = [p.strip() for p in expression.split("||") if p.strip()]
+            else:
+                output_key, candidate_paths = key_spec, [key_spec.strip()]
+            values: List[Any] = []
+            for row in records:
+                value = None
+                for candidate_path in candidate_paths:
+                    value = self._get_dotted_value(row, candidate_path)
+                    if value is not None:
+                        break
+                values.append(value)
+            columns[output_key.strip()] = values
+        columns[output_id_property] = [row.get(id_field) for row in records]
+
+        owners = [row.get("owner") if isinstance(row.get("owner"), dict) else None for row in records]
+        if any(owners):
+            for owner_key in OWNER_FIELDS:
+                columns[f"{owner_key}_owner"] = [owner.get(owner_key) if owner else None for owner in owners]
+
+        geometries = geometries_from_coordinates(geometry_types, coordinates)
+        return gpd.GeoDataFrame(columns, geometry=geometries, crs=crs)
+
+    def convert_plot_togeoparquet(
+        self,
+        output_path,
+        *,
+        compression: Optional[str] = None,
+        row_group_size: Optional[int] = None,
+        **feature_kwargs: Any,
+    ):
+        features = list(self.iter_plot_features(**feature_kwargs))
+        if features:
+            gdf = gpd.GeoDataFrame.from_features(features, crs="EPSG:4326")
+        else:
+            # from_features has no geometry column to put a CRS on when there are no features.
+            gdf = gpd.GeoDataFrame(geometry=gpd.GeoSeries([], crs="EPSG:4326"))
+        return self.gpd_geoparquet(gdf, output_path, compression=compression, row_group_size=row_group_size)
+
+    @staticmethod
+    def _prepare_columnar(gdf):
+        """
+        Return a copy whose attribute columns have a single physical type:
+        lists/dicts are JSON-encoded and mixed-type object columns become strings.
+        """
+        prepared = gdf.copy()
+        geometry_name = prepared.geometry.name
+        for column in prepared.columns:
+            if column == geometry_name or prepared[column].dtype != "object":
+                continue
+            series = prepared[column]
+            if series.map(lambda x: isinstance(x, (list, dict))).any():
+                series = series.map(lambda x: json.dumps(x, ensure_ascii=False) if isinstance(x, (list, dict)) else x)
+            series = series.infer_objects()
+            if series.dtype == "object" and series.dropna().map(type).nunique() > 1:
+                series = series.map(lambda x: x if x is None else str(x))
+            prepared[column] = series
+        if prepared.crs is None:
+            prepared = prepared.set_crs("EPSG:4326")
+        return prepared
+
+    def gpd_geoparquet(
+        self,
+        gdf,
+        file_output_location,
+        *,
+        compression: Optional[str] = None,
+        row_group_size: Optional[int] = None,
+    ):
+        # GeoParquet stores geometry as WKB with CRS metadata; requires pyarrow.
+        resolved_compression = compression or os.getenv("GEOPARQUET_COMPRESSION", "zstd")
+        resolved_row_group_size = row_group_size or int(os.getenv("GEOPARQUET_ROW_GROUP_SIZE", "50000"))
+        output = Path(file_output_location)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        self._prepare_columnar(gdf).to_parquet(
+            output,
+            index=False,
+            compression=resolved_compression,
+            row_group_size=resolved_row_group_size,
+        )
+        print(f"GeoParquet written to {output}")
+        return str(output)
+
+    @staticmethod
+    def read_geoparquet(file_location, columns: Optional[List[str]] = None):
+        return gpd.read_parquet(file_location, columns=columns)
+
+    def gpd_geopackage(
+        self,
+        gdf,
+        file_output_location,
+        *,
+        layer_name: Optional[str] = None,
+        append: Optional[bool] = None,
+        batch_size: Optional[int] = None,
+    ):
+        # GEOPACKAGE_PATH collects every export into one indexed .gpkg, one layer per output name.
+        output = Path(os.getenv("GEOPACKAGE_PATH") or Path(file_output_location).with_suffix(".gpkg"))
+        resolved_layer = layer_name or Path(file_output_location).stem
+        resolved_append = append if append is not None else os.getenv("GPKG_APPEND", "false").lower() == "true"
+        writer = GeoPackageWriter(str(output), resolved_layer, batch_size=batch_size)
+        written = writer.write_gdf(gdf, append=resolved_append)
+        print(f"GeoPackage layer {resolved_layer} ({written} feature(s)) written to {output}")
+        return str(output)
+
+    def gpd_geojson(self, gdf, file_output_location, output_format: Optional[str] = None):
+        # GEO_OUTPUT_FORMAT lets start.py/notebook switch the export format without code changes.
+        resolved_format = str(output_format or os.getenv("GEO_OUTPUT_FORMAT", "geojson")).lower()
+        if resolved_format in {"geoparquet", "parquet"}:
+            return self.gpd_geoparquet(gdf, str(Path(file_output_location).with_suffix(".parquet")))
+        if resolved_format in {"gpkg", "geopackage"}:
+            return self.gpd_geopackage(gdf, file_output_location)
+        if resolved_format != "geojson":
+            raise ValueError(f"Unsupported output_format: {resolved_format}")
         try:
             gdf.to_file(file_output_location, driver="GeoJSON")
         except ValueError:
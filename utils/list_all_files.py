@@ -1,6 +1,8 @@
 from datetime import datetime
 from pathlib import Path
-from typing import List
+from typing import Any, List, Optional
+
+from .snapshot_catalog import Snapshot, default_catalog
 
 today = datetime.today().strftime("%Y-%m-%d")
 
@@ -35,11 +37,38 @@ def create_folder_file(basefolder, folder_name, name_file):
     return str(folder_name_final / f"plot_{today}_{safe_name}.json")
 
 
+def record_snapshot(path, project: Any, kind: str, row_count: Optional[int] = None):
+    """
+    Register a written file in the snapshot catalog; returns the path unchanged.
+    """
+    catalog = default_catalog()
+    if catalog is not None and path and Path(path).is_file():
+        catalog.record(str(path), project, kind, row_count=row_count)
+    return path
+
+
+def latest_snapshot(project: Any = None, kind: Optional[str] = None, folder=None) -> Optional[Snapshot]:
+    catalog = default_catalog()
+    if catalog is None:
+        return None
+    return catalog.latest(project, kind, folder=folder)
+
+
 def check_modified(folder_path):
     folder = Path(folder_path)
     if not folder.exists():
         print(f"Folder not found: {folder_path}")
         return
+    catalog = default_catalog()
+    # Newest snapshot per file; files written before the catalog existed fall back to mtime.
+    snapshots = {}
+    for snapshot in catalog.history(folder=folder) if catalog is not None else []:
+        snapshots.setdefault(str(Path(snapshot.path).resolve()), snapshot)
     for file_path in sorted(p for p in folder.iterdir() if p.is_file()):
-        modified_date = datetime.fromtimestamp(file_path.stat().st_mtime).date().isoformat()
-        print(f"File: {file_path.name}, Modified Date: {modified_date}")
\ No newline at end of file
+        snapshot = snapshots.get(str(file_path.resolve()))
+        if snapshot is not None:
+            rows = "-" if snapshot.row_count is None else snapshot.row_count
+            print(f"File: {file_path.name}, Kind: {snapshot.kind}, Written: {snapshot.created_at}, Rows: {rows}, Size: {snapshot.size_bytes}")
+        else:
+            modified_date = datetime.fromtimestamp(file_path.stat().st_mtime).date().isoformat()
+            print(f"File: {file_path.name}, Modified Date: {modified_date}")
@@ -0,0 +1,90 @@
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+
+DEFAULT_PARENT_FIELDS = {"activityID": "id", "plotID": "plotID"}
+
+
+def _flatten_dict(source: Dict[str, Any], prefix: str = "", out: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    # Same column naming as pd.json_normalize (nested dict keys joined by ".").
+    out = {} if out is None else out
+    for key, value in source.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            _flatten_dict(value, f"{name}.", out)
+        else:
+            out[name] = value
+    return out
+
+
+def iter_measurements(
+    activities: Iterable[Dict[str, Any]],
+    measurement_field: str = "measurement",
+    parent_fields: Mapping[str, str] = DEFAULT_PARENT_FIELDS,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield flattened measurements one by one, tagged with their parent activity fields.
+    """
+    for activity in activities:
+        if not isinstance(activity, dict):
+            continue
+        measurements = activity.get(measurement_field) or []
+        parent_values = {output_key: activity.get(source_key) for output_key, source_key in parent_fields.items()}
+        for measurement in measurements:
+            if not isinstance(measurement, dict):
+                continue
+            flat = _flatten_dict(measurement)
+            for output_key, value in parent_values.items():
+                flat.setdefault(output_key, value)
+            yield flat
+
+
+def parse_lat_lon(locations: List[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Parse "lat,lon" strings into two float arrays in bulk; anything unparsable becomes NaN.
+    """
+    count = len(locations)
+    latitude = np.full(count, np.nan)
+    longitude = np.full(count, np.nan)
+    valid_idx = np.fromiter(
+        (i for i, value in enumerate(locations) if isinstance(value, str) and value.count(",") == 1),
+        dtype="int64",
+    )
+    if valid_idx.size:
+        joined = ",".join(locations[i] for i in valid_idx)
+        pairs = pd.to_numeric(pd.Series(joined.split(",")).str.strip(), errors="coerce").to_numpy(dtype="float64")
+        pairs = pairs.reshape(-1, 2)
+        latitude[valid_idx] = pairs[:, 0]
+        longitude[valid_idx] = pairs[:, 1]
+    return latitude, longitude
+
+
+def measurement_points_gdf(
+    activities: Iterable[Dict[str, Any]],
+    *,
+    measurement_field: str = "measurement",
+    location_field: str = "gpsLocation",
+    parent_fields: Mapping[str, str] = DEFAULT_PARENT_FIELDS,
+    crs: str = "EPSG:4326",
+) -> gpd.GeoDataFrame:
+    """
+    Build a point GeoDataFrame of all measurement vertices (corners) of the activities.
+    Rows without a parsable location keep their attributes with a missing (None) geometry.
+    """
+    frame = pd.DataFrame.from_records(
+        list(iter_measurements(activities, measurement_field=measurement_field, parent_fields=parent_fields))
+    )
+    if frame.empty:
+        return gpd.GeoDataFrame(frame, geometry=gpd.GeoSeries([], crs=crs), crs=crs)
+
+    locations = frame[location_field].tolist() if location_field in frame.columns else [None] * len(frame)
+    latitude, longitude = parse_lat_lon(locations)
+    frame["latitude"] = latitude
+    frame["longitude"] = longitude
+    geometry = gpd.points_from_xy(longitude, latitude, crs=crs)
+    missing = np.isnan(latitude) | np.isnan(longitude)
+    if missing.any():
+        geometry[missing] = None
+    return gpd.GeoDataFrame(frame, geometry=geometry, crs=crs)
@@ -0,0 +1,285 @@
+import atexit
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import ExitStack, contextmanager, nullcontext
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+
+def _mib(value: float) -> float:
+    return round(value / (1024 * 1024), 2)
+
+
+@dataclass
+class MemoryStage:
+    name: str
+    start_bytes: int = 0
+    end_bytes: int = 0
+    peak_bytes: int = 0
+    seconds: float = 0.0
+    top_allocations: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def retained_bytes(self) -> int:
+        return self.end_bytes - self.start_bytes
+
+    def summary(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["retained_bytes"] = self.retained_bytes
+        data["peak_mib"] = _mib(self.peak_bytes)
+        data["retained_mib"] = _mib(self.retained_bytes)
+        return data
+
+
+class MemoryProfiler:
+    """
+    Per-stage memory accounting with tracemalloc: traced memory at stage start/end
+    (retained), the peak reached inside the stage, and the top allocation sites
+    that grew during it. Nested stages keep their parents' peaks correct.
+
+    tracemalloc is process-wide, so stages that overlap on the event loop also
+    see each other's allocations; profile one download at a time for clean numbers.
+    """
+
+    def __init__(self, top: int = 10, frames: int = 1):
+        self.top = top
+        self.frames = frames
+        self.stages: List[MemoryStage] = []
+        self._open: List[List[Any]] = []
+
+    def _propagate_peak(self) -> None:
+        # reset_peak() in a nested stage would hide the parent's peak; fold it in first.
+        _, peak = tracemalloc.get_traced_memory()
+        for entry in self._open:
+            entry[2] = max(entry[2], peak)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[MemoryStage]:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self._propagate_peak()
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot() if self.top else None
+        record = MemoryStage(name=name, start_bytes=tracemalloc.get_traced_memory()[0])
+        entry = [record, before, 0]
+        self._open.append(entry)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            self._propagate_peak()
+            self._open.remove(entry)
+            record.seconds = round(time.perf_counter() - start, 3)
+            record.end_bytes, _ = tracemalloc.get_traced_memory()
+            record.peak_bytes = entry[2]
+            if before is not None:
+                diff = tracemalloc.take_snapshot().compare_to(before, "lineno")
+                record.top_allocations = [
+                    {"site": str(stat.traceback), "size_diff_mib": _mib(stat.size_diff), "count_diff": stat.count_diff}
+                    for stat in diff[: self.top]
+                    if stat.size_diff > 0
+                ]
+            self.stages.append(record)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "stages": [stage.summary() for stage in self.stages],
+            "max_peak_mib": _mib(max((stage.peak_bytes for stage in self.stages), default=0)),
+        }
+
+    def format_report(self) -> str:
+        lines = [f"{'stage':<40} {'peak MiB':>10} {'retained MiB':>13} {'seconds':>9}"]
+        for stage in self.stages:
+            lines.append(f"{stage.name:<40} {_mib(stage.peak_bytes):>10} {_mib(stage.retained_bytes):>13} {stage.seconds:>9}")
+            for allocation in stage.top_allocations[:3]:
+                lines.append(f"    +{allocation['size_diff_mib']} MiB  {allocation['site']}")
+        return "\n".join(lines)
+
+    def save(self, directory: Path) -> Path:
+        directory.mkdir(parents=True, exist_ok=True)
+        output = directory / "memory_report.json"
+        output.write_text(json.dumps(self.report(), indent=2), encoding="utf-8")
+        (directory / "memory_report.txt").write_text(self.format_report() + "\n", encoding="utf-8")
+        return output
+
+
+class _StackSampler:
+    """
+    Samples one thread's Python stack every `interval` seconds from a background
+    thread and counts folded stacks ("outer;inner;leaf"), the input format of
+    flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+class CPUProfiler:
+    """
+    Per-stage CPU profiles written to `directory` as each stage ends:
+    - "cprofile": <n>_<stage>.prof (pstats/snakeviz) plus a cumulative-time .txt
+    - "sampling": <n>_<stage>.folded stack counts for flame graphs; low overhead
+
+    cProfile allows one active profiler, so a stage that starts inside another
+    cprofile stage is folded into the outer profile.
+    """
+
+    def __init__(self, mode: str, directory: Path, interval_ms: float = 5.0):
+        if mode not in ("cprofile", "sampling"):
+            raise ValueError(f"unknown profiler mode: {mode} (use cprofile or sampling)")
+        self.mode = mode
+        self.directory = directory
+        self.interval = interval_ms / 1000.0
+        self.stages: List[Dict[str, Any]] = []
+        self._active_cprofile: Optional[str] = None
+        self._counter = 0
+
+    def _output_base(self, name: str) -> Path:
+        self._counter += 1
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return self.directory / f"{self._counter:03d}_{safe_name}"
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if self.mode == "cprofile" and self._active_cprofile is not None:
+            yield
+            return
+        start = time.perf_counter()
+        if self.mode == "cprofile":
+            profiler = cProfile.Profile()
+            self._active_cprofile = name
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                self._active_cprofile = None
+                base = self._output_base(name)
+                profiler.dump_stats(f"{base}.prof")
+                text = io.StringIO()
+                pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(30)
+                Path(f"{base}.txt").write_text(text.getvalue(), encoding="utf-8")
+                self._finish(name, start, f"{base}.prof")
+            return
+
+        sampler = _StackSampler(threading.get_ident(), self.interval)
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            base = self._output_base(name)
+            lines = [f"{stack} {count}" for stack, count in sampler.stacks.most_common()]
+            Path(f"{base}.folded").write_text("\n".join(lines) + "\n", encoding="utf-8")
+            self._finish(name, start, f"{base}.folded", samples=sum(sampler.stacks.values()))
+
+    def _finish(self, name: str, start: float, output: str, **extra: Any) -> None:
+        self.stages.append({"stage": name, "seconds": round(time.perf_counter() - start, 3), "output": output, **extra})
+        (self.directory / "cpu_stages.json").write_text(json.dumps(self.stages, indent=2), encoding="utf-8")
+
+
+_RUN_DIRECTORY: Optional[Path] = None
+_MEMORY_PROFILER: Optional[MemoryProfiler] = None
+_CPU_PROFILER: Optional[CPUProfiler] = None
+
+
+def run_directory() -> Path:
+    """
+    One output folder per process run: API_PROFILE_DIR/<timestamp>_<pid>.
+    """
+    global _RUN_DIRECTORY
+    if _RUN_DIRECTORY is None:
+        base = Path(os.getenv("API_PROFILE_DIR", "./profiles"))
+        _RUN_DIRECTORY = base / f"{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}"
+    return _RUN_DIRECTORY
+
+
+def _save_memory_report() -> None:
+    if _MEMORY_PROFILER is not None and _MEMORY_PROFILER.stages:
+        output = _MEMORY_PROFILER.save(run_directory())
+        print(_MEMORY_PROFILER.format_report())
+        print(f"memory report written to {output}")
+
+
+def memory_profiler() -> Optional[MemoryProfiler]:
+    """
+    Process-wide profiler when API_MEMORY_PROFILE=true; its report is saved at exit.
+    """
+    global _MEMORY_PROFILER
+    if _MEMORY_PROFILER is None and os.getenv("API_MEMORY_PROFILE", "false").lower() == "true":
+        _MEMORY_PROFILER = MemoryProfiler(
+            top=int(os.getenv("API_MEMORY_PROFILE_TOP", "10")),
+            frames=int(os.getenv("API_MEMORY_PROFILE_FRAMES", "1")),
+        )
+        atexit.register(_save_memory_report)
+    return _MEMORY_PROFILER
+
+
+def cpu_profiler() -> Optional[CPUProfiler]:
+    """
+    Process-wide CPU profiler for API_PROFILE=cprofile|sampling (empty/off disables it).
+    """
+    global _CPU_PROFILER
+    mode = os.getenv("API_PROFILE", "").strip().lower()
+    if _CPU_PROFILER is None and mode not in ("", "off", "false"):
+        _CPU_PROFILER = CPUProfiler(
+            mode,
+            run_directory(),
+            interval_ms=float(os.getenv("API_PROFILE_INTERVAL_MS", "5")),
+        )
+        print(f"CPU profiling ({mode}) to {run_directory()}")
+    return _CPU_PROFILER
+
+
+@contextmanager
+def _stages(name: str, *profilers: Any) -> Iterator[None]:
+    with ExitStack() as stack:
+        for profiler in profilers:
+            stack.enter_context(profiler.stage(name))
+        yield
+
+
+def profile_stage(name: str):
+    """
+    Context manager marking a pipeline stage; a no-op unless profiling is enabled.
+    """
+    profilers = [profiler for profiler in (cpu_profiler(), memory_profiler()) if profiler is not None]
+    if not profilers:
+        return nullcontext()
+    if len(profilers) == 1:
+        return profilers[0].stage(name)
+    return _stages(name, *profilers)
@@ -0,0 +1,154 @@
+import os
+import sys
+import time
+from typing import Any, Optional
+
+
+def _in_notebook() -> bool:
+    shell = sys.modules.get("IPython")
+    if shell is None or "ipykernel" not in sys.modules:
+        return False
+    ipython = shell.get_ipython() if hasattr(shell, "get_ipython") else None
+    return ipython is not None and hasattr(ipython, "kernel")
+
+
+def _format_bytes(value: float) -> str:
+    if value < 1024:
+        return f"{value:.0f} B"
+    for unit in ("KB", "MB"):
+        value /= 1024
+        if value < 1024:
+            return f"{value:.1f} {unit}"
+    return f"{value / 1024:.1f} GB"
+
+
+def _format_seconds(value: float) -> str:
+    value = int(value)
+    if value >= 3600:
+        return f"{value // 3600}h{value % 3600 // 60:02d}m"
+    if value >= 60:
+        return f"{value // 60}m{value % 60:02d}s"
+    return f"{value}s"
+
+
+class Progress:
+    """
+    Throttled progress for one download phase: units done/total (pages, batches,
+    plots), rows, bytes received, rows/s and ETA.
+
+    Renders a progress bar in Jupyter, a single rewritten status line on a
+    terminal and a periodic log line otherwise. API_PROGRESS=auto|bar|line|log|off
+    picks the surface; rendering happens at most every API_PROGRESS_INTERVAL
+    seconds so updates stay cheap inside the event loop.
+    """
+
+    def __init__(
+        self,
+        phase: str,
+        total: Optional[int] = None,
+        *,
+        unit: str = "pages",
+        client: Any = None,
+        mode: Optional[str] = None,
+        min_interval: Optional[float] = None,
+    ):
+        self.phase = phase
+        self.total = total
+        self.unit = unit
+        self.done = 0
+        self.rows = 0
+        self.client = client
+        self._bytes_start = getattr(client, "bytes_received", 0)
+        self.mode = self._resolve_mode(mode or os.getenv("API_PROGRESS", "auto"))
+        interval_env = os.getenv("API_PROGRESS_INTERVAL")
+        default_interval = 5.0 if self.mode == "log" else 0.25
+        self.min_interval = min_interval if min_interval is not None else float(interval_env or default_interval)
+        self._start = time.perf_counter()
+        self._last_render = 0.0
+        self._rendered = None
+        self._display = None
+        self._closed = False
+        self._line_width = 0
+
+    @staticmethod
+    def _resolve_mode(mode: str) -> str:
+        mode = mode.strip().lower()
+        if mode != "auto":
+            return mode
+        if _in_notebook():
+            return "bar"
+        return "line" if sys.stderr.isatty() else "log"
+
+    @property
+    def bytes_received(self) -> int:
+        return getattr(self.client, "bytes_received", 0) - self._bytes_start if self.client is not None else 0
+
+    def set_total(self, total: int) -> None:
+        self.total = total
+        self._render(force=True)
+
+    def update(self, units: int = 1, rows: int = 0) -> None:
+        self.done += units
+        self.rows += rows
+        self._render()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._render(force=True)
+        self._closed = True
+        if self.mode == "line":
+            sys.stderr.write("\n")
+            sys.stderr.flush()
+
+    def __enter__(self) -> "Progress":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def status(self) -> str:
+        elapsed = max(time.perf_counter() - self._start, 1e-9)
+        total_text = f"/{self.total}" if self.total is not None else ""
+        parts = [f"{self.phase}: {self.done}{total_text} {self.unit}"]
+        if self.rows:
+            parts.append(f"{self.rows} rows ({self.rows / elapsed:.0f} rows/s)")
+        if self.client is not None:
+            parts.append(_format_bytes(self.bytes_received))
+        if self.total and 0 < self.done < self.total:
+            parts.append(f"ETA {_format_seconds((self.total - self.done) * elapsed / self.done)}")
+        else:
+            parts.append(_format_seconds(elapsed))
+        return " | ".join(parts)
+
+    def _render(self, force: bool = False) -> None:
+        if self.mode == "off" or self._closed:
+            return
+        now = time.perf_counter()
+        if not force and now - self._last_render < self.min_interval:
+            return
+        if (self.done, self.total) == self._rendered and force:
+            # close() right after the last update: nothing new to show.
+            return
+        self._last_render = now
+        self._rendered = (self.done, self.total)
+        text = self.status()
+        if self.mode == "bar":
+            self._render_notebook(text)
+        elif self.mode == "line":
+            padded = text.ljust(self._line_width)
+            self._line_width = len(text)
+            sys.stderr.write("\r" + padded)
+            sys.stderr.flush()
+        else:
+            print(text)
+
+    def _render_notebook(self, text: str) -> None:
+        from IPython.display import HTML, display
+
+        value, maximum = (self.done, self.total) if self.total else (0, 1)
+        html = HTML(f'<progress value="{value}" max="{maximum}" style="width: 40%"></progress> <code>{text}</code>')
+        if self._display is None:
+            self._display = display(html, display_id=True)
+        else:
+            self._display.update(html)
@@ -0,0 +1,214 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from .downloader_api import APIConfig, AsyncAPIClient
+from .list_all_files import record_snapshot
+
+# In-process cache so repeated searches (start.py's retry loop) never reload the file.
+_MEMORY_CACHE: Dict[str, "ProjectCatalog"] = {}
+
+
+def _default_cache_path() -> str:
+    return os.getenv("PROJECT_CATALOG_PATH", "./json_downloaded_api/proj_catalog.json")
+
+
+def _default_ttl() -> float:
+    return float(os.getenv("PROJECT_CATALOG_TTL_SECONDS", "900"))
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class ProjectCatalog:
+    """
+    Project list indexed for search: exact id lookup, substring match on names via
+    a trigram index, and trigram-similarity fuzzy matching when nothing matches.
+    """
+
+    def __init__(
+        self,
+        rows: List[Dict[str, Any]],
+        *,
+        id_field: str = "id",
+        name_field: str = "name",
+        fetched_at: Optional[float] = None,
+    ):
+        self.rows = [row for row in rows if isinstance(row, dict)]
+        self.id_field = id_field
+        self.name_field = name_field
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+        self._names = [str(row.get(name_field, "")).lower() for row in self.rows]
+        self._by_id: Dict[str, int] = {}
+        self._trigram_index: Dict[str, List[int]] = {}
+        for idx, row in enumerate(self.rows):
+            self._by_id.setdefault(str(row.get(id_field, "")).lower(), idx)
+            for gram in _trigrams(self._names[idx]):
+                self._trigram_index.setdefault(gram, []).append(idx)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def is_fresh(self, ttl_seconds: float) -> bool:
+        return (time.time() - self.fetched_at) < ttl_seconds
+
+    def get(self, project_id: Any) -> Optional[Dict[str, Any]]:
+        idx = self._by_id.get(str(project_id).strip().lower())
+        return None if idx is None else self.rows[idx]
+
+    def _substring_matches(self, key: str) -> List[int]:
+        if len(key) < 3:
+            return [idx for idx, name in enumerate(self._names) if key in name]
+        candidates: Optional[Set[int]] = None
+        # Interior trigrams only: the padded ones would pin the key to the start of a name.
+        for gram in {key[i : i + 3] for i in range(len(key) - 2)}:
+            postings = set(self._trigram_index.get(gram, ()))
+            candidates = postings if candidates is None else candidates & postings
+            if not candidates:
+                return []
+        return sorted(idx for idx in candidates or () if key in self._names[idx])
+
+    def _fuzzy_matches(self, key: str, min_similarity: float, limit: int) -> List[int]:
+        key_grams = _trigrams(key)
+        shared: Dict[int, int] = {}
+        for gram in key_grams:
+            for idx in self._trigram_index.get(gram, ()):
+                shared[idx] = shared.get(idx, 0) + 1
+        scored = []
+        for idx, count in shared.items():
+            # Share of the keyword's trigrams found in the name, so long names are not penalised.
+            similarity = count / len(key_grams)
+            if similarity >= min_similarity:
+                scored.append((similarity, len(self._names[idx]), idx))
+        scored.sort(key=lambda item: (-item[0], item[1], item[2]))
+        return [idx for _, _, idx in scored[:limit]]
+
+    def search(self, keyword: Any = "", *, fuzzy: bool = False, min_similarity: float = 0.5, fuzzy_limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Same matching rule as filter_rows_by_keyword (exact id or name substring,
+        case-insensitive). With fuzzy=True, falls back to the closest names when
+        nothing matches; prompts should show those through suggest() instead.
+        """
+        key = str(keyword).strip().lower()
+        if not key:
+            return list(self.rows)
+        matched = set(self._substring_matches(key))
+        id_idx = self._by_id.get(key)
+        if id_idx is not None:
+            matched.add(id_idx)
+        if matched:
+            return [self.rows[idx] for idx in sorted(matched)]
+        if fuzzy:
+            return [self.rows[idx] for idx in self._fuzzy_matches(key, min_similarity, fuzzy_limit)]
+        return []
+
+    def suggest(self, keyword: Any, *, min_similarity: float = 0.5, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Closest names for a keyword, for "did you mean" hints. Never a selection.
+        """
+        key = str(keyword).strip().lower()
+        if not key:
+            return []
+        return [self.rows[idx] for idx in self._fuzzy_matches(key, min_similarity, limit)]
+
+    def save(self, path: str) -> Path:
+        payload = {"fetched_at": self.fetched_at, "rows": self.rows}
+        output = Path(path)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        tmp = output.with_suffix(output.suffix + ".tmp")
+        with tmp.open("w", encoding="utf-8") as file:
+            json.dump(payload, file, ensure_ascii=False)
+        tmp.replace(output)
+        return output
+
+    @classmethod
+    def load(cls, path: str, *, id_field: str = "id", name_field: str = "name", rows_key: str = "rows") -> "ProjectCatalog":
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        fetched_at = data.get("fetched_at") if isinstance(data, dict) else None
+        if fetched_at is None:
+            # Plain API dumps (e.g. json_downloaded_api/proj_ID/*.json) carry no timestamp.
+            fetched_at = os.path.getmtime(path)
+        return cls(list(data.get(rows_key, [])), id_field=id_field, name_field=name_field, fetched_at=fetched_at)
+
+
+def _cached(cache_path: str, ttl_seconds: float, id_field: str, name_field: str) -> Optional[ProjectCatalog]:
+    catalog = _MEMORY_CACHE.get(cache_path)
+    if catalog is None and os.path.exists(cache_path):
+        try:
+            catalog = ProjectCatalog.load(cache_path, id_field=id_field, name_field=name_field)
+        except (OSError, ValueError):
+            catalog = None
+    if catalog is not None and catalog.is_fresh(ttl_seconds):
+        _MEMORY_CACHE[cache_path] = catalog
+        return catalog
+    return None
+
+
+def _store(catalog: ProjectCatalog, cache_path: str) -> ProjectCatalog:
+    catalog.save(cache_path)
+    record_snapshot(cache_path, "all", "projects", row_count=len(catalog))
+    _MEMORY_CACHE[cache_path] = catalog
+    return catalog
+
+
+async def get_project_catalog(
+    client: AsyncAPIClient,
+    cfg: APIConfig,
+    *,
+    cache_path: Optional[str] = None,
+    ttl_seconds: Optional[float] = None,
+    refresh: bool = False,
+) -> ProjectCatalog:
+    resolved_path = cache_path or _default_cache_path()
+    resolved_ttl = _default_ttl() if ttl_seconds is None else ttl_seconds
+    if not refresh:
+        cached = _cached(resolved_path, resolved_ttl, cfg.project_id_field, cfg.project_name_field)
+        if cached is not None:
+            return cached
+    data = await client.request(cfg.projects_endpoint, method="GET")
+    catalog = ProjectCatalog(
+        list(data.get(cfg.rows_key, [])),
+        id_field=cfg.project_id_field,
+        name_field=cfg.project_name_field,
+    )
+    return _store(catalog, resolved_path)
+
+
+def get_project_catalog_sync(
+    end_point: str,
+    auth_token: str,
+    *,
+    rows_key: str = "rows",
+    id_field: str = "id",
+    name_field: str = "name",
+    cache_path: Optional[str] = None,
+    ttl_seconds: Optional[float] = None,
+    refresh: bool = False,
+    timeout: int = 120,
+    cfg: Optional[APIConfig] = None,
+) -> ProjectCatalog:
+    """
+    Blocking variant for the interactive start.py flow (FilterSearch). The auth
+    header follows `cfg` (default APIConfig.from_env()), like the async client.
+    """
+    import requests
+
+    resolved_path = cache_path or _default_cache_path()
+    resolved_ttl = _default_ttl() if ttl_seconds is None else ttl_seconds
+    if not refresh:
+        cached = _cached(resolved_path, resolved_ttl, id_field, name_field)
+        if cached is not None:
+            return cached
+    response = requests.get(
+        end_point,
+        headers=(cfg or APIConfig.from_env()).auth_headers(auth_token),
+        timeout=timeout,
+    )
+    response.raise_for_status()
+    catalog = ProjectCatalog(list(response.json().get(rows_key, [])), id_field=id_field, name_field=name_field)
+    return _store(catalog, resolved_path)
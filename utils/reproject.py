@@ -0,0 +1,69 @@
+from functools import lru_cache
+from typing import Any, Optional, Tuple
+
+import numpy as np
+import shapely
+from pyproj import CRS, Transformer
+
+TARGET_CRS = "EPSG:4326"
+
+
+@lru_cache(maxsize=32)
+def _cached_transformer(source_wkt: str, target_wkt: str) -> Transformer:
+    # Keyed on WKT so equal CRSs coming from different files share one transformer.
+    return Transformer.from_crs(CRS.from_wkt(source_wkt), CRS.from_wkt(target_wkt), always_xy=True)
+
+
+def get_transformer(source_crs: Any, target_crs: Any = TARGET_CRS) -> Transformer:
+    return _cached_transformer(CRS.from_user_input(source_crs).to_wkt(), CRS.from_user_input(target_crs).to_wkt())
+
+
+def describe_crs(crs: Any) -> str:
+    if crs is None:
+        return "undefined"
+    resolved = CRS.from_user_input(crs)
+    authority = resolved.to_authority(min_confidence=70)
+    label = f"{authority[0]}:{authority[1]}" if authority else "custom"
+    return f"{label} ({resolved.name})"
+
+
+def reproject_to_wgs84(
+    gdf,
+    *,
+    precision: Optional[int] = None,
+    assume_crs: Optional[Any] = None,
+) -> Tuple[Any, str]:
+    """
+    Return (gdf in EPSG:4326, description of the source CRS).
+
+    All coordinates are transformed in one vectorized pass with a cached pyproj
+    transformer; `precision` optionally rounds to that many decimals (7 ~ 1 cm).
+    Inputs without a CRS are rejected unless `assume_crs` is given.
+    """
+    source_crs = gdf.crs
+    if source_crs is None:
+        if assume_crs is None:
+            raise ValueError("the input has no CRS; set INPUT_ASSUME_CRS or define the projection first")
+        source_crs = CRS.from_user_input(assume_crs)
+    source_description = describe_crs(source_crs)
+
+    target = CRS.from_user_input(TARGET_CRS)
+    same_crs = CRS.from_user_input(source_crs).equals(target, ignore_axis_order=True)
+    if same_crs and precision is None:
+        return gdf.set_crs(target, allow_override=True), source_description
+
+    transformer = None if same_crs else get_transformer(source_crs, target)
+
+    def _transform(coords: np.ndarray) -> np.ndarray:
+        if transformer is not None:
+            x, y = transformer.transform(coords[:, 0], coords[:, 1])
+            coords = np.column_stack([x, y])
+        if precision is not None:
+            coords = np.round(coords, precision)
+        return coords
+
+    result = gdf.copy()
+    geometry_name = result.geometry.name
+    result[geometry_name] = shapely.transform(np.asarray(result.geometry.values, dtype=object), _transform)
+    result = result.set_geometry(geometry_name).set_crs(target, allow_override=True)
+    return result, source_description
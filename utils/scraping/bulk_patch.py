@@ -0,0 +1,194 @@
+import asyncio
+import json
+import os
+import random
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+import httpx
+
+from ..downloader_api import AsyncAPIClient
+
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+@dataclass
+class PatchResult:
+    plot_id: Any
+    status: str = "pending"
+    http_status: Optional[int] = None
+    attempts: int = 0
+    elapsed_ms: float = 0.0
+    error: Optional[str] = None
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit that halves on throttling/server errors and grows by one
+    after `increase_after` consecutive successes (AIMD), between 1 and max_limit.
+    """
+
+    def __init__(self, initial: int, max_limit: int, increase_after: int = 10):
+        self.max_limit = max(1, max_limit)
+        self.limit = min(max(1, initial), self.max_limit)
+        self.increase_after = max(1, increase_after)
+        self._in_flight = 0
+        self._success_streak = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+
+    async def release(self, throttled: bool = False) -> None:
+        async with self._condition:
+            self._in_flight -= 1
+            if throttled:
+                self.limit = max(1, self.limit // 2)
+                self._success_streak = 0
+            else:
+                self._success_streak += 1
+                if self._success_streak >= self.increase_after and self.limit < self.max_limit:
+                    self.limit += 1
+                    self._success_streak = 0
+            self._condition.notify_all()
+
+
+class BulkPatcher:
+    """
+    Apply many PATCH requests through one AsyncAPIClient with bounded, adaptive
+    concurrency and retries, recording a per-plot result report.
+
+    Polygon patches replace the whole geometry, so retrying them is safe.
+    """
+
+    def __init__(
+        self,
+        client: AsyncAPIClient,
+        endpoint: str,
+        *,
+        id_placeholder: str = "{id}",
+        concurrency: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        backoff_seconds: Optional[float] = None,
+        method: str = "PATCH",
+    ):
+        self.client = client
+        self.endpoint = endpoint
+        self.id_placeholder = id_placeholder
+        self.method = method.upper()
+        self.concurrency = concurrency or int(os.getenv("PATCH_CONCURRENCY", "8"))
+        self.max_concurrency = max_concurrency or int(os.getenv("PATCH_MAX_CONCURRENCY", "32"))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("PATCH_MAX_RETRIES", "4"))
+        self.backoff_seconds = backoff_seconds if backoff_seconds is not None else float(os.getenv("PATCH_BACKOFF_SECONDS", "1"))
+
+    def _endpoint_for(self, plot_id: Any) -> str:
+        if self.id_placeholder in self.endpoint:
+            return self.endpoint.replace(self.id_placeholder, str(plot_id))
+        return f"{self.endpoint}{plot_id}"
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return float(retry_after)
+        return self.backoff_seconds * (2 ** (attempt - 1)) * (0.5 + random.random())
+
+    async def _patch_one(self, limiter: AdaptiveLimiter, plot_id: Any, payload: Dict[str, Any]) -> PatchResult:
+        result = PatchResult(plot_id=plot_id)
+        start = time.perf_counter()
+        while True:
+            result.attempts += 1
+            response: Optional[httpx.Response] = None
+            throttled = False
+            await limiter.acquire()
+            try:
+                await self.client.request(self._endpoint_for(plot_id), method=self.method, json_body=payload)
+                result.status = "ok"
+                result.http_status = None
+                result.error = None
+            except httpx.HTTPStatusError as exc:
+                response = exc.response
+                result.http_status = response.status_code
+                result.status = "failed"
+                result.error = f"HTTP {response.status_code}"
+                throttled = response.status_code in RETRYABLE_STATUS
+            except httpx.TransportError as exc:
+                result.status = "failed"
+                result.error = f"{type(exc).__name__}: {exc}"
+                throttled = True
+            except Exception as exc:
+                # Not retried, but one bad plot must not abort the whole run.
+                result.status = "failed"
+                result.error = f"{type(exc).__name__}: {exc}"
+            finally:
+                await limiter.release(throttled=throttled)
+
+            if result.status == "ok":
+                break
+            if not throttled or result.attempts > self.max_retries:
+                break
+            await asyncio.sleep(self._retry_delay(result.attempts, response))
+        result.elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+        return result
+
+    async def run(
+        self,
+        patches: Mapping[Any, Dict[str, Any]],
+        *,
+        only_ids: Optional[Iterable[Any]] = None,
+        report_path: Optional[str] = None,
+    ) -> List[PatchResult]:
+        """
+        Patch every plot in `patches` (or only `only_ids`, e.g. the failures of a
+        previous report) and optionally write the report to `report_path`.
+        """
+        selected = patches
+        if only_ids is not None:
+            wanted = {str(plot_id) for plot_id in only_ids}
+            selected = {plot_id: payload for plot_id, payload in patches.items() if str(plot_id) in wanted}
+
+        limiter = AdaptiveLimiter(self.concurrency, self.max_concurrency)
+        queue: "asyncio.Queue[tuple]" = asyncio.Queue()
+        for position, (plot_id, payload) in enumerate(selected.items()):
+            queue.put_nowait((position, plot_id, payload))
+        # Plots never reached (the run was interrupted) stay "pending" in the report.
+        results = [PatchResult(plot_id=plot_id) for plot_id in selected]
+
+        # A fixed pool of workers (not one task per plot) keeps limiter wake-ups cheap.
+        async def _worker() -> None:
+            while True:
+                try:
+                    position, plot_id, payload = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                results[position] = await self._patch_one(limiter, plot_id, payload)
+
+        try:
+            await asyncio.gather(*[_worker() for _ in range(min(limiter.max_limit, len(selected)))])
+        finally:
+            failed = sum(1 for r in results if r.status != "ok")
+            print(f"patched {len(results) - failed}/{len(results)} plot(s), {failed} failed")
+            if report_path:
+                self.save_report(results, report_path)
+        return results
+
+    @staticmethod
+    def save_report(results: List[PatchResult], report_path: str) -> Path:
+        rows = [asdict(r) for r in results]
+        summary = {
+            "total": len(rows),
+            "ok": sum(1 for r in rows if r["status"] == "ok"),
+            "failed": sum(1 for r in rows if r["status"] != "ok"),
+        }
+        return AsyncAPIClient.save_json({"summary": summary, "rows": rows}, report_path)
+
+    @staticmethod
+    def failed_ids(report_path: str) -> List[Any]:
+        with open(report_path, "r", encoding="utf-8") as file:
+            report = json.load(file)
+        return [row["plot_id"] for row in report.get("rows", []) if row.get("status") != "ok"]
@@ -1,11 +1,14 @@
 import asyncio
 import json
 import os
+from pathlib import Path
 from typing import Any, Dict, List, Optional, Sequence
 
 import aiofiles
 
 from ..downloader_api import APIConfig, AsyncAPIClient, Request
+from ..profiling import profile_stage
+from ..progress import Progress
 
 
 class PaginatingDownload(Request):
@@ -48,6 +51,37 @@ class PaginatingDownload(Request):
 
         return row_json
 
+    @staticmethod
+    def page_request_kwargs(
+        method: str,
+        payload: Dict[str, Any],
+        params: Dict[str, Any],
+        page_number: int,
+        page_param_name: str,
+        page_in_body: bool,
+    ) -> Dict[str, Any]:
+        """
+        client.request() keyword arguments for one page: GET sends everything as query
+        parameters, other methods send the payload as the body and the page number in
+        the body or the query string.
+        """
+        page_payload = dict(payload)
+        page_params = dict(params)
+        if method == "GET":
+            page_params.update(page_payload)
+            page_payload = {}
+            page_in_body = False
+
+        if page_in_body:
+            page_payload[page_param_name] = page_number
+        else:
+            page_params[page_param_name] = page_number
+        return {
+            "method": method,
+            "params": page_params if method == "GET" or not page_in_body else None,
+            "json_body": page_payload if method != "GET" else None,
+        }
+
     @staticmethod
     async def request_paginated_rows(
         client: AsyncAPIClient,
@@ -62,6 +96,7 @@ class PaginatingDownload(Request):
         first_page_number: Optional[int] = None,
         page_in_body: Optional[bool] = None,
         total_pages_key: Optional[str] = None,
+        progress_label: Optional[str] = None,
     ) -> Dict:
         resolved_method = method.upper()
         resolved_page_param_name = page_param_name or cfg.page_param_name
@@ -73,23 +108,14 @@ class PaginatingDownload(Request):
         payload = dict(base_payload or {})
         params = dict(extra_params or {})
 
-        first_payload = dict(payload)
-        first_params = dict(params)
-        if resolved_method == "GET":
-            first_params.update(first_payload)
-            first_payload = {}
+        def _page_request(page_number: int) -> Dict[str, Any]:
+            return PaginatingDownload.page_request_kwargs(
+                resolved_method, payload, params, page_number, resolved_page_param_name, resolved_page_in_body
+            )
 
-        if resolved_page_in_body:
-            first_payload[resolved_page_param_name] = resolved_first_page_number
-        else:
-            first_params[resolved_page_param_name] = resolved_first_page_number
-
-        first_data = await client.request(
-            endpoint,
-            method=resolved_method,
-            params=first_params if resolved_method == "GET" or not resolved_page_in_body else None,
-            json_body=first_payload if resolved_method != "GET" else None,
-        )
+        # Created before the first request so rates and bytes include it; nothing renders for one page.
+        progress = Progress(progress_label or f"pages {endpoint}", unit="pages", client=client)
+        first_data = await client.request(endpoint, **_page_request(resolved_first_page_number))
 
         rows_key = cfg.rows_key
         resolved_total_pages_key = total_pages_key or cfg.total_pages_key
@@ -101,30 +127,23 @@ class PaginatingDownload(Request):
         if total_pages <= 1:
             return {rows_key: first_rows}
 
+        progress.total = total_pages
+        progress.update(1, rows=len(first_rows))
+
         async def _fetch(page_number: int) -> List[Dict]:
-            page_payload = dict(payload)
-            page_params = dict(params)
-            if resolved_method == "GET":
-                page_params.update(page_payload)
-                page_payload = {}
-
-            if resolved_page_in_body:
-                page_payload[resolved_page_param_name] = page_number
-            else:
-                page_params[resolved_page_param_name] = page_number
-            page_data = await client.request(
-                endpoint,
-                method=resolved_method,
-                params=page_params if resolved_method == "GET" or not resolved_page_in_body else None,
-                json_body=page_payload if resolved_method != "GET" else None,
-            )
-            return list(page_data.get(rows_key, []))
+            page_data = await client.request(endpoint, **_page_request(page_number))
+            page_rows = list(page_data.get(rows_key, []))
+            progress.update(1, rows=len(page_rows))
+            return page_rows
 
         tasks = [
             _fetch(page)
             for page in range(resolved_first_page_number + 1, resolved_first_page_number + total_pages)
         ]
-        all_rows_nested = await asyncio.gather(*tasks)
+        try:
+            all_rows_nested = await asyncio.gather(*tasks)
+        finally:
+            progress.close()
         all_rows = list(first_rows)
         all_rows.extend(item for page_rows in all_rows_nested for item in page_rows)
         return {rows_key: all_rows}
@@ -208,6 +227,157 @@ class PaginatingDownload(Request):
         )
         return [r for r in source_data.get(source_rows_key, []) if isinstance(r, dict)]
 
+    @classmethod
+    async def iter_detail_batches(
+        cls,
+        client: AsyncAPIClient,
+        cfg: APIConfig,
+        record_ids: Sequence[Any],
+        *,
+        details_endpoint: str,
+        ids_param: str = "ids",
+        ids_key: Optional[str] = None,
+        batch_size: int = 200,
+        concurrency: int = 8,
+        id_in_path: Optional[bool] = None,
+        id_placeholder: str = "{id}",
+        method: str = "GET",
+        payload: Optional[Dict[str, Any]] = None,
+        ids_as_list: bool = False,
+        progress_label: str = "details",
+    ):
+        """
+        Fetch detail rows for record_ids in id batches (or one request per id when the
+        endpoint has an id placeholder) with at most `concurrency` requests in flight.
+        Yields each batch's rows in input order as soon as that batch is available.
+        """
+        rows_key = cfg.rows_key
+        ids_key = ids_key or ids_param
+        method_upper = method.upper()
+        if batch_size <= 0:
+            batch_size = 200
+        if concurrency <= 0:
+            concurrency = 8
+        if id_in_path is None:
+            id_in_path = id_placeholder in details_endpoint
+
+        def _normalize_detail_rows(response_data: Any) -> List[Dict]:
+            if isinstance(response_data, dict):
+                if isinstance(response_data.get(rows_key), list):
+                    return [r for r in response_data[rows_key] if isinstance(r, dict)]
+                if isinstance(response_data.get("rows"), list):
+                    return [r for r in response_data["rows"] if isinstance(r, dict)]
+                return [response_data]
+            if isinstance(response_data, list):
+                return [r for r in response_data if isinstance(r, dict)]
+            return []
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _fetch_detail_single(single_id: Any) -> List[Dict]:
+            async with semaphore:
+                detail_endpoint = details_endpoint.replace(id_placeholder, str(single_id))
+                detail_data = await client.request(detail_endpoint, method=method_upper)
+                return _normalize_detail_rows(detail_data)
+
+        async def _fetch_detail_batch(batch_ids: List[Any]) -> List[Dict]:
+            async with semaphore:
+                ids_csv = ",".join(str(i) for i in batch_ids)
+                query_params = {ids_param: ids_csv} if method_upper == "GET" else None
+                body_payload = dict(payload or {})
+                if method_upper != "GET":
+                    body_payload[ids_key] = list(batch_ids) if ids_as_list else ids_csv
+                detail_data = await client.request(
+                    details_endpoint,
+                    method=method_upper,
+                    params=query_params,
+                    json_body=body_payload if method_upper != "GET" else None,
+                )
+                return _normalize_detail_rows(detail_data)
+
+        if id_in_path:
+            tasks = [asyncio.ensure_future(_fetch_detail_single(i)) for i in record_ids]
+        else:
+            tasks = [
+                asyncio.ensure_future(_fetch_detail_batch(list(record_ids[start : start + batch_size])))
+                for start in range(0, len(record_ids), batch_size)
+            ]
+        progress = Progress(progress_label, len(tasks), unit="requests" if id_in_path else "batches", client=client)
+
+        def _on_done(task: asyncio.Future) -> None:
+            if not task.cancelled() and task.exception() is None:
+                progress.update(1, rows=len(task.result()))
+
+        for task in tasks:
+            task.add_done_callback(_on_done)
+        try:
+            for task in tasks:
+                yield await task
+        finally:
+            progress.close()
+            for task in tasks:
+                task.cancel()
+
+    @classmethod
+    async def download_by_ids(
+        cls,
+        client: AsyncAPIClient,
+        cfg: APIConfig,
+        record_ids: Sequence[Any],
+        output_path: str,
+        *,
+        details_endpoint: Optional[str] = None,
+        details_ids_param: Optional[str] = None,
+        details_batch_size: Optional[int] = None,
+        details_concurrency: Optional[int] = None,
+        details_method: Optional[str] = None,
+        details_ids_as_list: Optional[bool] = None,
+        keep_rows: bool = True,
+    ):
+        """
+        Download detail rows for a known id list (e.g. update backups) through the
+        batched details requests, streaming each batch to `output_path` as
+        {"rows": [...]} instead of building one huge ?ids= request.
+        """
+        rows_key = cfg.rows_key
+        ids_param = details_ids_param or os.getenv("PLOTS_DETAILS_IDS_PARAM", "ids")
+        batch_size = details_batch_size or int(os.getenv("PLOTS_DETAILS_BATCH_SIZE", "200"))
+        concurrency = details_concurrency or int(os.getenv("PLOTS_DETAILS_CONCURRENCY", "8"))
+        method = details_method or os.getenv("PLOTS_DETAILS_METHOD", "GET")
+        ids_as_list = (
+            details_ids_as_list
+            if details_ids_as_list is not None
+            else os.getenv("PLOTS_DETAILS_IDS_AS_LIST", "false").lower() == "true"
+        )
+        unique_ids = list(dict.fromkeys(i for i in record_ids if i is not None))
+
+        rows: List[Dict[str, Any]] = []
+        written = 0
+        output = Path(output_path)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        async with aiofiles.open(output, "w", encoding="utf-8") as output_file:
+            await output_file.write(f'{{"{rows_key}": [')
+            async for batch_rows in cls.iter_detail_batches(
+                client,
+                cfg,
+                unique_ids,
+                details_endpoint=details_endpoint or cfg.plots_details_endpoint,
+                ids_param=ids_param,
+                batch_size=batch_size,
+                concurrency=concurrency,
+                method=method,
+                ids_as_list=ids_as_list,
+            ):
+                chunk = ",\n".join(json.dumps(row, ensure_ascii=False) for row in batch_rows)
+                if chunk:
+                    await output_file.write((",\n" if written else "\n") + chunk)
+                    written += len(batch_rows)
+                if keep_rows:
+                    rows.extend(batch_rows)
+            await output_file.write("\n]}\n")
+        print(f"{written} record(s) for {len(unique_ids)} id(s) written to {output}")
+        return {rows_key: rows}, output
+
     @classmethod
     async def download_records(
         cls,
@@ -250,18 +420,19 @@ class PaginatingDownload(Request):
                 payload.update(cleaned)
                 params.update(cleaned)
 
-        data = await cls.request_paginated_rows(
-            client,
-            cfg,
-            endpoint,
-            method=filter_method,
-            base_payload=payload,
-            extra_params=params,
-            page_param_name=page_param_name,
-            first_page_number=first_page_number,
-            page_in_body=page_in_body,
-            total_pages_key=total_pages_key,
-        )
+        with profile_stage("download_records.pages"):
+            data = await cls.request_paginated_rows(
+                client,
+                cfg,
+                endpoint,
+                method=filter_method,
+                base_payload=payload,
+                extra_params=params,
+                page_param_name=page_param_name,
+                first_page_number=first_page_number,
+                page_in_body=page_in_body,
+                total_pages_key=total_pages_key,
+            )
 
         final_payload: Dict[str, Any]
         if not fetch_details:
@@ -293,88 +464,206 @@ class PaginatingDownload(Request):
                 if details_max_ids is not None and details_max_ids > 0:
                     record_ids = record_ids[:details_max_ids]
 
-                if not record_ids:
-                    final_payload = {rows_key: []}
-                else:
-                    def _normalize_detail_rows(response_data: Any) -> List[Dict]:
-                        if isinstance(response_data, dict):
-                            if isinstance(response_data.get(rows_key), list):
-                                return [r for r in response_data[rows_key] if isinstance(r, dict)]
-                            if isinstance(response_data.get("rows"), list):
-                                return [r for r in response_data["rows"] if isinstance(r, dict)]
-                            return [response_data]
-                        if isinstance(response_data, list):
-                            return [r for r in response_data if isinstance(r, dict)]
-                        return []
-
-                    if details_id_in_path is None:
-                        details_id_in_path = details_id_placeholder in resolved_details_endpoint
-
-                    semaphore = asyncio.Semaphore(concurrency)
-
-                    async def _fetch_detail_single(single_id: Any) -> List[Dict]:
-                        async with semaphore:
-                            detail_endpoint = resolved_details_endpoint.replace(details_id_placeholder, str(single_id))
-                            detail_data = await client.request(detail_endpoint, method=details_method.upper())
-                            return _normalize_detail_rows(detail_data)
-
-                    async def _fetch_detail_batch(batch_ids: List[Any]) -> List[Dict]:
-                        async with semaphore:
-                            ids_csv = ",".join(str(i) for i in batch_ids)
-                            method_upper = details_method.upper()
-                            query_params = {ids_param: ids_csv} if method_upper == "GET" else None
-                            body_payload = dict(details_payload or {})
-                            if method_upper != "GET":
-                                body_payload[ids_key] = list(batch_ids) if details_ids_as_list else ids_csv
-                            detail_data = await client.request(
-                                resolved_details_endpoint,
-                                method=method_upper,
-                                params=query_params,
-                                json_body=body_payload if method_upper != "GET" else None,
-                            )
-                            return _normalize_detail_rows(detail_data)
-
-                    if details_id_in_path:
-                        detail_rows_nested = await asyncio.gather(*[_fetch_detail_single(i) for i in record_ids])
-                    else:
-                        id_batches = [
-                            record_ids[start : start + batch_size]
-                            for start in range(0, len(record_ids), batch_size)
-                        ]
-                        detail_rows_nested = await asyncio.gather(*[_fetch_detail_batch(b) for b in id_batches])
-                    detail_rows = [row for batch in detail_rows_nested for row in batch]
-                    final_payload = {rows_key: detail_rows}
+                with profile_stage("download_records.details"):
+                    detail_rows: List[Dict] = []
+                    async for batch_rows in cls.iter_detail_batches(
+                        client,
+                        cfg,
+                        record_ids,
+                        details_endpoint=resolved_details_endpoint,
+                        ids_param=ids_param,
+                        ids_key=ids_key,
+                        batch_size=batch_size,
+                        concurrency=concurrency,
+                        id_in_path=details_id_in_path,
+                        id_placeholder=details_id_placeholder,
+                        method=details_method,
+                        payload=details_payload,
+                        ids_as_list=details_ids_as_list,
+                    ):
+                        detail_rows.extend(batch_rows)
+                final_payload = {rows_key: detail_rows}
 
         # Optional idempotent injection: attaches source context by key into target records.
         # - No source/no match => no mutation.
         # - Existing attach key is overwritten with latest value (idempotent behavior).
         if inject_sources:
-            target_path = list(target_records_path) if target_records_path else [cfg.rows_key]
-            target_records = cls._resolve_target_records(final_payload, target_path)
-            for source_cfg in inject_sources:
-                attach_as = str(source_cfg.get("attach_as", "context"))
-                target_key = str(source_cfg.get("target_key", "id"))
-                source_key = str(source_cfg.get("source_key", "id"))
-                source_rows = await cls._fetch_injection_rows(client, cfg, source_cfg)
-                source_lookup = {
-                    cls._get_dotted_value(src_row, source_key): src_row
-                    for src_row in source_rows
-                    if isinstance(src_row, dict) and cls._get_dotted_value(src_row, source_key) is not None
-                }
-                if not source_lookup:
-                    continue
-                for target_row in target_records:
-                    match_value = cls._get_dotted_value(target_row, target_key)
-                    if match_value is None:
-                        continue
-                    matched = source_lookup.get(match_value)
-                    if matched is None:
+            with profile_stage("download_records.injection"):
+                target_path = list(target_records_path) if target_records_path else [cfg.rows_key]
+                target_records = cls._resolve_target_records(final_payload, target_path)
+                for source_cfg in inject_sources:
+                    attach_as = str(source_cfg.get("attach_as", "context"))
+                    target_key = str(source_cfg.get("target_key", "id"))
+                    source_key = str(source_cfg.get("source_key", "id"))
+                    source_rows = await cls._fetch_injection_rows(client, cfg, source_cfg)
+                    source_lookup = {
+                        cls._get_dotted_value(src_row, source_key): src_row
+                        for src_row in source_rows
+                        if isinstance(src_row, dict) and cls._get_dotted_value(src_row, source_key) is not None
+                    }
+                    if not source_lookup:
                         continue
-                    target_row[attach_as] = matched
-
-        output = client.save_json(final_payload, output_path)
+                    for target_row in target_records:
+                        match_value = cls._get_dotted_value(target_row, target_key)
+                        if match_value is None:
+                            continue
+                        matched = source_lookup.get(match_value)
+                        if matched is None:
+                            continue
+                        target_row[attach_as] = matched
+
+        with profile_stage("download_records.save_json"):
+            output = client.save_json(final_payload, output_path)
         return final_payload, output
 
+    @classmethod
+    async def download_plot_activities(
+        cls,
+        client: AsyncAPIClient,
+        cfg: APIConfig,
+        project_id: Any,
+        plot_ids: Optional[Sequence[Any]] = None,
+        *,
+        activity_type: Optional[str] = "land_survey",
+        search_endpoint: Optional[str] = None,
+        search_method: Optional[str] = None,
+        activity_endpoint: Optional[str] = None,
+        activity_id_placeholder: str = "{activity_id}",
+        details_endpoint: Optional[str] = None,
+        details_ids_param: Optional[str] = None,
+        details_batch_size: Optional[int] = None,
+        project_id_payload_field: Optional[str] = None,
+        activity_id_field: Optional[str] = None,
+        plot_id_field: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        fetch_bodies: bool = True,
+        extra_filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Bulk replacement for one search + one GET per plot: pages through the
+        project's activities once, keeps the first activity per plot and fetches
+        the full bodies with bounded concurrency on the shared client. When the API
+        has a multi-id activity endpoint (details_endpoint / ACTIVITIES_DETAILS_ENDPOINT)
+        bodies are fetched in id batches instead of one GET per activity.
+        Returns activity bodies in plot_ids order; plots without an activity, activities
+        without an id and bodies that failed to download are skipped (failures are printed).
+        """
+        resolved_search_endpoint = search_endpoint or cfg.activities_filter_endpoint
+        resolved_search_method = (search_method or os.getenv("ACTIVITIES_FILTER_METHOD", "GET")).upper()
+        resolved_activity_endpoint = activity_endpoint or cfg.activity_by_id_endpoint
+        payload_field = project_id_payload_field or os.getenv("PROJECT_ID_PAYLOAD_FIELD", "projectId")
+        resolved_activity_id_field = activity_id_field or os.getenv("ACTIVITY_ID_FIELD", "id")
+        resolved_plot_id_field = plot_id_field or os.getenv("PLOT_ID_RESULT_FIELD", "plotID")
+        resolved_concurrency = concurrency or int(os.getenv("ACTIVITY_DETAILS_CONCURRENCY", "8"))
+        if resolved_concurrency <= 0:
+            resolved_concurrency = 8
+
+        filters: Dict[str, Any] = {payload_field: project_id}
+        if activity_type:
+            filters["activityType"] = activity_type
+        filters.update({k: v for k, v in (extra_filters or {}).items() if v is not None})
+
+        search_data = await cls.request_paginated_rows(
+            client,
+            cfg,
+            resolved_search_endpoint,
+            method=resolved_search_method,
+            base_payload=filters,
+            extra_params=filters,
+            progress_label="activity search",
+        )
+
+        wanted = None if plot_ids is None else {str(plot_id) for plot_id in plot_ids}
+        activity_by_plot: Dict[str, Dict[str, Any]] = {}
+        for row in search_data.get(cfg.rows_key, []):
+            if not isinstance(row, dict):
+                continue
+            plot_key = row.get(resolved_plot_id_field)
+            if plot_key is None:
+                continue
+            plot_key = str(plot_key)
+            if wanted is not None and plot_key not in wanted:
+                continue
+            # Same choice as the per-plot search: first activity returned for the plot.
+            activity_by_plot.setdefault(plot_key, row)
+
+        order = [str(plot_id) for plot_id in plot_ids] if plot_ids is not None else list(activity_by_plot)
+        selected = [activity_by_plot[key] for key in dict.fromkeys(order) if key in activity_by_plot]
+        print(f"{len(selected)} activity(ies) matched for {len(order)} plot(s)")
+        without_id = sum(1 for summary in selected if summary.get(resolved_activity_id_field) is None)
+        if without_id:
+            print(f"{without_id} activity(ies) without {resolved_activity_id_field!r} skipped")
+            selected = [summary for summary in selected if summary.get(resolved_activity_id_field) is not None]
+        if not fetch_bodies:
+            return selected
+
+        semaphore = asyncio.Semaphore(resolved_concurrency)
+        resolved_details_endpoint = details_endpoint or os.getenv("ACTIVITIES_DETAILS_ENDPOINT", "")
+        if resolved_details_endpoint:
+            ids_param = details_ids_param or os.getenv("ACTIVITIES_DETAILS_IDS_PARAM", "ids")
+            batch_size = details_batch_size or int(os.getenv("ACTIVITIES_DETAILS_BATCH_SIZE", "200"))
+            activity_ids = [summary.get(resolved_activity_id_field) for summary in selected]
+            id_batches = [activity_ids[start : start + batch_size] for start in range(0, len(activity_ids), batch_size)]
+
+            progress = Progress("activity bodies", len(id_batches), unit="batches", client=client)
+
+            async def _fetch_batch(batch_ids: List[Any]) -> List[Dict[str, Any]]:
+                async with semaphore:
+                    data = await client.request(
+                        resolved_details_endpoint,
+                        method="GET",
+                        params={ids_param: ",".join(str(i) for i in batch_ids)},
+                    )
+                    rows = data.get(cfg.rows_key, []) if isinstance(data, dict) else data
+                    batch_rows = [r for r in rows if isinstance(r, dict)]
+                    progress.update(1, rows=len(batch_rows))
+                    return batch_rows
+
+            with progress:
+                results = await asyncio.gather(*[_fetch_batch(batch) for batch in id_batches], return_exceptions=True)
+            nested = cls._report_failures(results, [f"batch of {len(batch)}" for batch in id_batches], "activity body batch")
+            bodies_by_id = {str(body.get(resolved_activity_id_field)): body for batch in nested for body in batch}
+            return [
+                bodies_by_id[str(summary.get(resolved_activity_id_field))]
+                for summary in selected
+                if str(summary.get(resolved_activity_id_field)) in bodies_by_id
+            ]
+
+        progress = Progress("activity bodies", len(selected), unit="requests", client=client)
+
+        async def _fetch_body(summary: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                endpoint = resolved_activity_endpoint.replace(
+                    activity_id_placeholder, str(summary.get(resolved_activity_id_field))
+                )
+                body = await client.request(endpoint, method="GET")
+                progress.update(1, rows=1)
+                return body
+
+        with progress:
+            results = await asyncio.gather(*[_fetch_body(summary) for summary in selected], return_exceptions=True)
+        return cls._report_failures(
+            results, [str(summary.get(resolved_activity_id_field)) for summary in selected], "activity body"
+        )
+
+    @staticmethod
+    def _report_failures(results: List[Any], labels: List[str], what: str) -> List[Any]:
+        """
+        Successful results of a gather(return_exceptions=True); failures are printed
+        so one bad request does not lose the others.
+        """
+        failures = [(label, result) for label, result in zip(labels, results) if isinstance(result, BaseException)]
+        for _, result in failures:
+            if not isinstance(result, Exception):
+                raise result
+        if failures:
+            # First line only: httpx appends a documentation link to status errors.
+            messages = [f"{label}: {type(exc).__name__}: {(str(exc).splitlines() or [''])[0]}" for label, exc in failures[:5]]
+            shown = "; ".join(messages)
+            more = f" (+{len(failures) - 5} more)" if len(failures) > 5 else ""
+            print(f"{len(failures)} {what} request(s) failed, skipped: {shown}{more}")
+        return [result for result in results if not isinstance(result, BaseException)]
+
     # @classmethod
     # async def download_plots(
     #     cls,
@@ -0,0 +1,200 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Sequence
+
+from ..downloader_api import APIConfig, AsyncAPIClient
+from ..progress import Progress
+
+
+class RequestBudget:
+    """
+    Global request budget shared by concurrent jobs: at most `max_in_flight`
+    requests at once and, optionally, `requests_per_second` (token bucket).
+
+    Waiting requests queue per key (project) and free slots are handed out
+    round-robin across keys, so a project with thousands of pending requests
+    cannot starve one that only needs a few.
+    """
+
+    def __init__(self, max_in_flight: int = 16, requests_per_second: float = 0.0):
+        self.max_in_flight = max(1, max_in_flight)
+        self.requests_per_second = max(0.0, requests_per_second)
+        self._in_flight = 0
+        self._waiters: Dict[Hashable, Deque[asyncio.Future]] = {}
+        self._ring: Deque[Hashable] = deque()
+        self._tokens = max(1.0, self.requests_per_second)
+        self._refilled_at = time.monotonic()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+
+    def _take_token(self) -> float:
+        """
+        Consume a rate token if available; otherwise return seconds until the next one.
+        """
+        if not self.requests_per_second:
+            return 0.0
+        now = time.monotonic()
+        capacity = max(1.0, self.requests_per_second)
+        self._tokens = min(capacity, self._tokens + (now - self._refilled_at) * self.requests_per_second)
+        self._refilled_at = now
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return 0.0
+        return (1.0 - self._tokens) / self.requests_per_second
+
+    def _dispatch(self) -> None:
+        self._wakeup = None
+        while self._ring and self._in_flight < self.max_in_flight:
+            key = self._ring.popleft()
+            queue = self._waiters[key]
+            while queue and queue[0].done():
+                queue.popleft()  # cancelled while waiting
+            if not queue:
+                del self._waiters[key]
+                continue
+            wait = self._take_token()
+            if wait:
+                self._ring.appendleft(key)
+                self._wakeup = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            self._in_flight += 1
+            queue.popleft().set_result(None)
+            if queue:
+                self._ring.append(key)
+            else:
+                del self._waiters[key]
+
+    async def acquire(self, key: Hashable) -> None:
+        if not self._waiters and self._in_flight < self.max_in_flight and not self._take_token():
+            self._in_flight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        if key not in self._waiters:
+            self._waiters[key] = deque()
+            self._ring.append(key)
+        self._waiters[key].append(future)
+        if self._wakeup is None:
+            self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # granted just before the cancellation
+            raise
+
+    def release(self) -> None:
+        self._in_flight -= 1
+        if self._wakeup is None:
+            self._dispatch()
+
+    @classmethod
+    def from_env(cls) -> "RequestBudget":
+        return cls(
+            max_in_flight=int(os.getenv("SCHEDULER_MAX_IN_FLIGHT", "16")),
+            requests_per_second=float(os.getenv("SCHEDULER_REQUESTS_PER_SECOND", "0")),
+        )
+
+
+class BudgetedClient:
+    """
+    AsyncAPIClient view for one job: every request waits for a slot of the shared
+    budget under this job's key. Everything else is delegated to the shared client.
+    """
+
+    def __init__(self, client: AsyncAPIClient, budget: RequestBudget, key: Hashable):
+        self._inner = client
+        self._budget = budget
+        self.key = key
+        self.requests = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._inner, name)
+
+    async def request(self, endpoint: str, method: str = "GET", **kwargs: Any) -> Dict[str, Any]:
+        await self._budget.acquire(self.key)
+        try:
+            return await self._inner.request(endpoint, method, **kwargs)
+        finally:
+            self._budget.release()
+            self.requests += 1
+
+    @staticmethod
+    def save_json(data: Dict[str, Any], output_path: str) -> Path:
+        return AsyncAPIClient.save_json(data, output_path)
+
+
+@dataclass
+class ProjectRunResult:
+    project: Any
+    status: str = "pending"
+    seconds: float = 0.0
+    requests: int = 0
+    error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+
+
+ProjectJob = Callable[[Any, APIConfig, Any], Awaitable[Dict[str, Any]]]
+
+
+async def run_projects(
+    client: AsyncAPIClient,
+    cfg: APIConfig,
+    project_ids: Sequence[Any],
+    job: ProjectJob,
+    *,
+    budget: Optional[RequestBudget] = None,
+    project_concurrency: Optional[int] = None,
+    summary_path: Optional[str] = None,
+) -> List[ProjectRunResult]:
+    """
+    Run `job(client, cfg, project_id)` for many projects concurrently on one shared
+    client. All requests draw from `budget`, shared fairly across projects; up to
+    `project_concurrency` projects run at once. A failing project is recorded in
+    the summary and does not stop the others.
+    """
+    resolved_budget = budget or RequestBudget.from_env()
+    resolved_concurrency = project_concurrency or int(os.getenv("SCHEDULER_PROJECT_CONCURRENCY", "4"))
+    semaphore = asyncio.Semaphore(max(1, resolved_concurrency))
+    progress = Progress("projects", len(project_ids), unit="projects", client=client, mode=os.getenv("SCHEDULER_PROGRESS"))
+
+    async def _run(project_id: Any) -> ProjectRunResult:
+        outcome = ProjectRunResult(project=project_id)
+        async with semaphore:
+            project_client = BudgetedClient(client, resolved_budget, project_id)
+            start = time.perf_counter()
+            try:
+                outcome.result = await job(project_client, cfg, project_id)
+                outcome.status = "ok"
+            except Exception as exc:
+                outcome.status = "failed"
+                outcome.error = f"{type(exc).__name__}: {exc}"
+            outcome.seconds = round(time.perf_counter() - start, 3)
+            outcome.requests = project_client.requests
+        progress.update(1)
+        return outcome
+
+    with progress:
+        results = list(await asyncio.gather(*[_run(project_id) for project_id in project_ids]))
+    failed = sum(1 for r in results if r.status != "ok")
+    print(f"{len(results) - failed}/{len(results)} project(s) downloaded, {failed} failed")
+    if summary_path:
+        save_summary(results, summary_path)
+    return results
+
+
+def save_summary(results: List[ProjectRunResult], summary_path: str) -> Path:
+    output = Path(summary_path)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    rows = [asdict(r) for r in results]
+    summary = {
+        "total": len(rows),
+        "ok": sum(1 for r in rows if r["status"] == "ok"),
+        "failed": sum(1 for r in rows if r["status"] != "ok"),
+        "requests": sum(r["requests"] for r in rows),
+    }
+    output.write_text(json.dumps({"summary": summary, "rows": rows}, indent=2, ensure_ascii=False, default=str), encoding="utf-8")
+    return output
@@ -0,0 +1,425 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import queue
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ..cassette import merge_cassette
+from ..downloader_api import APIConfig, AsyncAPIClient
+from ..progress import Progress
+from .paginating_download import PaginatingDownload
+from .project_scheduler import BudgetedClient, RequestBudget
+
+# (key, kind, value): kind is "page" (page number), "rows" (already fetched rows) or "ids" (id batch).
+ShardTask = Tuple[int, str, Any]
+
+
+@dataclass
+class ShardSpec:
+    """
+    Everything a worker needs to turn a task into rows: the paged search request
+    and, optionally, the details request made for each page's ids.
+    """
+
+    endpoint: str = ""
+    method: str = "POST"
+    payload: Dict[str, Any] = field(default_factory=dict)
+    params: Dict[str, Any] = field(default_factory=dict)
+    page_param_name: Optional[str] = None
+    page_in_body: Optional[bool] = None
+    fetch_details: bool = True
+    details_endpoint: Optional[str] = None
+    details_id_field: Optional[str] = None
+    details_ids_param: str = "ids"
+    details_ids_key: Optional[str] = None
+    details_batch_size: int = 200
+    details_id_in_path: Optional[bool] = None
+    details_id_placeholder: str = "{id}"
+    details_method: str = "GET"
+    details_payload: Optional[Dict[str, Any]] = None
+    details_ids_as_list: bool = False
+    concurrency: int = 8
+    # Request budget of the whole download, split between the workers by _run_shards.
+    # With no max_in_flight, each worker keeps at most `concurrency` requests in flight.
+    max_in_flight: int = 0
+    requests_per_second: float = 0.0
+
+
+async def _fetch_details(client: AsyncAPIClient, cfg: APIConfig, spec: ShardSpec, record_ids: Sequence[Any]) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = []
+    async for batch_rows in PaginatingDownload.iter_detail_batches(
+        client,
+        cfg,
+        record_ids,
+        details_endpoint=spec.details_endpoint or cfg.plots_details_endpoint,
+        ids_param=spec.details_ids_param,
+        ids_key=spec.details_ids_key,
+        batch_size=spec.details_batch_size,
+        concurrency=spec.concurrency,
+        id_in_path=spec.details_id_in_path,
+        id_placeholder=spec.details_id_placeholder,
+        method=spec.details_method,
+        payload=spec.details_payload,
+        ids_as_list=spec.details_ids_as_list,
+    ):
+        rows.extend(batch_rows)
+    return rows
+
+
+async def run_shard_task(client: AsyncAPIClient, cfg: APIConfig, spec: ShardSpec, kind: str, value: Any) -> List[Dict[str, Any]]:
+    """
+    Rows for one task: a search page (plus its details when spec.fetch_details),
+    prefetched rows that only need details, or the details of an id batch.
+    """
+    if kind == "ids":
+        return await _fetch_details(client, cfg, spec, value)
+    if kind == "page":
+        method = spec.method.upper()
+        page_in_body = cfg.page_in_body if spec.page_in_body is None else spec.page_in_body
+        data = await client.request(
+            spec.endpoint,
+            **PaginatingDownload.page_request_kwargs(
+                method, spec.payload, spec.params, value, spec.page_param_name or cfg.page_param_name, page_in_body
+            ),
+        )
+        rows = [row for row in data.get(cfg.rows_key, []) if isinstance(row, dict)]
+    elif kind == "rows":
+        rows = list(value)
+    else:
+        raise ValueError(f"unknown shard task kind: {kind}")
+    if not (spec.fetch_details and spec.details_endpoint):
+        return rows
+    id_field = spec.details_id_field or cfg.plot_id_field
+    record_ids = list(dict.fromkeys(row.get(id_field) for row in rows if row.get(id_field) is not None))
+    return await _fetch_details(client, cfg, spec, record_ids)
+
+
+def encode_rows(rows: List[Dict[str, Any]], id_field: str) -> List[Tuple[Any, str]]:
+    # Serialized in the worker, so the writer only concatenates strings.
+    return [(row.get(id_field), json.dumps(row, ensure_ascii=False)) for row in rows]
+
+
+async def _worker(index: int, cfg: APIConfig, spec: ShardSpec, tasks: List[ShardTask], results: Any) -> None:
+    # Pages and their details batches both run `concurrency` wide; the budget caps
+    # the requests they make together.
+    budget = RequestBudget(spec.max_in_flight or spec.concurrency, spec.requests_per_second)
+    client = BudgetedClient(AsyncAPIClient(cfg), budget, index)
+    semaphore = asyncio.Semaphore(max(1, spec.concurrency))
+    id_field = spec.details_id_field or cfg.plot_id_field
+
+    async def _run(key: int, kind: str, value: Any) -> None:
+        async with semaphore:
+            rows = await run_shard_task(client, cfg, spec, kind, value)
+        await asyncio.to_thread(results.put, ("chunk", key, encode_rows(rows, id_field)))
+
+    try:
+        await asyncio.gather(*[_run(*task) for task in tasks])
+        results.put(("done", index, {"tasks": len(tasks), "bytes": client.bytes_received}))
+    except Exception as exc:
+        results.put(("error", index, f"{type(exc).__name__}: {exc}"))
+    finally:
+        await client.aclose()
+
+
+def _recording(cfg: APIConfig) -> bool:
+    return cfg.cassette_mode.strip().lower() == "record"
+
+
+def _worker_cassette(cfg: APIConfig, pid: int) -> str:
+    # Per process id: concurrent sharded downloads (several projects) never share a file.
+    cassette = Path(cfg.cassette_path)
+    return str(cassette.with_name(f"w{pid}_{cassette.name}"))
+
+
+def _worker_main(index: int, cfg: APIConfig, spec: ShardSpec, tasks: List[ShardTask], results: Any) -> None:
+    # One event loop and one client per process; per-phase progress is reported by the writer.
+    os.environ["API_PROGRESS"] = "off"
+    if _recording(cfg):
+        # Merged into the main cassette by _run_shards, so replay reads one file with any worker count.
+        cfg = replace(cfg, cassette_path=_worker_cassette(cfg, os.getpid()))
+    asyncio.run(_worker(index, cfg, spec, tasks, results))
+
+
+class OrderedRowWriter:
+    """
+    Streams task results to `output` in task-key order whatever order they arrive in,
+    so the merged file is the same for any worker count. Written to a temporary file
+    and moved into place only when every task arrived.
+    """
+
+    def __init__(self, output: Path, rows_key: str, keys: Sequence[int], dedupe: bool):
+        self.output = output
+        self.written = 0
+        self._order = sorted(keys)
+        self._next = 0
+        self._pending: Dict[int, List[Tuple[Any, str]]] = {}
+        self._seen: Optional[set] = set() if dedupe else None
+        output.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp = output.with_name(output.name + ".part")
+        self._file = self._tmp.open("w", encoding="utf-8")
+        self._file.write(f'{{"{rows_key}": [')
+
+    def add(self, key: int, items: List[Tuple[Any, str]]) -> None:
+        self._pending[key] = items
+        while self._next < len(self._order) and self._order[self._next] in self._pending:
+            self._write(self._pending.pop(self._order[self._next]))
+            self._next += 1
+
+    def _write(self, items: List[Tuple[Any, str]]) -> None:
+        for row_id, text in items:
+            if self._seen is not None and isinstance(row_id, (str, int)):
+                # Same rule as download_records: the first occurrence of an id wins.
+                if row_id in self._seen:
+                    continue
+                self._seen.add(row_id)
+            self._file.write((",\n" if self.written else "\n") + text)
+            self.written += 1
+
+    def close(self) -> Path:
+        if self._next != len(self._order):
+            raise RuntimeError(f"{len(self._order) - self._next} task(s) missing from {self.output}")
+        self._file.write("\n]}\n")
+        self._file.close()
+        self._tmp.replace(self.output)
+        return self.output
+
+    def abort(self) -> None:
+        self._file.close()
+        self._tmp.unlink(missing_ok=True)
+
+
+def _run_shards(
+    cfg: APIConfig,
+    spec: ShardSpec,
+    tasks: List[ShardTask],
+    output_path: str,
+    *,
+    workers: int,
+    dedupe: bool,
+    label: str,
+) -> Tuple[int, Path]:
+    workers = max(1, min(workers, len(tasks), spec.max_in_flight or len(tasks)))
+    spec = replace(
+        spec,
+        max_in_flight=spec.max_in_flight // workers,
+        requests_per_second=spec.requests_per_second / workers,
+    )
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue(maxsize=max(16, workers * spec.concurrency * 2))
+    # Interleaved shards: every worker starts at the low keys, so the writer can stream early.
+    processes = [
+        context.Process(target=_worker_main, args=(index, cfg, spec, tasks[index::workers], results), daemon=True)
+        for index in range(workers)
+    ]
+    writer = OrderedRowWriter(Path(output_path), cfg.rows_key, [task[0] for task in tasks], dedupe)
+    progress = Progress(label, len(tasks), unit="tasks")
+    finished: set = set()
+    errors: List[str] = []
+    for process in processes:
+        process.start()
+    try:
+        while len(finished) < workers and not errors:
+            try:
+                kind, key, value = results.get(timeout=1.0)
+            except queue.Empty:
+                for index, process in enumerate(processes):
+                    if index not in finished and not process.is_alive() and process.exitcode:
+                        errors.append(f"worker {index} exited with code {process.exitcode}")
+                continue
+            if kind == "chunk":
+                writer.add(key, value)
+                progress.update(1, rows=len(value))
+            elif kind == "done":
+                finished.add(key)
+            else:
+                errors.append(f"worker {key}: {value}")
+    finally:
+        progress.close()
+        if errors or len(finished) < workers:
+            for process in processes:
+                process.terminate()
+        for process in processes:
+            process.join()
+        if _recording(cfg):
+            for process in processes:
+                merge_cassette(_worker_cassette(cfg, process.pid), cfg.cassette_path)
+    if errors:
+        writer.abort()
+        raise RuntimeError("; ".join(errors))
+    output = writer.close()
+    print(f"{writer.written} record(s) from {len(tasks)} task(s) on {workers} worker process(es) written to {output}")
+    return writer.written, output
+
+
+def default_workers() -> int:
+    return int(os.getenv("DOWNLOAD_WORKERS", "0") or 0) or os.cpu_count() or 1
+
+
+def records_spec(
+    endpoint: str,
+    *,
+    root_payload: Optional[Dict[str, Any]] = None,
+    root_params: Optional[Dict[str, Any]] = None,
+    extra_filters: Optional[Dict[str, Any]] = None,
+    filter_method: str = "POST",
+    page_param_name: Optional[str] = None,
+    page_in_body: Optional[bool] = None,
+    fetch_details: bool = True,
+    details_endpoint: Optional[str] = None,
+    details_id_field: Optional[str] = None,
+    details_ids_param: Optional[str] = None,
+    details_batch_size: Optional[int] = None,
+    details_concurrency: Optional[int] = None,
+    details_method: str = "GET",
+    details_ids_as_list: bool = False,
+) -> ShardSpec:
+    payload: Dict[str, Any] = dict(root_payload or {})
+    params: Dict[str, Any] = dict(root_params or {})
+    cleaned = {k: v for k, v in (extra_filters or {}).items() if v is not None}
+    payload.update(cleaned)
+    params.update(cleaned)
+    return ShardSpec(
+        endpoint=endpoint,
+        method=filter_method,
+        payload=payload,
+        params=params,
+        page_param_name=page_param_name,
+        page_in_body=page_in_body,
+        fetch_details=fetch_details,
+        details_endpoint=details_endpoint,
+        details_id_field=details_id_field,
+        details_ids_param=details_ids_param or os.getenv("PLOTS_DETAILS_IDS_PARAM", "ids"),
+        details_batch_size=details_batch_size or int(os.getenv("PLOTS_DETAILS_BATCH_SIZE", "200")),
+        details_method=details_method,
+        details_ids_as_list=details_ids_as_list,
+        concurrency=details_concurrency or int(os.getenv("PLOTS_DETAILS_CONCURRENCY", "8")),
+    )
+
+
+def ids_spec(
+    cfg: APIConfig,
+    *,
+    details_endpoint: Optional[str] = None,
+    details_ids_param: Optional[str] = None,
+    details_batch_size: Optional[int] = None,
+    details_concurrency: Optional[int] = None,
+    details_method: Optional[str] = None,
+    details_ids_as_list: Optional[bool] = None,
+) -> ShardSpec:
+    return ShardSpec(
+        details_endpoint=details_endpoint or cfg.plots_details_endpoint,
+        details_ids_param=details_ids_param or os.getenv("PLOTS_DETAILS_IDS_PARAM", "ids"),
+        details_batch_size=details_batch_size or int(os.getenv("PLOTS_DETAILS_BATCH_SIZE", "200")),
+        details_method=details_method or os.getenv("PLOTS_DETAILS_METHOD", "GET"),
+        details_ids_as_list=(
+            details_ids_as_list
+            if details_ids_as_list is not None
+            else os.getenv("PLOTS_DETAILS_IDS_AS_LIST", "false").lower() == "true"
+        ),
+        concurrency=details_concurrency or int(os.getenv("PLOTS_DETAILS_CONCURRENCY", "8")),
+    )
+
+
+async def fetch_first_page(
+    client: AsyncAPIClient,
+    cfg: APIConfig,
+    spec: ShardSpec,
+    *,
+    first_page_number: Optional[int] = None,
+    total_pages_key: Optional[str] = None,
+) -> Tuple[int, int, List[Dict[str, Any]]]:
+    """
+    (first page number, total pages, first page rows) for a records spec.
+    """
+    first_page = cfg.first_page_number if first_page_number is None else first_page_number
+    first_data = await client.request(
+        spec.endpoint,
+        **PaginatingDownload.page_request_kwargs(
+            spec.method.upper(),
+            spec.payload,
+            spec.params,
+            first_page,
+            spec.page_param_name or cfg.page_param_name,
+            cfg.page_in_body if spec.page_in_body is None else spec.page_in_body,
+        ),
+    )
+    total_pages = int(first_data.get(total_pages_key or cfg.total_pages_key, 1) or 1)
+    first_rows = [row for row in first_data.get(cfg.rows_key, []) if isinstance(row, dict)]
+    return first_page, total_pages, first_rows
+
+
+async def download_records_sharded(
+    client: AsyncAPIClient,
+    cfg: APIConfig,
+    endpoint: str,
+    output_path: str,
+    *,
+    workers: Optional[int] = None,
+    first_page_number: Optional[int] = None,
+    total_pages_key: Optional[str] = None,
+    max_in_flight: int = 0,
+    requests_per_second: float = 0.0,
+    **spec_kwargs: Any,
+) -> Tuple[int, Path]:
+    """
+    download_records() across worker processes: the first page is fetched here to
+    learn the page count, then pages (and each page's details) are spread over
+    `workers` processes, each with its own event loop and client. Rows stream back
+    to this process and are written in page order. Returns (rows written, output).
+    `max_in_flight` and `requests_per_second` (0 = unlimited) are shared by all
+    workers. `spec_kwargs` are the records_spec() options.
+    """
+    spec = replace(records_spec(endpoint, **spec_kwargs), max_in_flight=max_in_flight, requests_per_second=requests_per_second)
+    first_page, total_pages, first_rows = await fetch_first_page(
+        client, cfg, spec, first_page_number=first_page_number, total_pages_key=total_pages_key
+    )
+    tasks: List[ShardTask] = [(0, "rows", first_rows)]
+    tasks.extend((offset, "page", first_page + offset) for offset in range(1, total_pages))
+    return await asyncio.to_thread(
+        _run_shards,
+        cfg,
+        spec,
+        tasks,
+        output_path,
+        workers=workers or default_workers(),
+        dedupe=bool(spec.fetch_details and spec.details_endpoint),
+        label="sharded pages",
+    )
+
+
+async def download_by_ids_sharded(
+    cfg: APIConfig,
+    record_ids: Sequence[Any],
+    output_path: str,
+    *,
+    workers: Optional[int] = None,
+    max_in_flight: int = 0,
+    requests_per_second: float = 0.0,
+    **spec_kwargs: Any,
+) -> Tuple[int, Path]:
+    """
+    download_by_ids() across worker processes: id batches are spread over `workers`
+    processes and written in input order. The budget is shared as in
+    download_records_sharded(). `spec_kwargs` are the ids_spec() options.
+    """
+    spec = replace(ids_spec(cfg, **spec_kwargs), max_in_flight=max_in_flight, requests_per_second=requests_per_second)
+    unique_ids = list(dict.fromkeys(i for i in record_ids if i is not None))
+    batch_size = spec.details_batch_size
+    tasks: List[ShardTask] = [
+        (index, "ids", unique_ids[start : start + batch_size]) for index, start in enumerate(range(0, len(unique_ids), batch_size))
+    ]
+    if not tasks:
+        return 0, AsyncAPIClient.save_json({cfg.rows_key: []}, output_path)
+    return await asyncio.to_thread(
+        _run_shards,
+        cfg,
+        spec,
+        tasks,
+        output_path,
+        workers=workers or default_workers(),
+        dedupe=False,
+        label="sharded details",
+    )
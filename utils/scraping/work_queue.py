@@ -0,0 +1,498 @@
+import abc
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ..downloader_api import APIConfig, AsyncAPIClient
+from ..progress import Progress
+from .sharded_download import OrderedRowWriter, ShardSpec, ShardTask, encode_rows, fetch_first_page, ids_spec, records_spec, run_shard_task
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    spec TEXT NOT NULL,
+    output TEXT NOT NULL,
+    results_dir TEXT NOT NULL,
+    rows_key TEXT NOT NULL,
+    dedupe INTEGER NOT NULL,
+    max_attempts INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    key INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    error TEXT,
+    UNIQUE (job_id, key)
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, available_at, id);
+"""
+
+
+@dataclass
+class QueueJob:
+    job_id: str
+    spec: Dict[str, Any]
+    output: str
+    results_dir: str
+    rows_key: str = "rows"
+    dedupe: bool = False
+    max_attempts: int = 3
+    created_at: float = 0.0
+
+    def result_path(self, key: int) -> Path:
+        return Path(self.results_dir) / self.job_id / f"{key:08d}.rows"
+
+
+@dataclass
+class QueueTask:
+    id: int
+    job_id: str
+    key: int
+    kind: str
+    value: Any
+    status: str
+    attempts: int
+    error: Optional[str] = None
+
+
+class WorkQueue(abc.ABC):
+    """
+    Task queue shared by a coordinator and any number of workers. A task is leased
+    to one worker for `lease_seconds`; the worker heartbeats to keep it, and a lease
+    that expires (crashed or partitioned worker) makes the task available again
+    until it has used up its job's max_attempts.
+
+    SQLiteWorkQueue is the built-in backend; others plug in through register_backend().
+    """
+
+    @abc.abstractmethod
+    def create_job(self, job: QueueJob, tasks: Sequence[ShardTask]) -> None:
+        """
+        Raises ValueError when a job with the same id exists.
+        """
+
+    @abc.abstractmethod
+    def get_job(self, job_id: str) -> Optional[QueueJob]: ...
+
+    @abc.abstractmethod
+    def jobs(self) -> List[str]:
+        """
+        Job ids, oldest first.
+        """
+
+    @abc.abstractmethod
+    def lease(self, worker_id: str, lease_seconds: float) -> Optional[QueueTask]: ...
+
+    @abc.abstractmethod
+    def heartbeat(self, task_id: int, worker_id: str, lease_seconds: float) -> bool:
+        """
+        Extend the lease; False when the worker no longer holds it.
+        """
+
+    @abc.abstractmethod
+    def complete(self, task_id: int, worker_id: str) -> bool: ...
+
+    @abc.abstractmethod
+    def fail(self, task_id: int, worker_id: str, error: str, retry_delay: float = 0.0) -> None: ...
+
+    @abc.abstractmethod
+    def tasks(self, job_id: str) -> List[QueueTask]: ...
+
+    @abc.abstractmethod
+    def counts(self, job_id: Optional[str] = None) -> Dict[str, int]:
+        """
+        Task count per status (pending, leased, done, failed).
+        """
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    WorkQueue in one SQLite file: enough for several worker processes on one machine
+    or on machines sharing a filesystem with working file locks. Leasing runs in a
+    write transaction, so two workers never get the same task.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    @staticmethod
+    def _to_task(row: sqlite3.Row) -> QueueTask:
+        return QueueTask(
+            id=row["id"],
+            job_id=row["job_id"],
+            key=row["key"],
+            kind=row["kind"],
+            value=json.loads(row["value"]),
+            status=row["status"],
+            attempts=row["attempts"],
+            error=row["error"],
+        )
+
+    def create_job(self, job: QueueJob, tasks: Sequence[ShardTask]) -> None:
+        with self._transaction() as conn:
+            try:
+                conn.execute(
+                    "INSERT INTO jobs (job_id, spec, output, results_dir, rows_key, dedupe, max_attempts, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job.job_id, json.dumps(job.spec), job.output, job.results_dir, job.rows_key, int(job.dedupe), job.max_attempts, job.created_at or time.time()),
+                )
+            except sqlite3.IntegrityError:
+                raise ValueError(f"job {job.job_id} already exists") from None
+            conn.executemany(
+                "INSERT INTO tasks (job_id, key, kind, value, max_attempts) VALUES (?, ?, ?, ?, ?)",
+                [(job.job_id, key, kind, json.dumps(value, ensure_ascii=False), job.max_attempts) for key, kind, value in tasks],
+            )
+
+    def get_job(self, job_id: str) -> Optional[QueueJob]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        data = {key: row[key] for key in row.keys()}
+        data["spec"] = json.loads(data["spec"])
+        data["dedupe"] = bool(data["dedupe"])
+        return QueueJob(**data)
+
+    def jobs(self) -> List[str]:
+        with self._connect() as conn:
+            return [row["job_id"] for row in conn.execute("SELECT job_id FROM jobs ORDER BY created_at")]
+
+    def lease(self, worker_id: str, lease_seconds: float) -> Optional[QueueTask]:
+        now = time.time()
+        with self._transaction() as conn:
+            # Expired leases: retry while attempts remain, otherwise give up on the task.
+            conn.execute(
+                "UPDATE tasks SET status = 'failed', lease_owner = NULL, error = COALESCE(error, 'lease expired') "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= max_attempts",
+                (now,),
+            )
+            conn.execute(
+                "UPDATE tasks SET status = 'pending', lease_owner = NULL WHERE status = 'leased' AND lease_expires < ?",
+                (now,),
+            )
+            row = conn.execute(
+                "SELECT * FROM tasks WHERE status = 'pending' AND available_at <= ? ORDER BY id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1 WHERE id = ?",
+                (worker_id, now + lease_seconds, row["id"]),
+            )
+        task = self._to_task(row)
+        task.status = "leased"
+        task.attempts += 1
+        return task
+
+    def heartbeat(self, task_id: int, worker_id: str, lease_seconds: float) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET lease_expires = ? WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+                (time.time() + lease_seconds, task_id, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, task_id: int, worker_id: str) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = 'done', lease_owner = NULL, error = NULL WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+                (task_id, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, task_id: int, worker_id: str, error: str, retry_delay: float = 0.0) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END, "
+                "lease_owner = NULL, error = ?, available_at = ? WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+                (error, time.time() + retry_delay, task_id, worker_id),
+            )
+
+    def tasks(self, job_id: str) -> List[QueueTask]:
+        with self._connect() as conn:
+            return [self._to_task(row) for row in conn.execute("SELECT * FROM tasks WHERE job_id = ? ORDER BY key", (job_id,))]
+
+    def counts(self, job_id: Optional[str] = None) -> Dict[str, int]:
+        query = "SELECT status, COUNT(*) AS n FROM tasks"
+        params: Tuple[Any, ...] = ()
+        if job_id is not None:
+            query += " WHERE job_id = ?"
+            params = (job_id,)
+        with self._connect() as conn:
+            found = {row["status"]: row["n"] for row in conn.execute(query + " GROUP BY status", params)}
+        return {status: found.get(status, 0) for status in ("pending", "leased", "done", "failed")}
+
+
+_BACKENDS: Dict[str, Callable[[str], WorkQueue]] = {"sqlite": SQLiteWorkQueue}
+
+
+def register_backend(scheme: str, factory: Callable[[str], WorkQueue]) -> None:
+    """
+    Make open_queue("<scheme>://<location>") build `factory(location)`.
+    """
+    _BACKENDS[scheme] = factory
+
+
+def open_queue(url: Optional[str] = None) -> WorkQueue:
+    """
+    Queue for a "<scheme>://<location>" URL or a plain SQLite file path
+    (default WORK_QUEUE).
+    """
+    resolved = url or os.getenv("WORK_QUEUE", "./json_downloaded_api/work_queue.sqlite")
+    scheme, sep, location = resolved.partition("://")
+    if not sep:
+        return SQLiteWorkQueue(resolved)
+    if scheme not in _BACKENDS:
+        raise ValueError(f"unknown work queue backend: {scheme} (known: {', '.join(sorted(_BACKENDS))})")
+    return _BACKENDS[scheme](location)
+
+
+def _check_new_job_id(work_queue: WorkQueue, job_id: str) -> None:
+    # Before any request is made; create_job() still rejects a job id taken meanwhile.
+    if work_queue.get_job(job_id) is not None:
+        raise ValueError(f"job {job_id} already exists")
+
+
+def _new_job(job_id: str, spec: ShardSpec, output: str, results_dir: Optional[str], rows_key: str, dedupe: bool, max_attempts: Optional[int]) -> QueueJob:
+    return QueueJob(
+        job_id=job_id,
+        spec=asdict(spec),
+        output=output,
+        results_dir=results_dir or os.getenv("WORK_QUEUE_RESULTS", "./json_downloaded_api/work_queue_results"),
+        rows_key=rows_key,
+        dedupe=dedupe,
+        max_attempts=max_attempts or int(os.getenv("WORK_QUEUE_MAX_ATTEMPTS", "3")),
+        created_at=time.time(),
+    )
+
+
+async def submit_records_job(
+    work_queue: WorkQueue,
+    client: AsyncAPIClient,
+    cfg: APIConfig,
+    endpoint: str,
+    *,
+    job_id: str,
+    output: str,
+    results_dir: Optional[str] = None,
+    pages_per_task: Optional[int] = None,
+    max_attempts: Optional[int] = None,
+    first_page_number: Optional[int] = None,
+    total_pages_key: Optional[str] = None,
+    **spec_kwargs: Any,
+) -> QueueJob:
+    """
+    Queue a download_records() job as page-range tasks. The first page is fetched
+    here for the page count and queued as its own task (details still to fetch).
+    `spec_kwargs` are the records_spec() options.
+    """
+    _check_new_job_id(work_queue, job_id)
+    spec = records_spec(endpoint, **spec_kwargs)
+    first_page, total_pages, first_rows = await fetch_first_page(
+        client, cfg, spec, first_page_number=first_page_number, total_pages_key=total_pages_key
+    )
+    step = max(1, pages_per_task or int(os.getenv("WORK_QUEUE_PAGES_PER_TASK", "10")))
+    tasks: List[ShardTask] = [(0, "rows", first_rows)]
+    tasks.extend(
+        (offset, "pages", [first_page + offset, first_page + min(offset + step, total_pages)])
+        for offset in range(1, total_pages, step)
+    )
+    job = _new_job(job_id, spec, output, results_dir, cfg.rows_key, bool(spec.fetch_details and spec.details_endpoint), max_attempts)
+    work_queue.create_job(job, tasks)
+    print(f"job {job_id}: {len(tasks)} task(s) for {total_pages} page(s) queued")
+    return job
+
+
+def submit_ids_job(
+    work_queue: WorkQueue,
+    cfg: APIConfig,
+    record_ids: Sequence[Any],
+    *,
+    job_id: str,
+    output: str,
+    results_dir: Optional[str] = None,
+    max_attempts: Optional[int] = None,
+    **spec_kwargs: Any,
+) -> QueueJob:
+    """
+    Queue a download_by_ids() job as id-batch tasks. `spec_kwargs` are the ids_spec() options.
+    """
+    _check_new_job_id(work_queue, job_id)
+    spec = ids_spec(cfg, **spec_kwargs)
+    unique_ids = list(dict.fromkeys(i for i in record_ids if i is not None))
+    step = spec.details_batch_size
+    tasks: List[ShardTask] = [(index, "ids", unique_ids[start : start + step]) for index, start in enumerate(range(0, len(unique_ids), step))]
+    job = _new_job(job_id, spec, output, results_dir, cfg.rows_key, False, max_attempts)
+    work_queue.create_job(job, tasks)
+    print(f"job {job_id}: {len(tasks)} task(s) for {len(unique_ids)} id(s) queued")
+    return job
+
+
+async def _execute(client: AsyncAPIClient, cfg: APIConfig, spec: ShardSpec, task: QueueTask) -> List[Dict[str, Any]]:
+    if task.kind != "pages":
+        return await run_shard_task(client, cfg, spec, task.kind, task.value)
+    semaphore = asyncio.Semaphore(max(1, spec.concurrency))
+
+    async def _page(page_number: int) -> List[Dict[str, Any]]:
+        async with semaphore:
+            return await run_shard_task(client, cfg, spec, "page", page_number)
+
+    start, end = task.value
+    pages = await asyncio.gather(*[_page(page_number) for page_number in range(start, end)])
+    return [row for rows in pages for row in rows]
+
+
+def _write_result(job: QueueJob, task: QueueTask, rows: List[Dict[str, Any]], id_field: str) -> Path:
+    # One "<json id>\t<json row>" line per row; written under a temporary name first
+    # so a merge never reads a half-written file.
+    output = job.result_path(task.key)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_name(f"{output.name}.{os.getpid()}.part")
+    with tmp.open("w", encoding="utf-8") as file:
+        for row_id, text in encode_rows(rows, id_field):
+            file.write(f"{json.dumps(row_id)}\t{text}\n")
+    tmp.replace(output)
+    return output
+
+
+async def _heartbeat(work_queue: WorkQueue, task: QueueTask, worker_id: str, lease_seconds: float) -> None:
+    while True:
+        await asyncio.sleep(lease_seconds / 3)
+        if not await asyncio.to_thread(work_queue.heartbeat, task.id, worker_id, lease_seconds):
+            print(f"{worker_id}: lost the lease on task {task.job_id}/{task.key}")
+            return
+
+
+async def run_worker(
+    work_queue: WorkQueue,
+    cfg: APIConfig,
+    *,
+    worker_id: Optional[str] = None,
+    lease_seconds: Optional[float] = None,
+    poll_interval: float = 2.0,
+    keep_running: bool = False,
+    max_tasks: Optional[int] = None,
+) -> int:
+    """
+    Lease and run tasks until the queue has nothing pending or leased (or forever
+    with keep_running). Each task's rows go to the job's results folder; returns
+    the number of tasks completed by this worker.
+    """
+    resolved_worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    resolved_lease = lease_seconds or float(os.getenv("WORK_QUEUE_LEASE_SECONDS", "120"))
+    client = AsyncAPIClient(cfg)
+    jobs: Dict[str, QueueJob] = {}
+    completed = 0
+    try:
+        while max_tasks is None or completed < max_tasks:
+            task = await asyncio.to_thread(work_queue.lease, resolved_worker_id, resolved_lease)
+            if task is None:
+                counts = await asyncio.to_thread(work_queue.counts)
+                if not keep_running and not counts["pending"] and not counts["leased"]:
+                    break
+                await asyncio.sleep(poll_interval)
+                continue
+            if task.job_id not in jobs:
+                jobs[task.job_id] = work_queue.get_job(task.job_id)
+            job = jobs[task.job_id]
+            spec = ShardSpec(**job.spec)
+            heartbeat = asyncio.ensure_future(_heartbeat(work_queue, task, resolved_worker_id, resolved_lease))
+            try:
+                rows = await _execute(client, cfg, spec, task)
+                await asyncio.to_thread(_write_result, job, task, rows, spec.details_id_field or cfg.plot_id_field)
+                if await asyncio.to_thread(work_queue.complete, task.id, resolved_worker_id):
+                    completed += 1
+                print(f"{resolved_worker_id}: {task.job_id}/{task.key} done ({len(rows)} rows, attempt {task.attempts})")
+            except Exception as exc:
+                error = f"{type(exc).__name__}: {exc}"
+                await asyncio.to_thread(work_queue.fail, task.id, resolved_worker_id, error, min(60.0, 2.0**task.attempts))
+                print(f"{resolved_worker_id}: {task.job_id}/{task.key} failed (attempt {task.attempts}): {error}")
+            finally:
+                heartbeat.cancel()
+    finally:
+        await client.aclose()
+    return completed
+
+
+async def wait_for_job(work_queue: WorkQueue, job_id: str, poll_interval: float = 2.0) -> Dict[str, int]:
+    """
+    Poll until every task of the job is done or failed; returns the final counts.
+    """
+    counts = work_queue.counts(job_id)
+    with Progress(f"job {job_id}", sum(counts.values()), unit="tasks") as progress:
+        while counts["pending"] or counts["leased"]:
+            await asyncio.sleep(poll_interval)
+            counts = await asyncio.to_thread(work_queue.counts, job_id)
+            progress.update(counts["done"] + counts["failed"] - progress.done)
+    return counts
+
+
+def merge_job(work_queue: WorkQueue, job_id: str, output: Optional[str] = None) -> Tuple[int, Path]:
+    """
+    Write the job's task results to one {"rows": [...]} file in task order, the same
+    file a single-process download would produce. Refuses while tasks are unfinished.
+    """
+    job = work_queue.get_job(job_id)
+    if job is None:
+        raise ValueError(f"unknown job: {job_id}")
+    tasks = work_queue.tasks(job_id)
+    unfinished = [task for task in tasks if task.status != "done"]
+    if unfinished:
+        details = ", ".join(f"{task.key}={task.status}" + (f" ({task.error})" if task.error else "") for task in unfinished[:10])
+        raise RuntimeError(f"job {job_id} has {len(unfinished)} unfinished task(s): {details}")
+    writer = OrderedRowWriter(Path(output or job.output), job.rows_key, [task.key for task in tasks], job.dedupe)
+    try:
+        for task in tasks:
+            with job.result_path(task.key).open("r", encoding="utf-8") as file:
+                items = []
+                for line in file:
+                    row_id, _, text = line.rstrip("\n").partition("\t")
+                    items.append((json.loads(row_id), text))
+            writer.add(task.key, items)
+    except BaseException:
+        writer.abort()
+        raise
+    merged = writer.close()
+    print(f"job {job_id}: {writer.written} record(s) from {len(tasks)} task(s) merged to {merged}")
+    return writer.written, merged
@@ -0,0 +1,166 @@
+import hashlib
+import os
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    project TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    row_count INTEGER,
+    size_bytes INTEGER,
+    checksum TEXT,
+    folder TEXT NOT NULL,
+    path TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_project_kind ON snapshots (project, kind, created_at);
+CREATE INDEX IF NOT EXISTS idx_snapshots_folder ON snapshots (folder, created_at);
+"""
+
+
+@dataclass
+class Snapshot:
+    id: int
+    project: str
+    kind: str
+    created_at: str
+    row_count: Optional[int]
+    size_bytes: Optional[int]
+    checksum: Optional[str]
+    folder: str
+    path: str
+
+
+def file_checksum(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _folder_key(path: Any) -> str:
+    return str(Path(path).resolve())
+
+
+class SnapshotCatalog:
+    """
+    SQLite index of every snapshot file written (project, kind, timestamp, rows,
+    size, checksum, path), so "latest snapshot" and history listings are index
+    lookups instead of directory scans sorted by date-stamped names.
+
+    Rewriting the same path (create_folder_file reuses names within a day)
+    replaces its entry.
+    """
+
+    def __init__(self, db_path: str, *, checksum: bool = True):
+        self.db_path = db_path
+        self.checksum = checksum
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _to_snapshot(row: sqlite3.Row) -> Snapshot:
+        return Snapshot(**{key: row[key] for key in row.keys()})
+
+    def record(self, path: str, project: Any, kind: str, row_count: Optional[int] = None) -> Snapshot:
+        file_path = Path(path)
+        stat = file_path.stat()
+        resolved = str(file_path.resolve())
+        values = (
+            str(project),
+            kind,
+            datetime.fromtimestamp(stat.st_mtime).isoformat(timespec="seconds"),
+            row_count,
+            stat.st_size,
+            file_checksum(resolved) if self.checksum else None,
+            _folder_key(file_path.parent),
+            resolved,
+        )
+        with self._connect() as conn:
+            conn.execute("DELETE FROM snapshots WHERE path = ?", (resolved,))
+            cursor = conn.execute(
+                "INSERT INTO snapshots (project, kind, created_at, row_count, size_bytes, checksum, folder, path) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                values,
+            )
+            row = conn.execute("SELECT * FROM snapshots WHERE id = ?", (cursor.lastrowid,)).fetchone()
+        return self._to_snapshot(row)
+
+    def history(
+        self,
+        project: Optional[Any] = None,
+        kind: Optional[str] = None,
+        *,
+        folder: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Snapshot]:
+        """
+        Snapshots newest first, filtered by any of project / kind / folder.
+        """
+        clauses, params = [], []
+        if project is not None:
+            clauses.append("project = ?")
+            params.append(str(project))
+        if kind is not None:
+            clauses.append("kind = ?")
+            params.append(kind)
+        if folder is not None:
+            clauses.append("folder = ?")
+            params.append(_folder_key(folder))
+        query = "SELECT * FROM snapshots"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY created_at DESC, id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        with self._connect() as conn:
+            return [self._to_snapshot(row) for row in conn.execute(query, params)]
+
+    def latest(self, project: Optional[Any] = None, kind: Optional[str] = None, *, folder: Optional[str] = None) -> Optional[Snapshot]:
+        rows = self.history(project, kind, folder=folder, limit=1)
+        return rows[0] if rows else None
+
+    def prune_missing(self) -> int:
+        """
+        Drop entries whose file no longer exists; returns how many were removed.
+        """
+        with self._connect() as conn:
+            missing = [(row["id"],) for row in conn.execute("SELECT id, path FROM snapshots") if not os.path.exists(row["path"])]
+            conn.executemany("DELETE FROM snapshots WHERE id = ?", missing)
+        return len(missing)
+
+
+_DEFAULT_CATALOG: Optional[SnapshotCatalog] = None
+
+
+def default_catalog() -> Optional[SnapshotCatalog]:
+    """
+    Catalog configured by SNAPSHOT_CATALOG_PATH (empty disables it).
+    """
+    global _DEFAULT_CATALOG
+    db_path = os.getenv("SNAPSHOT_CATALOG_PATH", "./json_downloaded_api/snapshots.sqlite")
+    if not db_path:
+        return None
+    if _DEFAULT_CATALOG is None or _DEFAULT_CATALOG.db_path != db_path:
+        checksum = os.getenv("SNAPSHOT_CHECKSUM", "true").lower() == "true"
+        _DEFAULT_CATALOG = SnapshotCatalog(db_path, checksum=checksum)
+    return _DEFAULT_CATALOG